@@ -1,3 +1,82 @@
+from datetime import timedelta
+
 from django.contrib import admin
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from Home.models import CreditTransaction, DailyCreditRollup, Job
 
 # Register your models here.
+
+
+@admin.register(CreditTransaction)
+class CreditTransactionAdmin(admin.ModelAdmin):
+    list_display = ("user", "kind", "amount", "balance_after", "title", "created_at")
+    list_filter = ("kind",)
+    search_fields = ("user__username", "title")
+    raw_id_fields = ("user", "session")
+    date_hierarchy = "created_at"
+
+    # The ledger is append-only; corrections are new entries, not edits.
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyCreditRollup)
+class DailyCreditRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "user", "earned", "spent", "sessions_hosted", "sessions_joined")
+    search_fields = ("user__username",)
+    raw_id_fields = ("user",)
+    date_hierarchy = "day"
+    change_list_template = "admin/Home/dailycreditrollup/change_list.html"
+
+    TREND_DAYS = 30
+
+    # Maintained from the ledger; rebuild with manage.py rebuild_rollups.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        # Platform-wide totals per day, straight off the rollup_day index.
+        since = timezone.localdate() - timedelta(days=self.TREND_DAYS - 1)
+        trend = list(
+            DailyCreditRollup.objects.filter(day__gte=since)
+                                     .values("day")
+                                     .annotate(earned=Sum("earned"), spent=Sum("spent"),
+                                               hosted=Sum("sessions_hosted"), joined=Sum("sessions_joined"),
+                                               active_users=Count("user"))
+                                     .order_by("day")
+        )
+        peak = max((max(d["earned"], d["spent"]) for d in trend), default=0) or 1
+        for d in trend:
+            d["earned_pct"] = round(100 * d["earned"] / peak)
+            d["spent_pct"] = round(100 * d["spent"] / peak)
+
+        extra_context = {**(extra_context or {}), "trend": trend, "trend_days": self.TREND_DAYS}
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "task", "status", "attempts", "max_attempts", "run_at", "finished_at", "key")
+    list_filter = ("status", "task")
+    search_fields = ("key",)
+    readonly_fields = ("task", "payload", "key", "attempts", "locked_at", "locked_by", "last_error",
+                       "created_at", "finished_at")
+    actions = ("retry",)
+
+    @admin.action(description="Retry selected jobs now")
+    def retry(self, request, queryset):
+        retried = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, run_at=timezone.now(), attempts=0, finished_at=None,
+        )
+        self.message_user(request, f"Queued {retried} jobs.")
@@ -5,5 +5,6 @@ class HomeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Home'
 
-def ready(self):
-        import Home.signals
\ No newline at end of file
+    def ready(self):
+        import Home.signals  # noqa: F401  (registers the signal receivers)
+        import Home.tasks  # noqa: F401  (registers the background job handlers)
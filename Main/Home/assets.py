@@ -0,0 +1,153 @@
+import gzip
+import mimetypes
+import re
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+# Pillow (image variants) and brotli (.br files) are optional: without them
+# the pipeline still hashes files and writes gzip variants.
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE = {".css", ".js", ".svg", ".html", ".txt", ".json", ".xml"}
+RESIZABLE = {".jpg", ".jpeg", ".png"}
+IMAGE_WIDTHS = (480, 960)
+MIN_COMPRESS_SIZE = 256
+
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.")
+STYLE_BLOCK = re.compile(r"[ \t]*<style[^>]*>(.*?)</style>[ \t]*\n?", re.S | re.I)
+ONE_YEAR = 60 * 60 * 24 * 365
+
+
+# ==========================================================
+# PRECOMPRESSION (.gz / .br next to each text asset)
+# ==========================================================
+def precompress(path):
+    path = Path(path)
+    data = path.read_bytes()
+    if path.suffix not in COMPRESSIBLE or len(data) < MIN_COMPRESS_SIZE:
+        return []
+
+    written = []
+    variants = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda d: brotli.compress(d, quality=11)))
+
+    for suffix, compress in variants:
+        packed = compress(data)
+        if len(packed) < len(data):
+            target = path.with_name(path.name + suffix)
+            target.write_bytes(packed)
+            written.append(target)
+    return written
+
+
+# ==========================================================
+# RESPONSIVE IMAGES (resized JPEG/PNG + WebP per width)
+# ----------------------------------------------------------
+# Returns {variant name: bytes}; names look like
+# images/2-480w.jpg and images/2-480w.webp.
+# ==========================================================
+def variant_name(name, width, ext=None):
+    stem, suffix = name.rsplit(".", 1)
+    return f"{stem}-{width}w.{ext or suffix}"
+
+
+def image_variants(name, data):
+    if Image is None or Path(name).suffix.lower() not in RESIZABLE:
+        return {}
+
+    original = Image.open(BytesIO(data))
+    fmt = original.format
+    variants = {}
+
+    for width in IMAGE_WIDTHS:
+        if width >= original.width:
+            continue
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS)
+
+        out = BytesIO()
+        resized.save(out, format=fmt, quality=80, optimize=True)
+        variants[variant_name(name, width)] = out.getvalue()
+
+        out = BytesIO()
+        resized.convert("RGB").save(out, format="WEBP", quality=78, method=6)
+        variants[variant_name(name, width, "webp")] = out.getvalue()
+
+    return variants
+
+
+# ==========================================================
+# INLINE CSS EXTRACTION
+# ----------------------------------------------------------
+# Moves every <style> block of a template into one stylesheet
+# and leaves a <link> where the first block was.
+# ==========================================================
+def extract_inline_css(template_path, static_dir, css_prefix="css/pages"):
+    template_path = Path(template_path)
+    source = template_path.read_text()
+    blocks = STYLE_BLOCK.findall(source)
+    if not blocks:
+        return None
+
+    css_name = f"{css_prefix}/{template_path.stem.lower()}.css"
+    css_path = Path(static_dir) / css_name
+    css_path.parent.mkdir(parents=True, exist_ok=True)
+    css_path.write_text("\n\n".join(block.strip("\n") for block in blocks) + "\n")
+
+    link = f"<link rel=\"stylesheet\" href=\"{{% static '{css_name}' %}}\">\n"
+    first = STYLE_BLOCK.search(source)
+    rewritten = source[:first.start()] + link + STYLE_BLOCK.sub("", source[first.start():])
+
+    if not re.search(r"{%\s*load\s+static\s*%}", rewritten.split(link)[0]):
+        rewritten = rewritten.replace(link, "{% load static %}\n" + link, 1)
+
+    template_path.write_text(rewritten)
+    return css_name
+
+
+# ==========================================================
+# SERVING (STATIC_ROOT, picks .br / .gz by Accept-Encoding)
+# ==========================================================
+def serve(request, path):
+    try:
+        full_path = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404(path)
+    if not full_path.is_file():
+        raise Http404(path)
+
+    content_type = mimetypes.guess_type(full_path.name)[0] or "application/octet-stream"
+    accepted = request.headers.get("Accept-Encoding", "")
+    encoding = None
+    for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+        packed = full_path.with_name(full_path.name + suffix)
+        if candidate in accepted and packed.is_file():
+            full_path, encoding = packed, candidate
+            break
+
+    response = FileResponse(full_path.open("rb"), content_type=content_type)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+
+    # Hashed names never change content, so browsers may keep them forever.
+    if HASHED_NAME.search(path):
+        patch_cache_control(response, public=True, max_age=ONE_YEAR, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.STATIC_PAGE_MAX_AGE)
+    return response
@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.db.models import Q
+
+from Home import catalogue
+from Home.models import MAX_DURATION_MINUTES, LiveSession, Profile, SessionAttendance
+
+LONGEST = timedelta(minutes=MAX_DURATION_MINUTES)
+WINDOW_PAGE_SIZE = 200
+MAX_WINDOW = timedelta(days=92)
+
+
+# ==========================================================
+# TIME WINDOWS (sessions overlapping [start, end))
+# ----------------------------------------------------------
+# A session [scheduled_at, ends_at) overlaps the window when
+# it starts before `end` and ends after `start`. No session is
+# longer than LONGEST, so anything overlapping also started at
+# or after start - LONGEST: the query is one bounded range scan
+# of scheduled_at, and ends_at is checked from the same index
+# entries (session_open_time) instead of from every row.
+# ==========================================================
+def overlapping(sessions, start, end):
+    return sessions.filter(scheduled_at__gte=start - LONGEST, scheduled_at__lt=end, ends_at__gt=start)
+
+
+def check_window(start, end):
+    if end <= start:
+        raise ValueError("The window must end after it starts.")
+    if end - start > MAX_WINDOW:
+        raise ValueError(f"The window can span at most {MAX_WINDOW.days} days.")
+
+
+def window(start, end, cursor=None, size=WINDOW_PAGE_SIZE):
+    # Non-cancelled sessions in (scheduled_at, id) order, keyset-paginated
+    # like the catalogue; returns (sessions, next_cursor).
+    check_window(start, end)
+    sessions = catalogue.annotate_attendees(
+        LiveSession.objects.filter(is_cancelled=False)
+                           .select_related("host")
+                           .order_by("scheduled_at", "id")
+    )
+    sessions = catalogue.seek(overlapping(sessions, start, end), cursor)
+    return catalogue.split_page(list(sessions[:size + 1]), size)
+
+
+# ==========================================================
+# CONFLICTS (nobody hosts or attends two sessions at once)
+# ----------------------------------------------------------
+# A user is busy during every non-cancelled session they host
+# or have joined. Callers run inside a transaction: the user's
+# profile row is locked first, so two bookings for the same
+# user are serialized and the second sees the first.
+# ==========================================================
+def _lock(user_ids):
+    list(Profile.objects.select_for_update().filter(user_id__in=user_ids).values_list("pk", flat=True))
+
+
+def busy(user, start, end):
+    joined = SessionAttendance.objects.filter(attendee=user).values("session_id")
+    return overlapping(
+        LiveSession.objects.filter(Q(host=user) | Q(pk__in=joined), is_cancelled=False),
+        start, end,
+    )
+
+
+def conflicts(user, sessions):
+    # (session, clashing session) pairs for the candidate `sessions` (new
+    # or about to be joined), checked against each other and everything the
+    # user is already busy with, in one query.
+    if not sessions:
+        return []
+    _lock([user.pk])
+    for session in sessions:
+        session.set_ends_at()
+    candidates = {id(s) for s in sessions}
+    booked = list(
+        busy(user, min(s.scheduled_at for s in sessions), max(s.ends_at for s in sessions))
+        .exclude(pk__in=[s.pk for s in sessions if s.pk])
+        .only("id", "title", "scheduled_at", "ends_at")
+    )
+
+    # Sweep in start order, remembering the session that ends last: anything
+    # starting before it ends overlaps it.
+    clashes, latest = [], None
+    for session in sorted([*sessions, *booked], key=lambda s: (s.scheduled_at, s.ends_at)):
+        if latest is not None and session.scheduled_at < latest.ends_at:
+            if id(session) in candidates:
+                clashes.append((session, latest))
+            elif id(latest) in candidates:
+                clashes.append((latest, session))
+        if latest is None or session.ends_at > latest.ends_at:
+            latest = session
+    return clashes
+
+
+def busy_users(user_ids, session):
+    # Which of `user_ids` are busy while `session` runs, for batch joins
+    # (the caller already holds their profile rows).
+    others = overlapping(LiveSession.objects.filter(is_cancelled=False), session.scheduled_at, session.ends_at)
+    others = others.exclude(pk=session.pk)
+    hosting = others.filter(host_id__in=user_ids).values_list("host_id", flat=True)
+    joined = (
+        SessionAttendance.objects.filter(attendee_id__in=user_ids, session__in=others)
+                                 .values_list("attendee_id", flat=True)
+    )
+    return set(hosting) | set(joined)
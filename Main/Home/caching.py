@@ -0,0 +1,107 @@
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from Home import routing
+
+WALLET_CACHE = "wallet"
+
+
+# ==========================================================
+# PER-USER WALLET CACHE
+# ----------------------------------------------------------
+# Entries are keyed by a per-user version token. Invalidating a
+# user just swaps the token, so every old entry becomes
+# unreachable at once and ages out through TTL / MAX_ENTRIES.
+# A fresh random token (not a counter) means an evicted version
+# key can never bring stale entries back.
+# ==========================================================
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[WALLET_CACHE]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _version(user_id):
+    key = f"wallet:{user_id}:v"
+    version = _cache().get(key)
+    if version is None:
+        _cache().add(key, uuid.uuid4().hex, timeout=None)
+        version = _cache().get(key)
+    return version
+
+
+# ttl, if given, caps the timeout by a value's own lifetime: ttl(value)
+# returns how many seconds the value stays true.
+def _timeout(value, ttl):
+    timeout = settings.WALLET_CACHE_TIMEOUT
+    return timeout if ttl is None else max(0, min(timeout, ttl(value)))
+
+
+def wallet_get(user_id, name, compute, ttl=None):
+    key = f"wallet:{user_id}:{_version(user_id)}:{name}"
+    value = _cache().get(key)
+    if value is not None:
+        _count("hits")
+        return value
+
+    _count("misses")
+    with routing.primary_reads():  # Never cache what a lagging replica returned
+        value = compute()
+    _cache().set(key, value, timeout=_timeout(value, ttl))
+    return value
+
+
+async def _aversion(user_id):
+    key = f"wallet:{user_id}:v"
+    version = await _cache().aget(key)
+    if version is None:
+        await _cache().aadd(key, uuid.uuid4().hex, timeout=None)
+        version = await _cache().aget(key)
+    return version
+
+
+async def awallet_get(user_id, name, compute, ttl=None):
+    # compute is a coroutine function here.
+    key = f"wallet:{user_id}:{await _aversion(user_id)}:{name}"
+    value = await _cache().aget(key)
+    if value is not None:
+        _count("hits")
+        return value
+
+    _count("misses")
+    with routing.primary_reads():
+        value = await compute()
+    await _cache().aset(key, value, timeout=_timeout(value, ttl))
+    return value
+
+
+def invalidate_wallet(*user_ids):
+    # Swap tokens only once the write is visible, so a concurrent reader
+    # cannot re-cache pre-commit data under the new version.
+    def swap():
+        _cache().set_many(
+            {f"wallet:{user_id}:v": uuid.uuid4().hex for user_id in set(user_ids)},
+            timeout=None,
+        )
+        _count("invalidations")
+
+    transaction.on_commit(swap)
+
+
+def stats():
+    with _stats_lock:
+        snapshot = dict(_stats)
+    lookups = snapshot["hits"] + snapshot["misses"]
+    snapshot["hit_ratio"] = round(snapshot["hits"] / lookups, 4) if lookups else 0.0
+    return snapshot
@@ -0,0 +1,97 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from Home.models import LiveSession, SessionAttendance
+
+PAGE_SIZE = 24
+
+
+# ==========================================================
+# SESSION CATALOGUE (upcoming, joinable sessions)
+# ----------------------------------------------------------
+# Keyset pagination on (scheduled_at, id): every page is an
+# index range scan from the cursor, so page 10,000 costs the
+# same as page 1 (OFFSET would have to skip all earlier rows).
+# ==========================================================
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(session):
+    raw = f"{session.scheduled_at.isoformat()}|{session.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        scheduled_at, session_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(scheduled_at), int(session_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from exc
+
+
+def annotate_attendees(sessions):
+    # Counted per row in a correlated subquery rather than with a joined
+    # GROUP BY: grouping makes the database sort every upcoming session
+    # before LIMIT applies, while this lets it walk session_open_time in
+    # order and stop after one page.
+    attendee_total = (
+        SessionAttendance.objects.filter(session=OuterRef("pk"))
+                                 .order_by()
+                                 .values("session")
+                                 .annotate(total=Count("*"))
+                                 .values("total")
+    )
+    return sessions.annotate(attendee_total=Coalesce(Subquery(attendee_total), Value(0)))
+
+
+def upcoming(now=None):
+    now = now or timezone.now()
+    return annotate_attendees(
+        LiveSession.objects.filter(is_cancelled=False, scheduled_at__gte=now)
+                           .select_related("host")
+                           .order_by("scheduled_at", "id")
+    )
+
+
+def seek(sessions, cursor):
+    # Rows after the cursor, for querysets ordered by (scheduled_at, id).
+    if not cursor:
+        return sessions
+    scheduled_at, session_id = decode_cursor(cursor)
+    return sessions.filter(
+        Q(scheduled_at__gt=scheduled_at) | Q(scheduled_at=scheduled_at, id__gt=session_id)
+    )
+
+
+def split_page(rows, size):
+    # One extra row tells us whether there is a next page without a COUNT(*).
+    next_cursor = encode_cursor(rows[size - 1]) if len(rows) > size else None
+    return rows[:size], next_cursor
+
+
+def page(cursor=None, size=PAGE_SIZE, now=None):
+    return split_page(list(seek(upcoming(now), cursor)[:size + 1]), size)
+
+
+async def apage(cursor=None, size=PAGE_SIZE, now=None):
+    return split_page([row async for row in seek(upcoming(now), cursor)[:size + 1]], size)
+
+
+def as_json(session):
+    return {
+        "id": session.id,
+        "title": session.title,
+        "host": session.host.username,
+        "scheduled_at": session.scheduled_at.isoformat(),
+        "ends_at": session.ends_at.isoformat(),
+        "duration_minutes": session.duration_minutes,
+        "credit_reward": session.credit_reward,
+        "max_attendees": session.max_attendees,
+        "attendees": session.attendee_total,
+    }
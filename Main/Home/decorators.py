@@ -0,0 +1,82 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from Home import ratelimit
+
+
+# ==========================================================
+# STATIC PAGE CACHE
+# ----------------------------------------------------------
+# For views whose output only depends on the URL. The rendered
+# page is kept in the default cache with its ETag and
+# Last-Modified, so a hit costs one cache lookup and a
+# revalidating browser gets an empty 304.
+# ==========================================================
+def static_page(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+
+        key = f"static-page:{request.path}"
+        page = cache.get(key) if settings.STATIC_PAGE_CACHE else None
+
+        if page is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+
+            page = {
+                "content": response.content,
+                "content_type": response["Content-Type"],
+                "etag": f'"{hashlib.md5(response.content).hexdigest()}"',
+                "last_modified": int(time.time()),
+            }
+            if settings.STATIC_PAGE_CACHE:
+                cache.set(key, page, timeout=settings.STATIC_PAGE_CACHE_TIMEOUT)
+
+        response = get_conditional_response(
+            request, etag=page["etag"], last_modified=page["last_modified"]
+        )
+        if response is None:
+            response = HttpResponse(page["content"], content_type=page["content_type"])
+
+        response["ETag"] = page["etag"]
+        response["Last-Modified"] = http_date(page["last_modified"])
+        patch_cache_control(response, public=True, max_age=settings.STATIC_PAGE_MAX_AGE)
+        return response
+
+    return wrapper
+
+
+# ==========================================================
+# RATE LIMIT (token buckets; see Home/ratelimit.py)
+# ----------------------------------------------------------
+# Budgets per scope live in settings.RATE_LIMITS. Only the
+# listed methods are charged, so a form's GET stays free.
+# ==========================================================
+def rate_limited(scope, methods=("POST",)):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                wait = ratelimit.check(request, scope)
+                if wait:
+                    retry_after = max(1, math.ceil(wait))
+                    response = HttpResponse(
+                        f"Too many requests. Try again in {retry_after} seconds.\n",
+                        status=429, content_type="text/plain; charset=utf-8",
+                    )
+                    response["Retry-After"] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from Home import availability, ledger, presence
+from Home.exceptions import InsufficientCredits, ScheduleConflict, SessionFull, SessionUnavailable
+from Home.models import Profile, LiveSession, SessionAttendance, DailyCreditRollup, batched_counters
+
+JOIN_COST = 2
+
+
+# ==========================================================
+# JOIN ENGINE
+# ----------------------------------------------------------
+# The session row is locked first, so every join for one session
+# is serialized: the duplicate and capacity checks see all joins
+# committed before us, and the debit + attendance are written in
+# the same transaction. On SQLite select_for_update is a no-op and
+# the database-wide write lock (BEGIN IMMEDIATE) gives the same
+# guarantee. The debit and the attendance share one rollup and
+# one leaderboard upsert (batched_counters).
+# ==========================================================
+def _lock_session(session_id):
+    try:
+        session = LiveSession.objects.select_for_update().get(pk=session_id)
+    except LiveSession.DoesNotExist:
+        raise SessionUnavailable("This session does not exist.")
+
+    if session.is_cancelled:
+        raise SessionUnavailable(f"{session.title} has been cancelled.")
+    # Settled (or about to be) means the host has been paid: a late charge
+    # would never reach them.
+    if session.settled_at is not None or session.ends_at <= timezone.now():
+        raise SessionUnavailable(f"{session.title} has already ended.")
+    return session
+
+
+def join(session_id, user, cost=JOIN_COST):
+    with transaction.atomic(), batched_counters():
+        session = _lock_session(session_id)
+
+        # The duplicate check and the seat count in one query.
+        counts = {"mine": Count("id", filter=Q(attendee=user))}
+        if session.max_attendees is not None:
+            counts["taken"] = Count("id")
+        counts = session.attendances.aggregate(**counts)
+        if counts["mine"]:
+            return SessionAttendance.objects.get(session=session, attendee=user), False
+
+        if session.max_attendees is not None and counts["taken"] >= session.max_attendees:
+            raise SessionFull(f"{session.title} is full.")
+
+        clashes = availability.conflicts(user, [session])
+        if clashes:
+            raise ScheduleConflict(f"{session.title} overlaps {clashes[0][1].title}, which you are already in.")
+
+        ledger.spend(user, cost, session.title, session=session, check_balance=True)
+        attendance = SessionAttendance.objects.create(session=session, attendee=user, credit_cost=cost)
+
+    return attendance, True
+
+
+# ==========================================================
+# BATCH JOIN (many users into one popular session)
+# ----------------------------------------------------------
+# One transaction, a fixed number of queries regardless of the
+# batch size. Users are admitted in the order given until the
+# session is full; the rest are returned with the reason.
+# ==========================================================
+def join_many(session_id, users, cost=JOIN_COST):
+    user_ids = list(dict.fromkeys(u.pk for u in users))
+    rejected = {}
+
+    with transaction.atomic():
+        session = _lock_session(session_id)
+
+        already = set(
+            SessionAttendance.objects.filter(session=session, attendee_id__in=user_ids)
+                                     .values_list("attendee_id", flat=True)
+        )
+        profiles = {
+            p.user_id: p
+            for p in Profile.objects.select_for_update().filter(user_id__in=user_ids)
+        }
+
+        if session.max_attendees is None:
+            seats = len(user_ids)
+        else:
+            seats = max(session.max_attendees - session.attendances.count(), 0)
+        busy = availability.busy_users(user_ids, session)
+
+        admitted = []
+        for user_id in user_ids:
+            profile = profiles.get(user_id)
+            if user_id in already:
+                continue
+            if user_id in busy:
+                rejected[user_id] = ScheduleConflict
+            elif profile is None or profile.credits < cost:
+                rejected[user_id] = InsufficientCredits
+            elif len(admitted) >= seats:
+                rejected[user_id] = SessionFull
+            else:
+                admitted.append(profile)
+
+        if admitted:
+            ledger.spend_many(admitted, cost, session.title, session=session)
+            attendances = SessionAttendance.objects.bulk_create([
+                SessionAttendance(session=session, attendee_id=p.user_id, credit_cost=cost)
+                for p in admitted
+            ])
+            DailyCreditRollup.objects.record_joined(attendances)
+            names = {u.pk: u.username for u in users}
+            joined = [names[p.user_id] for p in admitted]
+            transaction.on_commit(lambda: presence.attendees_changed(session.id, joined=joined))
+
+    return [p.user_id for p in admitted], rejected
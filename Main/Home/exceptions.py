@@ -0,0 +1,21 @@
+# ==========================================================
+# CREDIT / JOIN ERRORS
+# ==========================================================
+class CreditError(Exception):
+    """Base class for credit operations that were refused."""
+
+
+class InsufficientCredits(CreditError):
+    pass
+
+
+class SessionUnavailable(CreditError):
+    pass
+
+
+class SessionFull(CreditError):
+    pass
+
+
+class ScheduleConflict(CreditError):
+    pass
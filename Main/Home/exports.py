@@ -0,0 +1,109 @@
+import csv
+
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, StreamingHttpResponse
+
+from Home import catalogue
+from Home.models import LiveSession, SessionAttendance
+
+CHUNK_SIZE = 2000     # Rows fetched per database round trip
+FLUSH_ROWS = 500      # Rows joined into one chunk of the response body
+
+HISTORY_FIELDS = ("created_at", "kind", "amount", "balance_after", "title", "session_id")
+REPORTS = {
+    "sessions": (
+        lambda: catalogue.annotate_attendees(LiveSession.objects.order_by("id")),
+        ("id", "title", "host__username", "category", "scheduled_at", "duration_minutes",
+         "max_attendees", "is_cancelled", "attendee_total"),
+    ),
+    "attendances": (
+        lambda: SessionAttendance.objects.order_by("id"),
+        ("id", "session_id", "session__title", "session__host__username", "attendee__username",
+         "credit_cost", "joined_at"),
+    ),
+}
+
+
+# ==========================================================
+# ROW ENCODERS (one line of CSV / NDJSON per row)
+# ==========================================================
+class _Echo:
+    # csv.writer wants a file; this one hands each line straight back.
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    # Keep spreadsheet apps from running text as a formula.
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@"):
+        return "'" + value
+    return value
+
+
+def _encoder(fmt, fields):
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        header = writer.writerow(fields)
+        return header, "text/csv", lambda row: writer.writerow([_csv_cell(row[f]) for f in fields])
+    if fmt == "ndjson":
+        encoder = DjangoJSONEncoder()
+        return "", "application/x-ndjson", lambda row: encoder.encode(row) + "\n"
+    raise ValueError(f"Unsupported export format {fmt!r}: use csv or ndjson.")
+
+
+# ==========================================================
+# STREAMING (constant memory, first bytes before the query ends)
+# ----------------------------------------------------------
+# Rows come from a chunked database cursor and go out in
+# FLUSH_ROWS batches. Under ASGI the body must be an async
+# iterator (Django buffers sync ones whole), under WSGI a sync
+# one (Django buffers async ones whole), so both are provided.
+# ==========================================================
+def _lines(header, encode, rows):
+    if header:
+        yield header
+    buffer = []
+    for row in rows:
+        buffer.append(encode(row))
+        if len(buffer) >= FLUSH_ROWS:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+async def _alines(header, encode, rows):
+    if header:
+        yield header
+    buffer = []
+    async for row in rows:
+        buffer.append(encode(row))
+        if len(buffer) >= FLUSH_ROWS:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream(request, queryset, fields, fmt, filename):
+    header, content_type, encode = _encoder(fmt, fields)
+    # values() rather than values_list(): its iterable is a true generator,
+    # which aiterator() needs to keep the query off the event loop.
+    rows = queryset.values(*fields)
+
+    if isinstance(request, ASGIRequest):
+        content = _alines(header, encode, rows.aiterator(chunk_size=CHUNK_SIZE))
+    else:
+        content = _lines(header, encode, rows.iterator(chunk_size=CHUNK_SIZE))
+
+    response = StreamingHttpResponse(content, content_type=f"{content_type}; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+def report(request, name, fmt):
+    if name not in REPORTS:
+        raise Http404(f"No report named {name!r}.")
+    build, fields = REPORTS[name]
+    return stream(request, build(), fields, fmt, f"{name}-report")
@@ -0,0 +1,166 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+# Per-request counters; a ContextVar so threads and async tasks never mix.
+current = ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "template_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+
+# ==========================================================
+# DB QUERY TIMING (an execute wrapper on every connection)
+# ----------------------------------------------------------
+# Installed once per connection rather than per request: async
+# views run their queries on sync_to_async worker threads, whose
+# connections the middleware never sees. The ContextVar follows
+# the request into those threads.
+# ==========================================================
+def count_queries(execute, sql, params, many, context):
+    stats = current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    began = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - began
+
+
+def install_query_counter(connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+connection_created.connect(install_query_counter)
+
+
+# ==========================================================
+# TEMPLATE TIMING (drop-in for the DjangoTemplates backend)
+# ----------------------------------------------------------
+# Only top-level renders are timed; {% include %} and
+# {% extends %} happen inside them.
+# ==========================================================
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = current.get()
+        if stats is None:
+            return super().render(context, request)
+
+        began = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_seconds += time.perf_counter() - began
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+# ==========================================================
+# IN-PROCESS HISTOGRAMS (Prometheus text format)
+# ==========================================================
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.total:.6f}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def observe(self, view, status, seconds, stats):
+        with self.lock:
+            entry = self.views.get(view)
+            if entry is None:
+                entry = self.views[view] = {
+                    "latency": Histogram(LATENCY_BUCKETS),
+                    "queries": Histogram(QUERY_BUCKETS),
+                    "db_seconds": 0.0,
+                    "template_seconds": 0.0,
+                    "status": {},
+                }
+            entry["latency"].observe(seconds)
+            entry["queries"].observe(stats.queries)
+            entry["db_seconds"] += stats.db_seconds
+            entry["template_seconds"] += stats.template_seconds
+            entry["status"][status] = entry["status"].get(status, 0) + 1
+
+    def render(self, extra=()):
+        out = [
+            "# HELP credlearn_request_duration_seconds Wall time per request.",
+            "# TYPE credlearn_request_duration_seconds histogram",
+        ]
+        with self.lock:
+            views = sorted(self.views.items())
+            for view, entry in views:
+                out.extend(entry["latency"].lines("credlearn_request_duration_seconds", f'view="{view}"'))
+
+            out += [
+                "# HELP credlearn_request_queries SQL queries per request.",
+                "# TYPE credlearn_request_queries histogram",
+            ]
+            for view, entry in views:
+                out.extend(entry["queries"].lines("credlearn_request_queries", f'view="{view}"'))
+
+            for metric, key, help_text in (
+                ("credlearn_request_db_seconds_total", "db_seconds", "Time spent in SQL."),
+                ("credlearn_request_template_seconds_total", "template_seconds", "Time spent rendering templates."),
+            ):
+                out += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                out += [f'{metric}{{view="{view}"}} {entry[key]:.6f}' for view, entry in views]
+
+            out += [
+                "# HELP credlearn_requests_total Responses by view and status code.",
+                "# TYPE credlearn_requests_total counter",
+            ]
+            for view, entry in views:
+                out += [
+                    f'credlearn_requests_total{{view="{view}",status="{status}"}} {count}'
+                    for status, count in sorted(entry["status"].items())
+                ]
+
+        for metric, kind, help_text, value in extra:
+            out += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}", f"{metric} {value}"]
+        return "\n".join(out) + "\n"
+
+
+registry = Registry()
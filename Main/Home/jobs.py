@@ -0,0 +1,173 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from Home.models import Job
+
+logger = logging.getLogger("Home.jobs")
+
+BATCH_SIZE = 20                      # Jobs a worker claims at a time
+BACKOFF_BASE = 10                    # Seconds before the first retry; doubles per attempt
+BACKOFF_CAP = 60 * 60                # Longest wait between retries
+LEASE = timedelta(minutes=10)        # A running job older than this is presumed orphaned
+RETENTION = timedelta(days=7)        # How long finished jobs (and their keys) are kept
+
+TASKS = {}
+
+
+# ==========================================================
+# TASK REGISTRY
+# ----------------------------------------------------------
+# Handlers live in Home/tasks.py and take the job payload as
+# keyword arguments, so payloads must be JSON-serializable.
+# ==========================================================
+def task(name):
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+# ==========================================================
+# ENQUEUE (a plain INSERT, in the caller's transaction)
+# ----------------------------------------------------------
+# Enqueued inside the transaction that made the change, a job
+# exists if and only if the change committed. With a key, a
+# second enqueue of the same work is silently ignored.
+# ==========================================================
+def enqueue(name, key=None, delay=None, max_attempts=5, **payload):
+    if name not in TASKS:
+        raise ValueError(f"Unknown task {name!r}.")
+    job = Job(
+        task=name,
+        payload=payload,
+        key=key,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+    Job.objects.bulk_create([job], ignore_conflicts=key is not None)
+    return job
+
+
+def enqueue_at(name, run_ats, max_attempts=5, **payload):
+    # One job per distinct run time, keyed by name and time, in one INSERT:
+    # work that falls due at a moment is queued once however often it is asked.
+    if name not in TASKS:
+        raise ValueError(f"Unknown task {name!r}.")
+    batch = [
+        Job(task=name, payload=payload, key=f"{name}:{run_at.isoformat()}", max_attempts=max_attempts, run_at=run_at)
+        for run_at in sorted(set(run_ats))
+    ]
+    Job.objects.bulk_create(batch, ignore_conflicts=True)
+    return batch
+
+
+def backoff(attempts):
+    # Exponential with jitter, so jobs failing together retry apart.
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_CAP)
+    return timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
+
+
+# ==========================================================
+# WORKER SIDE (claim, run, recover)
+# ----------------------------------------------------------
+# Claiming flips due jobs to "running" in one short
+# transaction: SKIP LOCKED on PostgreSQL, the database write
+# lock (BEGIN IMMEDIATE) on SQLite. A handler's writes and
+# the job's "done" commit together, so database effects happen
+# exactly once; anything external (mail) is at-least-once.
+# ==========================================================
+def claim(worker, limit=BATCH_SIZE):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+                       .filter(status=Job.QUEUED, run_at__lte=now)
+                       .order_by("run_at", "id")
+                       .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        Job.objects.filter(pk__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_at=now, locked_by=worker, attempts=F("attempts") + 1,
+        )
+    return list(Job.objects.filter(pk__in=ids, status=Job.RUNNING, locked_by=worker).order_by("run_at", "id"))
+
+
+def run(job):
+    try:
+        with transaction.atomic():
+            handler = TASKS.get(job.task)
+            if handler is None:
+                raise LookupError(f"No task named {job.task!r}.")
+            handler(**job.payload)
+            Job.objects.filter(pk=job.pk).update(status=Job.DONE, finished_at=timezone.now(), last_error="")
+        return True
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            changes = {"status": Job.FAILED, "finished_at": now}
+            logger.error("Job %s failed for good after %d attempts:\n%s", job, job.attempts, error)
+        else:
+            changes = {"status": Job.QUEUED, "run_at": now + backoff(job.attempts)}
+            logger.warning("Job %s failed (attempt %d of %d); retrying", job, job.attempts, job.max_attempts)
+        Job.objects.filter(pk=job.pk).update(last_error=error, locked_at=None, locked_by="", **changes)
+        return False
+
+
+def recover(now=None):
+    # Jobs whose worker died mid-run: retry them, or give up if out of attempts.
+    now = now or timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - LEASE)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, finished_at=now, locked_at=None, locked_by="",
+        last_error="Worker lost while running the job.",
+    )
+    requeued = stale.update(status=Job.QUEUED, run_at=now, locked_at=None, locked_by="")
+    return requeued + failed
+
+
+def prune(now=None):
+    cutoff = (now or timezone.now()) - RETENTION
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def run_pending(worker="inline", limit=None):
+    # Drain every due job; returns (succeeded, failed).
+    succeeded = failed = 0
+    while limit is None or succeeded + failed < limit:
+        batch = claim(worker, BATCH_SIZE if limit is None else min(BATCH_SIZE, limit - succeeded - failed))
+        if not batch:
+            break
+        for job in batch:
+            if run(job):
+                succeeded += 1
+            else:
+                failed += 1
+    return succeeded, failed
+
+
+# ==========================================================
+# METRICS (one aggregate query)
+# ==========================================================
+def stats(now=None):
+    now = now or timezone.now()
+    due = Q(status=Job.QUEUED, run_at__lte=now)
+    totals = Job.objects.aggregate(
+        queued=Count("id", filter=Q(status=Job.QUEUED)),
+        due=Count("id", filter=due),
+        running=Count("id", filter=Q(status=Job.RUNNING)),
+        failed=Count("id", filter=Q(status=Job.FAILED)),
+        done_last_minute=Count("id", filter=Q(status=Job.DONE, finished_at__gte=now - timedelta(minutes=1))),
+        oldest_due=Min("run_at", filter=due),
+    )
+    oldest = totals.pop("oldest_due")
+    totals["lag_seconds"] = (now - oldest).total_seconds() if oldest else 0.0
+    return totals
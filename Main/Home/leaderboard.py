@@ -0,0 +1,124 @@
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from Home.models import CreditTransaction, LeaderboardEntry, LiveSession, SessionAttendance
+
+# Board name -> LeaderboardEntry counter
+BOARDS = {
+    "hosted": "sessions_hosted",
+    "earned": "credits_earned",
+    "attendees": "attendees",
+    "joined": "sessions_joined",
+}
+BOARD_CHOICES = [
+    ("hosted", "Sessions hosted"),
+    ("earned", "Credits earned"),
+    ("attendees", "Learners taught"),
+    ("joined", "Sessions joined"),
+]
+TOP_SIZE = 20
+REBUILD_CHUNK = 10_000  # Deltas summed in memory per upsert pass
+
+
+# ==========================================================
+# RANKING QUERIES (one index per board, see the model)
+# ----------------------------------------------------------
+# Top-N reads the first N entries of the board's index. Ranks
+# are only given within the top N (tied users share a rank), so
+# a user's rank comes from that list and never from counting
+# everyone above them, which grows with the rank (~19ms for the
+# last of 200k users on SQLite). Below the top N a user only
+# sees their score, as "unranked".
+# ==========================================================
+def _board(board, period, today=None):
+    if board not in BOARDS:
+        raise ValueError(f"Unknown leaderboard {board!r}.")
+    if period not in dict(LeaderboardEntry.PERIOD_CHOICES):
+        raise ValueError(f"Unknown period {period!r}.")
+    starts_on = LeaderboardEntry.period_start(period, today or timezone.localdate())
+    return BOARDS[board], LeaderboardEntry.objects.filter(period=period, starts_on=starts_on)
+
+
+def top(board, period=LeaderboardEntry.WEEK, size=TOP_SIZE, today=None):
+    # [(rank, username, score)], best first.
+    counter, entries = _board(board, period, today)
+    rows = (
+        entries.filter(**{f"{counter}__gt": 0})
+               .order_by(f"-{counter}", "user")
+               .values_list("user__username", counter)[:size]
+    )
+    ranked, previous = [], None
+    for position, (username, score) in enumerate(rows, start=1):
+        rank = ranked[-1][0] if score == previous else position
+        ranked.append((rank, username, score))
+        previous = score
+    return ranked
+
+
+def rank(user, board, period=LeaderboardEntry.WEEK, size=TOP_SIZE, today=None, ranked=None):
+    # (rank, score) within the top `size`, (None, score) below it, or None
+    # before the user has scored. Pass the top() list as `ranked` if it has
+    # been read already.
+    if ranked is None:
+        ranked = top(board, period, size, today)
+    for position, username, score in ranked:
+        if username == user.get_username():
+            return position, score
+
+    counter, entries = _board(board, period, today)
+    score = entries.filter(user=user).values_list(counter, flat=True).first()
+    if not score:
+        return None
+    if len(ranked) >= size and score == ranked[-1][2]:
+        return ranked[-1][0], score  # Tied with the last listed user
+    return None, score
+
+
+# ==========================================================
+# REBUILD (recompute every window from raw rows)
+# ----------------------------------------------------------
+# For recovery after drift: per-day totals are read back from
+# the ledger, sessions and attendances and re-added in chunks.
+# ==========================================================
+def _deltas():
+    hosted = (
+        LiveSession.objects.annotate(day=TruncDate("created_at"))
+                           .values_list("host_id", "day")
+                           .annotate(n=Count("id"))
+                           .order_by()
+    )
+    for user_id, day, n in hosted.iterator():
+        yield user_id, day, n, 0, 0, 0
+
+    earned = (
+        CreditTransaction.objects.filter(kind=CreditTransaction.EARNED)
+                                 .annotate(day=TruncDate("created_at"))
+                                 .values_list("user_id", "day")
+                                 .annotate(total=Sum("amount"))
+                                 .order_by()
+    )
+    for user_id, day, total in earned.iterator():
+        yield user_id, day, 0, total, 0, 0
+
+    attendances = SessionAttendance.objects.annotate(day=TruncDate("joined_at"))
+    received = attendances.values_list("session__host_id", "day").annotate(n=Count("id")).order_by()
+    for user_id, day, n in received.iterator():
+        yield user_id, day, 0, 0, n, 0
+
+    joined = attendances.values_list("attendee_id", "day").annotate(n=Count("id")).order_by()
+    for user_id, day, n in joined.iterator():
+        yield user_id, day, 0, 0, 0, n
+
+
+def rebuild():
+    deltas = _deltas()
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        while chunk := list(islice(deltas, REBUILD_CHUNK)):
+            LeaderboardEntry.objects.add(chunk)
+        return LeaderboardEntry.objects.count()
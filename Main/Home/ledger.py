@@ -0,0 +1,146 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from Home.caching import invalidate_wallet
+from Home.exceptions import InsufficientCredits
+from Home.models import Profile, CreditTransaction, DailyCreditRollup
+
+
+# ==========================================================
+# CREDIT LEDGER
+# ----------------------------------------------------------
+# Every change to Profile.credits goes through record() so the
+# balance snapshot (Profile.credits) and the append-only ledger
+# (CreditTransaction) are always written in the same transaction.
+# ==========================================================
+def record(user, kind, amount, title, session=None, created_at=None, check_balance=False):
+    delta = -amount if kind == CreditTransaction.SPENT else amount
+
+    with transaction.atomic():
+        # UPDATE ... SET credits = credits + delta takes the row (or, on
+        # SQLite, database) write lock before we read the new balance back.
+        # With check_balance the WHERE clause makes the debit conditional,
+        # so two concurrent spends can never both pass the check.
+        profiles = Profile.objects.filter(user=user)
+        if check_balance:
+            profiles = profiles.filter(credits__gte=amount)
+
+        updated = profiles.update(credits=F("credits") + delta)
+        if not updated:
+            if check_balance:
+                raise InsufficientCredits(f"You need {amount} credits for {title}.")
+            Profile.objects.get_or_create(user=user)
+            Profile.objects.filter(user=user).update(credits=F("credits") + delta)
+
+        balance = Profile.objects.filter(user=user).values_list("credits", flat=True).get()
+
+        return CreditTransaction.objects.create(
+            user=user,
+            session=session,
+            kind=kind,
+            amount=amount,
+            balance_after=balance,
+            title=title,
+            created_at=created_at or timezone.now(),
+        )
+
+
+def earn(user, amount, title, session=None):
+    return record(user, CreditTransaction.EARNED, amount, title, session=session)
+
+
+def spend(user, amount, title, session=None, check_balance=False):
+    return record(user, CreditTransaction.SPENT, amount, title, session=session,
+                  check_balance=check_balance)
+
+
+# Debit many users at once. The caller must already hold the profile rows
+# (select_for_update inside a transaction) and have checked their balances;
+# profile.credits is taken as the balance before this debit.
+def spend_many(profiles, amount, title, session=None):
+    now = timezone.now()
+    Profile.objects.filter(pk__in=[p.pk for p in profiles]).update(credits=F("credits") - amount)
+    # bulk_create sends no post_save: invalidate and roll up by hand.
+    invalidate_wallet(*[p.user_id for p in profiles])
+
+    entries = CreditTransaction.objects.bulk_create([
+        CreditTransaction(
+            user_id=profile.user_id,
+            session=session,
+            kind=CreditTransaction.SPENT,
+            amount=amount,
+            balance_after=profile.credits - amount,
+            title=title,
+            created_at=now,
+        )
+        for profile in profiles
+    ])
+    DailyCreditRollup.objects.record_ledger(entries)
+    return entries
+
+
+# Credit many users at once (settlement): one UPDATE ... SET credits =
+# credits + CASE user_id WHEN ... per chunk of users, then one ledger row
+# per entry with its running balance. entries: (user_id, kind, amount,
+# title, session_id), all credits in (earned / refunded / granted).
+CASE_CHUNK = 500  # Users per UPDATE, keeping the statement's parameters bounded
+
+
+def credit_many(entries, now=None):
+    entries = list(entries)
+    totals = defaultdict(int)
+    for user_id, _, amount, _, _ in entries:
+        totals[user_id] += amount
+    if not totals:
+        return []
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        users = list(totals)
+        for start in range(0, len(users), CASE_CHUNK):
+            chunk = users[start:start + CASE_CHUNK]
+            Profile.objects.filter(user_id__in=chunk).update(credits=F("credits") + Case(
+                *[When(user_id=user_id, then=Value(totals[user_id])) for user_id in chunk],
+                default=Value(0),
+            ))
+        balances = dict(Profile.objects.filter(user_id__in=users).values_list("user_id", "credits"))
+        missing = [user_id for user_id in users if user_id not in balances]
+        if missing:
+            Profile.objects.bulk_create([Profile(user_id=u, credits=totals[u]) for u in missing])
+            balances.update((u, totals[u]) for u in missing)
+        # bulk_create sends no post_save: invalidate and roll up by hand.
+        invalidate_wallet(*users)
+
+        running = {user_id: balances[user_id] - totals[user_id] for user_id in users}
+        rows = []
+        for user_id, kind, amount, title, session_id in entries:
+            running[user_id] += amount
+            rows.append(CreditTransaction(
+                user_id=user_id,
+                session_id=session_id,
+                kind=kind,
+                amount=amount,
+                balance_after=running[user_id],
+                title=title,
+                created_at=now,
+            ))
+        rows = CreditTransaction.objects.bulk_create(rows)
+        DailyCreditRollup.objects.record_ledger(rows)
+        return rows
+
+
+def history(user):
+    return CreditTransaction.objects.filter(user=user).order_by("-created_at", "-id")
+
+
+# New users start with settings.SIGNUP_CREDITS, the only credits that do not
+# come from a session: enough to join a few before hosting pays anything.
+def grant_signup(users, now=None):
+    amount = settings.SIGNUP_CREDITS
+    if amount <= 0:
+        return []
+    return credit_many([(u.pk, CreditTransaction.GRANTED, amount, "Welcome credits", None) for u in users], now)
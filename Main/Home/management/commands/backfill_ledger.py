@@ -0,0 +1,116 @@
+import heapq
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from Home import leaderboard, rollups
+from Home.caching import WALLET_CACHE
+from Home.models import Profile, LiveSession, SessionAttendance, CreditTransaction
+from Home.settlement import MIN_ATTENDEES
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the credit ledger from existing LiveSession and SessionAttendance rows, "
+        "following the settlement rules. Entries without a session (signup grants) are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--sync-balances",
+            action="store_true",
+            help="Also overwrite Profile.credits with the rebuilt ledger balance.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        # Each stream is read in time order with server-side chunks and
+        # merged, so memory stays bounded by the batch plus one int per user.
+        # Kept entries are loaded up front: they are deleted with the rest
+        # and written back with their new running balances.
+        kept = sorted(
+            (t.created_at, t.kind, t.user_id, t.amount, t.title, None)
+            for t in CreditTransaction.objects.filter(session__isnull=True)
+                                              .only("user_id", "kind", "amount", "title", "created_at")
+        )
+        # Hosts are paid when a held session with enough attendees settles.
+        earned = (
+            (s.settled_at, CreditTransaction.EARNED, s.host_id, s.credit_reward, s.title, s.id)
+            for s in LiveSession.objects.filter(settled_at__isnull=False, is_cancelled=False, credit_reward__gt=0)
+                                        .annotate(attendees=Count("attendances"))
+                                        .filter(attendees__gte=MIN_ATTENDEES)
+                                        .order_by("settled_at", "id")
+                                        .only("id", "host_id", "title", "credit_reward", "settled_at")
+                                        .iterator(chunk_size=batch_size)
+        )
+        spent = (
+            (a.joined_at, CreditTransaction.SPENT, a.attendee_id, a.credit_cost, a.session.title, a.session_id)
+            for a in SessionAttendance.objects.select_related("session")
+                                              .order_by("joined_at", "id")
+                                              .only("id", "attendee_id", "credit_cost", "joined_at",
+                                                    "session_id", "session__title")
+                                              .iterator(chunk_size=batch_size)
+        )
+        # Attendees of a cancelled session get their cost back when it settles.
+        refunded = (
+            (a.session.settled_at, CreditTransaction.REFUNDED, a.attendee_id, a.credit_cost,
+             f"Refund: {a.session.title}", a.session_id)
+            for a in SessionAttendance.objects.filter(session__is_cancelled=True, session__settled_at__isnull=False,
+                                                      credit_cost__gt=0)
+                                              .select_related("session")
+                                              .order_by(F("session__settled_at"), "id")
+                                              .only("id", "attendee_id", "credit_cost", "session_id",
+                                                    "session__title", "session__settled_at")
+                                              .iterator(chunk_size=batch_size)
+        )
+        # Unsettled sessions get no entries: settlement pays them later.
+
+        balances = {}
+        batch = []
+        written = 0
+
+        with transaction.atomic():
+            CreditTransaction.objects.all().delete()
+
+            for created_at, kind, user_id, amount, title, session_id in heapq.merge(kept, earned, spent, refunded):
+                delta = -amount if kind == CreditTransaction.SPENT else amount
+                balances[user_id] = balances.get(user_id, 0) + delta
+
+                batch.append(CreditTransaction(
+                    user_id=user_id,
+                    session_id=session_id,
+                    kind=kind,
+                    amount=amount,
+                    balance_after=balances[user_id],
+                    title=title,
+                    created_at=created_at,
+                ))
+                if len(batch) >= batch_size:
+                    CreditTransaction.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+
+            if batch:
+                CreditTransaction.objects.bulk_create(batch)
+                written += len(batch)
+
+            if options["sync_balances"]:
+                profiles = list(Profile.objects.filter(user_id__in=balances.keys()).only("id", "user_id"))
+                for profile in profiles:
+                    profile.credits = balances[profile.user_id]
+                Profile.objects.bulk_update(profiles, ["credits"], batch_size=batch_size)
+
+            # bulk_create sends no signals: derive the rollups and boards afresh.
+            rollups.rebuild()
+            leaderboard.rebuild()
+
+        # Every cached wallet is now suspect.
+        caches[WALLET_CACHE].clear()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} ledger entries for {len(balances)} users."
+        ))
@@ -0,0 +1,116 @@
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from Home import availability
+from Home.models import LiveSession
+
+WINDOWS = {"1h": timedelta(hours=1), "1d": timedelta(days=1), "7d": timedelta(days=7)}
+DAYS = 180
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark calendar window and conflict queries on a throwaway database "
+        "seeded with synthetic sessions. Prints JSON timings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sessions", type=int, default=1_000_000)
+        parser.add_argument("--hosts", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        # Never touch the real database: build the test database, run, drop it.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            began = time.perf_counter()
+            hosts = self.seed(options["sessions"], options["hosts"], rng)
+            seeded = time.perf_counter() - began
+            report = {
+                "sessions": options["sessions"],
+                "seed_seconds": round(seeded, 1),
+                "windows": {
+                    name: self.time_window(length, options["repeat"], rng)
+                    for name, length in WINDOWS.items()
+                },
+                "conflict_check": self.time_conflicts(hosts, options["repeat"], rng),
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, count, host_count, rng, batch_size=5000):
+        User.objects.bulk_create([User(username=f"cal-{n}", password="!") for n in range(host_count)])
+        hosts = list(User.objects.filter(username__startswith="cal-").values_list("id", flat=True))
+        self.origin = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+        # Each host's sessions are spread over the period in random slots;
+        # overlaps among the synthetic rows are fine, the check only reads them.
+        with transaction.atomic():
+            for offset in range(0, count, batch_size):
+                LiveSession.objects.bulk_create([
+                    LiveSession(
+                        host_id=rng.choice(hosts),
+                        title="Calendar load",
+                        scheduled_at=self.origin + timedelta(minutes=15 * rng.randrange(DAYS * 24 * 4)),
+                        duration_minutes=rng.choice([30, 45, 60, 90, 120]),
+                        is_cancelled=rng.random() < 0.05,
+                    )
+                    for _ in range(min(batch_size, count - offset))
+                ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return hosts
+
+    def random_start(self, rng, length):
+        span = timedelta(days=DAYS) - length
+        return self.origin + timedelta(minutes=rng.randrange(int(span.total_seconds() // 60)))
+
+    def timed(self, run, repeat):
+        samples, rows = [], 0
+        for _ in range(repeat):
+            began = time.perf_counter()
+            rows = run()
+            samples.append((time.perf_counter() - began) * 1000)
+        return {
+            "median_ms": round(statistics.median(samples), 2),
+            "max_ms": round(max(samples), 2),
+            "rows": rows,
+        }
+
+    def time_window(self, length, repeat, rng):
+        def first_page():
+            start = self.random_start(rng, length)
+            return len(availability.window(start, start + length)[0])
+
+        def five_pages():
+            start = self.random_start(rng, length)
+            cursor = None
+            for _ in range(5):
+                rows, cursor = availability.window(start, start + length, cursor)
+                if not cursor:
+                    break
+            return len(rows)
+
+        return {"first_page": self.timed(first_page, repeat), "five_pages": self.timed(five_pages, repeat)}
+
+    def time_conflicts(self, hosts, repeat, rng):
+        def check():
+            host = User(pk=rng.choice(hosts))
+            with transaction.atomic():
+                candidate = LiveSession(host=host, title="Probe", scheduled_at=self.random_start(rng, timedelta(hours=1)))
+                return len(availability.conflicts(host, [candidate]))
+
+        return self.timed(check, repeat)
@@ -0,0 +1,84 @@
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from Home import search
+from Home.models import LiveSession
+
+TOPICS = [
+    "python", "django", "javascript", "rust", "sourdough", "pasta", "salsa", "tango", "guitar",
+    "piano", "spanish", "japanese", "french", "marketing", "accounting", "startup", "figma",
+    "illustration", "photography", "watercolor", "negotiation", "pitching", "sql", "statistics",
+]
+QUERIES = ["python", "sourdough bread", "jap", "guitar chords", "startup pitching", "zzzz"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark FTS5 session search against icontains scans on a throwaway "
+        "database seeded with synthetic sessions. Prints JSON timings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sessions", type=int, default=500_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            raise CommandError("FTS5 search needs the SQLite database backend.")
+
+        # Never touch the real database: build the test database, run, drop it.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.seed(options["sessions"], random.Random(options["seed"]))
+            report = {
+                "sessions": options["sessions"],
+                "queries": {q: self.time_query(q, options["repeat"]) for q in QUERIES},
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, count, rng, batch_size=5000):
+        host = User.objects.create_user("bench-host")
+        filler = ["".join(rng.choice("aeioubcdfgklmnprst") for _ in range(rng.randint(3, 9)))
+                  for _ in range(3000)]
+        categories = [value for value, _ in LiveSession.CATEGORY_CHOICES]
+        start = timezone.now()
+
+        for offset in range(0, count, batch_size):
+            LiveSession.objects.bulk_create([
+                LiveSession(
+                    host=host,
+                    title=" ".join(rng.sample(TOPICS, 2) + rng.sample(filler, 2)).title(),
+                    description=" ".join(rng.choices(filler, k=18) + rng.sample(TOPICS, 1)),
+                    category=rng.choice(categories),
+                    scheduled_at=start + timedelta(minutes=rng.randint(0, 60 * 24 * 180)),
+                )
+                for _ in range(min(batch_size, count - offset))
+            ])
+
+    def time_query(self, query, repeat):
+        def timed(run):
+            samples = []
+            for _ in range(repeat):
+                began = time.perf_counter()
+                rows = run()
+                samples.append((time.perf_counter() - began) * 1000)
+            return {"median_ms": round(statistics.median(samples), 2), "results": len(rows)}
+
+        now = timezone.now()
+        return {
+            "fts5": timed(lambda: search.search(query, start=now)),
+            "icontains": timed(lambda: list(search.search_icontains(query, start=now)[:search.RESULTS_PAGE_SIZE])),
+            "facets": timed(lambda: search.facets(query, start=now)),
+        }
@@ -0,0 +1,119 @@
+import json
+import statistics
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.utils import timezone
+
+from Home import scheduling
+from Home import wallet as wallet_service
+
+# SQLite's defaults, for --compare: rollback journal and an fsync per commit.
+ROLLBACK_JOURNAL = "PRAGMA journal_mode=DELETE;PRAGMA synchronous=FULL"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test concurrent writes (scheduling.create_session, as "
+        "host_session does) with wallet readers running alongside, on a "
+        "throwaway database. Prints JSON throughput for the configured "
+        "database profile; --compare adds SQLite's default journal settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writes", type=int, default=200, help="Writes per writer thread.")
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="SQLite only: also run with journal_mode=DELETE, synchronous=FULL.",
+        )
+
+    def handle(self, *args, **options):
+        # Never touch the real database: build the test database, run, drop it.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = {}
+            if options["compare"] and connection.vendor == "sqlite":
+                report["sqlite rollback journal"] = self.run_profile(ROLLBACK_JOURNAL, **options)
+            report[f"{connection.vendor} configured"] = self.run_profile(None, **options)
+        finally:
+            connection.close()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run_profile(self, init_command, writers, readers, writes, **options):
+        db_options = connection.settings_dict["OPTIONS"]
+        configured = db_options.get("init_command")
+        if init_command is not None:
+            db_options["init_command"] = init_command
+        # Connections pick up OPTIONS when they open; start from a fresh one.
+        connection.close()
+
+        try:
+            users = [User.objects.create_user(f"load-{time.monotonic_ns()}-{n}") for n in range(writers)]
+            start = timezone.now() + timedelta(days=1)
+            latencies, errors, reads = [], [], [0]
+            done = threading.Event()
+            lock = threading.Lock()
+
+            def write(user):
+                try:
+                    for n in range(writes):
+                        began = time.perf_counter()
+                        try:
+                            # An hour apart, so the host's sessions never overlap.
+                            scheduling.create_session(user, "Load test", start + timedelta(hours=n))
+                        except OperationalError as exc:
+                            with lock:
+                                errors.append(str(exc))
+                            continue
+                        with lock:
+                            latencies.append((time.perf_counter() - began) * 1000)
+                finally:
+                    connection.close()
+
+            def read(user):
+                try:
+                    while not done.is_set():
+                        wallet_service.summary(user)
+                        with lock:
+                            reads[0] += 1
+                finally:
+                    connection.close()
+
+            reader_threads = [threading.Thread(target=read, args=(users[n % writers],)) for n in range(readers)]
+            writer_threads = [threading.Thread(target=write, args=(user,)) for user in users]
+
+            began = time.perf_counter()
+            for thread in reader_threads + writer_threads:
+                thread.start()
+            for thread in writer_threads:
+                thread.join()
+            elapsed = time.perf_counter() - began
+            done.set()
+            for thread in reader_threads:
+                thread.join()
+        finally:
+            if init_command is not None:
+                db_options["init_command"] = configured
+            connection.close()
+
+        latencies.sort()
+        return {
+            "writers": writers,
+            "readers": readers,
+            "writes": len(latencies),
+            "errors": len(errors),
+            "seconds": round(elapsed, 2),
+            "writes_per_second": round(len(latencies) / elapsed, 1),
+            "reads_per_second": round(reads[0] / elapsed, 1),
+            "write_p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+            "write_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2) if latencies else None,
+        }
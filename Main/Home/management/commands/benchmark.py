@@ -0,0 +1,71 @@
+import json
+import platform
+import random
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks import flows, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with synthetic users, sessions and "
+        "attendances, then time the wallet, browse, join and host flows "
+        "through the test client. Prints p50/p95/p99 latency and query "
+        "counts as JSON; --baseline fails the run on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--sessions", type=int, default=5000)
+        parser.add_argument("--attendances", type=int, default=20000)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per flow.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+        parser.add_argument("--baseline", help="Earlier JSON report to compare against.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed p95 slowdown against the baseline (0.25 = 25%%).",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        rng = random.Random(options["seed"])
+
+        # Never touch the real database: build the test database, run, drop it.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            scale = seed.seed(options["users"], options["sessions"], options["attendances"], rng)
+            results = flows.run(options["requests"], rng)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            "scale": scale,
+            "seed": options["seed"],
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "flows": results,
+        }
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+
+        if baseline:
+            failures = flows.regressions(report, baseline, options["threshold"])
+            if failures:
+                raise CommandError("Performance regressions:\n" + "\n".join(failures))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from Home import assets
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the static assets: hashed file names, .gz/.br variants and "
+        "responsive WebP images in STATIC_ROOT. --extract-css first moves "
+        "inline <style> blocks out of the templates into stylesheets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--extract-css",
+            action="store_true",
+            help="Rewrite templates, moving <style> blocks into static/css/pages/.",
+        )
+
+    def handle(self, *args, **options):
+        if options["extract_css"]:
+            self.extract_css()
+
+        if assets.Image is None:
+            self.stderr.write("Pillow is not installed: skipping resized/WebP images.")
+        if assets.brotli is None:
+            self.stderr.write("brotli is not installed: writing gzip variants only.")
+
+        call_command("collectstatic", interactive=False, verbosity=options["verbosity"] - 1)
+        self.report()
+
+    def extract_css(self):
+        static_dir = Path(settings.STATICFILES_DIRS[0])
+        for template_dir in settings.TEMPLATES[0]["DIRS"]:
+            for template in sorted(Path(template_dir).rglob("*.html")):
+                css_name = assets.extract_inline_css(template, static_dir)
+                if css_name:
+                    self.stdout.write(f"{template.name} -> {css_name}")
+
+    def report(self):
+        root = Path(settings.STATIC_ROOT)
+        totals = {"original": 0, ".gz": 0, ".br": 0}
+        for path in root.rglob("*"):
+            if not path.is_file() or not assets.HASHED_NAME.search(path.name):
+                continue
+            if path.suffix in (".gz", ".br"):
+                totals[path.suffix] += path.stat().st_size
+            elif path.suffix in assets.COMPRESSIBLE:
+                totals["original"] += path.stat().st_size
+
+        self.stdout.write(self.style.SUCCESS(
+            "Text assets: {original} bytes, gzip {gz} bytes, brotli {br} bytes.".format(
+                original=totals["original"], gz=totals[".gz"], br=totals[".br"],
+            )
+        ))
@@ -0,0 +1,69 @@
+import statistics
+import time
+from array import array
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Home import recommendations
+from Home.models import SessionAttendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute host-to-host similarities from co-attendance and write the "
+        "memory-mapped file behind the recommended sessions feed. Needs NumPy "
+        "and SciPy; run it periodically, e.g. nightly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=365, help="Attendances considered, in days back.")
+        parser.add_argument("--neighbours", type=int, default=recommendations.NEIGHBOURS)
+        parser.add_argument("--min-common", type=int, default=recommendations.MIN_COMMON)
+        parser.add_argument("--output", default=settings.RECOMMENDATIONS_FILE)
+
+    def handle(self, *args, **options):
+        if recommendations.np is None:
+            raise CommandError("build_recommendations needs NumPy and SciPy: pip install numpy scipy")
+        if options["neighbours"] < 1 or options["min_common"] < 1:
+            raise CommandError("--neighbours and --min-common must be at least 1.")
+
+        began = time.perf_counter()
+        learners, hosts = array("q"), array("q")
+        since = timezone.now() - timedelta(days=options["days"])
+        rows = SessionAttendance.objects.filter(joined_at__gte=since).values_list("attendee_id", "session__host_id")
+        for learner_id, host_id in rows.iterator(chunk_size=10_000):
+            learners.append(learner_id)
+            hosts.append(host_id)
+
+        arrays = recommendations.build(learners, hosts, options["neighbours"], options["min_common"])
+        size = recommendations.write(options["output"], *arrays)
+        elapsed = time.perf_counter() - began
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {options['output']} ({size} bytes): {len(arrays[0])} hosts, {len(arrays[2])} neighbour "
+            f"pairs from {len(hosts)} attendances in {elapsed:.1f}s."
+        ))
+        self.report_latency(options["output"], learners, hosts)
+
+    def report_latency(self, path, learners, hosts):
+        # Request-time cost of turning a learner's history into ranked hosts.
+        histories = {}
+        for learner_id, host_id in zip(learners, hosts):
+            histories.setdefault(learner_id, []).append(host_id)
+        if not histories:
+            return
+        index = recommendations.SimilarityIndex(path)
+        samples = []
+        for learner_id, history in list(histories.items())[:1000]:
+            began = time.perf_counter()
+            recommendations.recommended_hosts(index, learner_id, Counter(history[-recommendations.HISTORY:]))
+            samples.append((time.perf_counter() - began) * 1_000_000)
+        samples.sort()
+        self.stdout.write(
+            f"Ranking hosts per learner: median {statistics.median(samples):.0f}us, "
+            f"p99 {samples[int(len(samples) * 0.99)]:.0f}us over {len(samples)} learners."
+        )
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from Home import scheduling
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a term schedule (.csv, .json or .jsonl, one session per row) "
+        "for a host. All rows are validated and inserted in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--host", required=True, help="Username of the host.")
+        parser.add_argument("--batch-size", type=int, default=scheduling.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            host = User.objects.get(username=options["host"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['host']!r}.")
+
+        with open(options["path"], "rb") as stream:
+            try:
+                created = scheduling.import_sessions(
+                    host,
+                    scheduling.read_rows(stream, options["path"]),
+                    batch_size=options["batch_size"],
+                )
+            except scheduling.ScheduleError as exc:
+                raise CommandError("Nothing imported:\n" + "\n".join(exc.errors))
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} sessions for {host.username}."))
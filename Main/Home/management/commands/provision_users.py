@@ -0,0 +1,76 @@
+import csv
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from Home import ledger
+from Home.models import Profile
+
+BATCH_SIZE = 1000
+FIELDS = ("email", "first_name", "last_name")
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Create accounts in bulk from a CSV with a username column (email, "
+        "first_name and last_name optional). Users get unusable passwords, so "
+        "they sign in through a password reset. Existing usernames are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        created = skipped = 0
+        with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+            reader = csv.DictReader(stream)
+            if "username" not in (reader.fieldnames or ()):
+                raise CommandError("The CSV needs a username column.")
+
+            seen = set()
+            for batch in _batches(reader, options["batch_size"]):
+                users = []
+                for row in batch:
+                    username = (row.get("username") or "").strip()
+                    if not username or username in seen:
+                        skipped += 1
+                        continue
+                    seen.add(username)
+                    user = User(username=username, **{f: (row.get(f) or "").strip() for f in FIELDS})
+                    user.set_unusable_password()
+                    users.append(user)
+
+                users, n_existing = self.provision(users)
+                created += len(users)
+                skipped += n_existing
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} users; skipped {skipped} rows."))
+
+    def provision(self, users):
+        # bulk_create sends no post_save, so profiles are inserted here too.
+        with transaction.atomic():
+            existing = set(User.objects.filter(username__in=[u.username for u in users])
+                                       .values_list("username", flat=True))
+            users = [u for u in users if u.username not in existing]
+            User.objects.bulk_create(users)
+            if users and users[0].pk is None:
+                # Backends that cannot return ids from a bulk insert.
+                ids = dict(User.objects.filter(username__in=[u.username for u in users])
+                                       .values_list("username", "id"))
+                for user in users:
+                    user.pk = ids[user.username]
+            Profile.objects.bulk_create([Profile(user=user) for user in users])
+            ledger.grant_signup(users)
+        return users, len(existing)
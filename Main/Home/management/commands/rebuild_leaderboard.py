@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from Home import leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every LeaderboardEntry (all-time, weekly and monthly) from "
+        "the ledger, sessions and attendances."
+    )
+
+    def handle(self, *args, **options):
+        written = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} leaderboard rows."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from Home import rollups
+
+
+def _date(value):
+    day = parse_date(value)
+    if day is None:
+        raise CommandError(f"Invalid date {value!r}; use YYYY-MM-DD.")
+    return day
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute DailyCreditRollup rows from the ledger, sessions and "
+        "attendances. Without --from every day up to --to (default today) "
+        "is rebuilt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", type=_date, help="First day (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="end", type=_date, help="Last day, inclusive (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        if options["start"] and options["end"] and options["start"] > options["end"]:
+            raise CommandError("--from must not be after --to.")
+
+        written = rollups.rebuild(options["start"], options["end"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} daily rollup rows."))
@@ -0,0 +1,77 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Home import jobs
+
+RECOVER_EVERY = 60        # Seconds between sweeps for orphaned / expired jobs
+REPORT_EVERY = 60         # Seconds between throughput lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs. Polls the database until stopped "
+        "(SIGINT / SIGTERM finish the current batch first); --once drains "
+        "the due jobs and exits. Start as many workers as needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit when no job is due.")
+        parser.add_argument("--batch-size", type=int, default=jobs.BATCH_SIZE)
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--name", default=f"{socket.gethostname()}:{os.getpid()}", help="Worker name.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        self.stopping = False
+        if not options["once"]:
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        succeeded = failed = 0
+        window = {"ok": 0, "failed": 0, "started": time.monotonic()}
+        last_sweep = 0.0
+
+        while not self.stopping:
+            if time.monotonic() - last_sweep > RECOVER_EVERY:
+                recovered, pruned = jobs.recover(), jobs.prune()
+                if recovered or pruned:
+                    self.stdout.write(f"Recovered {recovered} stale jobs, pruned {pruned} finished ones.")
+                last_sweep = time.monotonic()
+
+            batch = jobs.claim(options["name"], options["batch_size"])
+            for job in batch:
+                if jobs.run(job):
+                    succeeded += 1
+                    window["ok"] += 1
+                else:
+                    failed += 1
+                    window["failed"] += 1
+
+            elapsed = time.monotonic() - window["started"]
+            if elapsed >= REPORT_EVERY and (window["ok"] or window["failed"]):
+                self.report(window, elapsed)
+                window = {"ok": 0, "failed": 0, "started": time.monotonic()}
+
+            if not batch:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Ran {succeeded + failed} jobs: {succeeded} succeeded, {failed} failed."))
+
+    def report(self, window, elapsed):
+        lag = jobs.stats()["lag_seconds"]
+        self.stdout.write(
+            f"{(window['ok'] + window['failed']) / elapsed:.1f} jobs/s "
+            f"({window['ok']} ok, {window['failed']} failed), lag {lag:.1f}s"
+        )
+
+    def stop(self, signum, frame):
+        self.stdout.write("Stopping after the current batch...")
+        self.stopping = True
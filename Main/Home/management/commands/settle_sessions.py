@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Home import settlement
+
+
+class Command(BaseCommand):
+    help = (
+        "Pay hosts for sessions that have ended (if anyone attended) and refund "
+        "attendees of cancelled sessions. Safe to run repeatedly, e.g. from cron "
+        "every few minutes: each session is settled once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settlement.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        totals = settlement.settle(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Settled {totals['sessions']} sessions: paid {totals['credits_paid']} credits "
+            f"to {totals['hosts_paid']} hosts, refunded {totals['credits_refunded']} credits "
+            f"in {totals['refunds']} refunds."
+        ))
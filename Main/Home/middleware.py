@@ -0,0 +1,133 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from Home import instrumentation, routing
+
+logger = logging.getLogger("Home.performance")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+# ==========================================================
+# REQUEST INSTRUMENTATION
+# ----------------------------------------------------------
+# Times every request, counts its SQL queries and template
+# renders, reports them in a Server-Timing header, feeds the
+# /metrics histograms and logs requests over budget.
+# Runs natively under both WSGI and ASGI.
+# ==========================================================
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        # Connections opened before this module was imported missed the
+        # connection_created hook.
+        for conn in connections.all(initialized_only=True):
+            instrumentation.install_query_counter(conn)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = instrumentation.RequestStats()
+        token = instrumentation.current.set(stats)
+        began = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - began)
+
+    async def __acall__(self, request):
+        stats = instrumentation.RequestStats()
+        token = instrumentation.current.set(stats)
+        began = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - began)
+
+    def finish(self, request, response, stats, elapsed):
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        instrumentation.registry.observe(view, response.status_code, elapsed, stats)
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"',
+            f"tpl;dur={stats.template_seconds * 1000:.1f}",
+            f"total;dur={elapsed * 1000:.1f}",
+        ])
+
+        if stats.queries > settings.PERF_QUERY_BUDGET or elapsed * 1000 > settings.PERF_LATENCY_BUDGET_MS:
+            logger.warning(
+                "Over budget: %s %s (%s) took %.1fms with %d queries (%.1fms SQL, %.1fms templates)",
+                request.method, request.path, view, elapsed * 1000,
+                stats.queries, stats.db_seconds * 1000, stats.template_seconds * 1000,
+            )
+        return response
+
+
+# ==========================================================
+# READ-YOUR-WRITES FOR REPLICA ROUTING (see Home/routing.py)
+# ----------------------------------------------------------
+# Unsafe methods and browsers that wrote in the last
+# REPLICA_PIN_SECONDS read from the primary. A request that
+# writes refreshes the pin cookie, so the redirect after a
+# join already sees the new balance. A cookie rather than the
+# session, whose own read would otherwise need routing first.
+# ==========================================================
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        for conn in connections.all(initialized_only=True):
+            routing.install_write_watch(conn)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = self.state(request)
+        token = routing.current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.current.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = self.state(request)
+        token = routing.current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing.current.reset(token)
+        return self.finish(response, state)
+
+    def state(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(routing.PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        return routing.RoutingState(pinned=request.method not in SAFE_METHODS or pinned_until > time.time())
+
+    def finish(self, response, state):
+        if state.wrote and settings.REPLICA_PIN_SECONDS > 0:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(routing.PIN_COOKIE, f"{time.time() + seconds:.3f}",
+                                max_age=seconds, httponly=True, samesite="Lax")
+        return response
@@ -12,7 +12,11 @@ class Migration(migrations.Migration):
         migrations.swappable_dependency(settings.AUTH_USER_MODEL),
     ]
 
+    # 0001_initial already creates both tables, so this migration only has to
+    # keep the migration state in step; running it against the database again
+    # fails with "table already exists" on a fresh install.
     operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
         migrations.CreateModel(
             name='LiveSession',
             fields=[
@@ -35,4 +39,5 @@ class Migration(migrations.Migration):
                 'unique_together': {('session', 'attendee')},
             },
         ),
+        ]),
     ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0004_credittransaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='livesession',
+            index=models.Index(fields=['host', 'scheduled_at'], name='session_host_time'),
+        ),
+        migrations.AddIndex(
+            model_name='livesession',
+            index=models.Index(condition=models.Q(('is_cancelled', False)), fields=['scheduled_at', 'id'], name='session_open_time'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionattendance',
+            index=models.Index(fields=['attendee', 'session'], name='attendance_attendee_session'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+FTS_TABLE = "Home_livesession_fts"
+
+# FTS5 is SQLite only; other backends fall back to icontains (Home/search.py).
+CREATE_FTS_SQL = [
+    f"""CREATE VIRTUAL TABLE "{FTS_TABLE}" USING fts5(
+        title, description,
+        content='Home_livesession', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER "{FTS_TABLE}_ai" AFTER INSERT ON "Home_livesession" BEGIN
+        INSERT INTO "{FTS_TABLE}"(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER "{FTS_TABLE}_ad" AFTER DELETE ON "Home_livesession" BEGIN
+        INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER "{FTS_TABLE}_au" AFTER UPDATE OF title, description ON "Home_livesession" BEGIN
+        INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO "{FTS_TABLE}"(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    f"""INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rank) VALUES ('rank', 'bm25(10.0, 1.0)')""",
+    f"""INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES ('rebuild')""",
+]
+
+DROP_FTS_SQL = [
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ai"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ad"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_au"',
+    f'DROP TABLE IF EXISTS "{FTS_TABLE}"',
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in CREATE_FTS_SQL:
+            schema_editor.execute(statement)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in DROP_FTS_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livesession',
+            name='category',
+            field=models.CharField(blank=True, choices=[('programming', 'Programming'), ('design', 'Design & Art'), ('music', 'Music'), ('languages', 'Languages'), ('cooking', 'Cooking'), ('business', 'Business'), ('dancing', 'Dancing')], max_length=20),
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:02
+
+from collections import defaultdict
+from itertools import islice
+
+import Home.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+BATCH_SIZE = 1000
+
+
+# A frozen copy of the rollup rebuild as it stood when this migration was
+# written; later changes to Home.rollups must not change what it does. The
+# table is new, so the totals are inserted rather than upserted.
+def build_rollups(apps, schema_editor):
+    db = schema_editor.connection.alias
+    CreditTransaction = apps.get_model("Home", "CreditTransaction")
+    LiveSession = apps.get_model("Home", "LiveSession")
+    SessionAttendance = apps.get_model("Home", "SessionAttendance")
+    DailyCreditRollup = apps.get_model("Home", "DailyCreditRollup")
+
+    # (user_id, day) -> [earned, spent, sessions_hosted, sessions_joined]
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    ledger = (
+        CreditTransaction.objects.using(db)
+                                 .annotate(day=TruncDate("created_at"))
+                                 .values_list("user_id", "day")
+                                 .annotate(earned=Sum("amount", filter=~Q(kind="spent")),
+                                           spent=Sum("amount", filter=Q(kind="spent")))
+                                 .order_by()
+    )
+    for user_id, day, earned, spent in ledger.iterator():
+        totals[(user_id, day)][0] += earned or 0
+        totals[(user_id, day)][1] += spent or 0
+
+    hosted = (
+        LiveSession.objects.using(db)
+                           .annotate(day=TruncDate("created_at"))
+                           .values_list("host_id", "day")
+                           .annotate(n=Count("id"))
+                           .order_by()
+    )
+    for user_id, day, n in hosted.iterator():
+        totals[(user_id, day)][2] += n
+
+    joined = (
+        SessionAttendance.objects.using(db)
+                                 .annotate(day=TruncDate("joined_at"))
+                                 .values_list("attendee_id", "day")
+                                 .annotate(n=Count("id"))
+                                 .order_by()
+    )
+    for user_id, day, n in joined.iterator():
+        totals[(user_id, day)][3] += n
+
+    rows = (
+        DailyCreditRollup(user_id=user_id, day=day, earned=earned, spent=spent,
+                          sessions_hosted=hosted, sessions_joined=joined)
+        for (user_id, day), (earned, spent, hosted, joined) in totals.items()
+    )
+    while batch := list(islice(rows, BATCH_SIZE)):
+        DailyCreditRollup.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0007_session_series'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCreditRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('earned', models.PositiveIntegerField(default=0)),
+                ('spent', models.PositiveIntegerField(default=0)),
+                ('sessions_hosted', models.PositiveIntegerField(default=0)),
+                ('sessions_joined', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-day',),
+                'indexes': [models.Index(fields=['day'], name='rollup_day')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='rollup_user_day')],
+            },
+            managers=[
+                ('objects', Home.models.DailyCreditRollupManager()),
+            ],
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def settle_existing_sessions(apps, schema_editor):
+    # Under the old scheme hosts were paid when they created a session, so
+    # every existing session counts as settled and settlement never pays it
+    # again. The exceptions are sessions whose reward was still waiting in
+    # the job queue: those jobs are dropped and settlement pays instead.
+    LiveSession = apps.get_model("Home", "LiveSession")
+    Job = apps.get_model("Home", "Job")
+
+    pending = Job.objects.filter(task="reward_host", status__in=["queued", "running"])
+    unpaid = {pk for payload in pending.values_list("payload", flat=True) for pk in payload.get("session_ids", [])}
+    LiveSession.objects.exclude(pk__in=unpaid).update(settled_at=models.F("created_at"))
+    pending.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0009_background_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livesession',
+            name='settled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='credittransaction',
+            name='kind',
+            field=models.CharField(choices=[('earned', 'Earned'), ('spent', 'Spent'), ('refunded', 'Refunded')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='livesession',
+            index=models.Index(condition=models.Q(('settled_at__isnull', True)), fields=['id'], name='session_unsettled'),
+        ),
+        migrations.RunPython(settle_existing_sessions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:21
+
+import importlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+MAX_DURATION_MINUTES = 24 * 60
+
+search_0006 = importlib.import_module("Home.migrations.0006_livesession_category_search")
+
+
+def fill_ends_at(apps, schema_editor):
+    # Computed in Python: SQLite cannot add minutes * interval in SQL.
+    LiveSession = apps.get_model("Home", "LiveSession")
+    # Sessions longer than a day predate the limit. Shortening them here
+    # would silently change what hosts scheduled, so the migration stops
+    # until they have been fixed (shortened or split) by hand.
+    too_long = list(LiveSession.objects.filter(duration_minutes__gt=MAX_DURATION_MINUTES)
+                                       .order_by("pk").values_list("pk", flat=True)[:20])
+    if too_long:
+        raise ValueError(
+            f"Sessions can last at most {MAX_DURATION_MINUTES} minutes; shorten or split these "
+            f"before migrating: {', '.join(map(str, too_long))}."
+        )
+
+    after = 0
+    while True:
+        batch = list(LiveSession.objects.filter(pk__gt=after).order_by("pk").only("scheduled_at", "duration_minutes")[:2000])
+        if not batch:
+            return
+        for session in batch:
+            session.ends_at = session.scheduled_at + timedelta(minutes=session.duration_minutes)
+        LiveSession.objects.bulk_update(batch, ["ends_at"])
+        after = batch[-1].pk
+
+
+def restore_fts_triggers(apps, schema_editor):
+    # SQLite applies NOT NULL and CHECK by rebuilding the table, which drops
+    # the search triggers; the FTS rows themselves survive (ids are kept).
+    # Run last going forwards and, for the same reason, last going back.
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in search_0006.DROP_FTS_SQL[:3] + search_0006.CREATE_FTS_SQL[1:4]:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0010_session_settlement'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts_triggers),
+        migrations.RemoveIndex(
+            model_name='livesession',
+            name='session_open_time',
+        ),
+        migrations.AddField(
+            model_name='livesession',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_ends_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='livesession',
+            name='ends_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='livesession',
+            index=models.Index(condition=models.Q(('is_cancelled', False)), fields=['scheduled_at', 'id', 'ends_at'], name='session_open_time'),
+        ),
+        migrations.AddConstraint(
+            model_name='livesession',
+            constraint=models.CheckConstraint(condition=models.Q(('duration_minutes__lte', MAX_DURATION_MINUTES)), name='session_max_duration', violation_error_message='A session can last at most 24 hours.'),
+        ),
+        migrations.RunPython(restore_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import islice
+
+import Home.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+BATCH_SIZE = 1000
+EPOCH = date(1970, 1, 1)
+
+
+def period_starts(day):
+    return (("all", EPOCH), ("week", day - timedelta(days=day.weekday())), ("month", day.replace(day=1)))
+
+
+# A frozen copy of the leaderboard rebuild as it stood when this migration
+# was written; later changes to Home.leaderboard must not change what it
+# does. The table is new, so the totals are inserted rather than upserted.
+def build_leaderboard(apps, schema_editor):
+    db = schema_editor.connection.alias
+    CreditTransaction = apps.get_model("Home", "CreditTransaction")
+    LiveSession = apps.get_model("Home", "LiveSession")
+    SessionAttendance = apps.get_model("Home", "SessionAttendance")
+    LeaderboardEntry = apps.get_model("Home", "LeaderboardEntry")
+
+    # (user_id, period, starts_on) -> [sessions_hosted, credits_earned, attendees, sessions_joined]
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+
+    def add(rows, counter):
+        for user_id, day, n in rows.order_by().iterator():
+            for period, starts_on in period_starts(day):
+                totals[(user_id, period, starts_on)][counter] += n
+
+    add(LiveSession.objects.using(db).annotate(day=TruncDate("created_at"))
+                   .values_list("host_id", "day").annotate(n=Count("id")), 0)
+    add(CreditTransaction.objects.using(db).filter(kind="earned").annotate(day=TruncDate("created_at"))
+                         .values_list("user_id", "day").annotate(n=Sum("amount")), 1)
+    attendances = SessionAttendance.objects.using(db).annotate(day=TruncDate("joined_at"))
+    add(attendances.values_list("session__host_id", "day").annotate(n=Count("id")), 2)
+    add(attendances.values_list("attendee_id", "day").annotate(n=Count("id")), 3)
+
+    rows = (
+        LeaderboardEntry(user_id=user_id, period=period, starts_on=starts_on, sessions_hosted=hosted,
+                         credits_earned=earned, attendees=attendees, sessions_joined=joined)
+        for (user_id, period, starts_on), (hosted, earned, attendees, joined) in totals.items()
+    )
+    while batch := list(islice(rows, BATCH_SIZE)):
+        LeaderboardEntry.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0011_session_calendar'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('all', 'All time'), ('week', 'This week'), ('month', 'This month')], max_length=5)),
+                ('starts_on', models.DateField()),
+                ('sessions_hosted', models.PositiveIntegerField(default=0)),
+                ('credits_earned', models.PositiveIntegerField(default=0)),
+                ('attendees', models.PositiveIntegerField(default=0)),
+                ('sessions_joined', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'starts_on', '-sessions_hosted', 'user'], name='leaderboard_sessions_hosted'), models.Index(fields=['period', 'starts_on', '-credits_earned', 'user'], name='leaderboard_credits_earned'), models.Index(fields=['period', 'starts_on', '-attendees', 'user'], name='leaderboard_attendees'), models.Index(fields=['period', 'starts_on', '-sessions_joined', 'user'], name='leaderboard_sessions_joined')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'starts_on'), name='leaderboard_user_period')],
+            },
+            managers=[
+                ('objects', Home.models.LeaderboardEntryManager()),
+            ],
+        ),
+        migrations.RunPython(build_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0012_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='credittransaction',
+            name='kind',
+            field=models.CharField(choices=[('earned', 'Earned'), ('spent', 'Spent'), ('refunded', 'Refunded'), ('granted', 'Granted')], max_length=10),
+        ),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, timedelta
+
+from django.db import connection, models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.utils import timezone
 
 
 # ==========================================================
@@ -15,10 +19,64 @@ class Profile(models.Model):
         return f"{self.user.username} - {self.credits} credits"
 
 
+# ==========================================================
+# SESSION SERIES (recurring rule a host scheduled in one go)
+# ==========================================================
+class SessionSeries(models.Model):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    FREQUENCY_CHOICES = [
+        (DAILY, "Daily"),
+        (WEEKLY, "Weekly"),
+    ]
+
+    host = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="session_series"
+    )
+    title = models.CharField(max_length=255)
+
+    # RRULE-style: FREQ / INTERVAL / BYDAY, ending at UNTIL or after COUNT.
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveIntegerField(default=1)
+    weekdays = models.CharField(max_length=13, blank=True)  # "0,2,4" = Mon, Wed, Fri
+    starts_at = models.DateTimeField()
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.title} ({self.get_frequency_display()}) by {self.host.username}"
+
+
 # ==========================================================
 # LIVE SESSION MODEL (Main Teaching System)
 # ==========================================================
+MAX_DURATION_MINUTES = 24 * 60  # Bounds overlap scans (Home/availability.py)
+
+
+class LiveSessionManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create skips save(): fill the end time here too.
+        objs = list(objs)
+        for session in objs:
+            session.set_ends_at()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class LiveSession(models.Model):
+    CATEGORY_CHOICES = [
+        ("programming", "Programming"),
+        ("design", "Design & Art"),
+        ("music", "Music"),
+        ("languages", "Languages"),
+        ("cooking", "Cooking"),
+        ("business", "Business"),
+        ("dancing", "Dancing"),
+    ]
+
     host = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -27,19 +85,68 @@ class LiveSession(models.Model):
 
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, blank=True)
 
     scheduled_at = models.DateTimeField()
     duration_minutes = models.PositiveIntegerField(default=60)
+    # scheduled_at + duration_minutes, kept by save() and bulk_create();
+    # QuerySet.update() of either field must set it too.
+    ends_at = models.DateTimeField(editable=False)
 
     credit_reward = models.IntegerField(default=10)  # Credits teacher earns
     max_attendees = models.PositiveIntegerField(null=True, blank=True)
 
     is_cancelled = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set once the host is paid / attendees refunded (Home/settlement.py).
+    settled_at = models.DateTimeField(null=True, blank=True)
+
+    series = models.ForeignKey(
+        SessionSeries,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="sessions"
+    )
+
+    objects = LiveSessionManager()
+
+    class Meta:
+        indexes = [
+            # Wallet: a host's sessions before / after now
+            models.Index(fields=["host", "scheduled_at"], name="session_host_time"),
+            # Catalogue and calendar windows: non-cancelled sessions in
+            # (scheduled_at, id) order; ends_at rides along so overlap
+            # filtering happens in the index, without row lookups
+            models.Index(
+                fields=["scheduled_at", "id", "ends_at"],
+                condition=models.Q(is_cancelled=False),
+                name="session_open_time",
+            ),
+            # Settlement: only sessions still waiting to be paid out
+            models.Index(fields=["id"], condition=models.Q(settled_at__isnull=True), name="session_unsettled"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(duration_minutes__lte=MAX_DURATION_MINUTES),
+                name="session_max_duration",
+                violation_error_message="A session can last at most 24 hours.",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.host.username}"
 
+    def set_ends_at(self):
+        self.ends_at = self.scheduled_at + timedelta(minutes=self.duration_minutes)
+
+    def save(self, *args, **kwargs):
+        self.set_ends_at()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"scheduled_at", "duration_minutes"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "ends_at"}
+        super().save(*args, **kwargs)
+
     @property
     def attendee_count(self):
         return self.attendances.count()
@@ -64,20 +171,330 @@ class SessionAttendance(models.Model):
 
     class Meta:
         unique_together = ("session", "attendee")  # 1 user cannot join twice
+        indexes = [
+            # Wallet: a learner's attendances, joined to their sessions
+            models.Index(fields=["attendee", "session"], name="attendance_attendee_session"),
+        ]
 
     def __str__(self):
         return f"{self.attendee.username} attended {self.session.title}"
 
 
 # ==========================================================
-# AUTO CREATE PROFILE WHEN USER IS CREATED
-# ========================================================== 
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
+# CREDIT LEDGER (Append-only record of every earn / spend)
+# ==========================================================
+class CreditTransaction(models.Model):
+    EARNED = "earned"
+    SPENT = "spent"
+    REFUNDED = "refunded"
+    GRANTED = "granted"     # Signup credits; not on the "credits earned" leaderboard
+    KIND_CHOICES = [
+        (EARNED, "Earned"),
+        (SPENT, "Spent"),
+        (REFUNDED, "Refunded"),
+        (GRANTED, "Granted"),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="credit_transactions"
+    )
+    session = models.ForeignKey(
+        LiveSession,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="credit_transactions"
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    amount = models.PositiveIntegerField()       # Always positive, kind gives the sign
+    balance_after = models.IntegerField()        # Profile.credits right after this entry
+
+    title = models.CharField(max_length=255)     # Copied so history needs no join
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("-created_at", "-id")
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"], name="credit_tx_user_recent"),
+        ]
+
+    def __str__(self):
+        sign = "-" if self.kind == self.SPENT else "+"
+        return f"{self.user.username} {sign}{self.amount} ({self.title})"
+
+    @property
+    def signed_amount(self):
+        return -self.amount if self.kind == self.SPENT else self.amount
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("CreditTransaction rows are append-only.")
+        super().save(*args, **kwargs)
+
+
+# ==========================================================
+# COUNTER UPSERTS (shared by the rollup and leaderboard tables)
+# ----------------------------------------------------------
+# totals maps key values -> counter increments, written with
+# INSERT ... ON CONFLICT DO UPDATE so concurrent writers add
+# to the same row instead of racing to create it.
+# ==========================================================
+UPSERT_PARAMS = 900  # Parameters per statement, under SQLite's 999 limit
+
+
+def upsert_counters(model, keys, counters, totals):
+    if not totals:
+        return
+
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    key_fields = [model._meta.get_field(k) for k in keys]
+    key_columns = ", ".join(qn(f.column) for f in key_fields)
+    columns = ", ".join([key_columns] + [qn(c) for c in counters])
+    updates = ", ".join(f"{qn(c)} = {table}.{qn(c)} + excluded.{qn(c)}" for c in counters)
+    placeholder = f"({', '.join(['%s'] * (len(keys) + len(counters)))})"
+    rows_per_statement = UPSERT_PARAMS // (len(keys) + len(counters))
+
+    items = list(totals.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), rows_per_statement):
+            chunk = items[start:start + rows_per_statement]
+            params = []
+            for key, values in chunk:
+                params += [f.get_db_prep_value(k, connection) for f, k in zip(key_fields, key)]
+                params += values
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) "
+                f"VALUES {', '.join([placeholder] * len(chunk))} "
+                f"ON CONFLICT ({key_columns}) DO UPDATE SET {updates}",
+                params,
+            )
+
 
+# Inside batched_counters() the managers' add() calls are held back and
+# written on exit, summed: one upsert per table for a request that records
+# several events (a join is a ledger entry plus an attendance).
+_pending_counters = ContextVar("pending_counters", default=None)
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+
+def _defer_counters(model, deltas):
+    pending = _pending_counters.get()
+    if pending is None:
+        return False
+    pending.setdefault(model, []).extend(deltas)
+    return True
+
+
+@contextmanager
+def batched_counters():
+    if _pending_counters.get() is not None:
+        yield
+        return
+    pending = {}
+    token = _pending_counters.set(pending)
+    try:
+        yield
+    finally:
+        _pending_counters.reset(token)
+    # Not reached on an exception: the transaction is rolled back anyway.
+    for model, deltas in pending.items():
+        model.objects.add(deltas)
+
+
+# ==========================================================
+# DAILY CREDIT ROLLUP (per user per day, kept up to date on write)
+# ==========================================================
+class DailyCreditRollupManager(models.Manager):
+    use_in_migrations = True
+
+    COUNTERS = ("earned", "spent", "sessions_hosted", "sessions_joined")
+
+    def add(self, deltas):
+        # deltas: (user_id, day, earned, spent, hosted, joined), summed per (user, day).
+        if _defer_counters(self.model, deltas):
+            return
+        totals = defaultdict(lambda: [0, 0, 0, 0])
+        for user_id, day, *values in deltas:
+            row = totals[(user_id, day)]
+            for i, value in enumerate(values):
+                row[i] += value
+        upsert_counters(self.model, ("user", "day"), self.COUNTERS, totals)
+
+    # The record_* hooks also feed the leaderboard, which counts the same events.
+    def record_ledger(self, entries):
+        # Refunds are credits in, so they count as earned (not on the leaderboard).
+        self.add(
+            (e.user_id, timezone.localdate(e.created_at),
+             e.amount if e.kind != CreditTransaction.SPENT else 0,
+             e.amount if e.kind == CreditTransaction.SPENT else 0, 0, 0)
+            for e in entries
+        )
+        LeaderboardEntry.objects.add(
+            (e.user_id, timezone.localdate(e.created_at), 0, e.amount, 0, 0)
+            for e in entries if e.kind == CreditTransaction.EARNED
+        )
+
+    def record_hosted(self, sessions):
+        self.add((s.host_id, timezone.localdate(s.created_at), 0, 0, 1, 0) for s in sessions)
+        LeaderboardEntry.objects.add((s.host_id, timezone.localdate(s.created_at), 1, 0, 0, 0) for s in sessions)
+
+    def record_joined(self, attendances):
+        self.add((a.attendee_id, timezone.localdate(a.joined_at), 0, 0, 0, 1) for a in attendances)
+        LeaderboardEntry.objects.add(
+            delta
+            for a in attendances
+            for delta in ((a.attendee_id, timezone.localdate(a.joined_at), 0, 0, 0, 1),
+                          (a.session.host_id, timezone.localdate(a.joined_at), 0, 0, 1, 0))
+        )
+
+
+class DailyCreditRollup(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="daily_rollups"
+    )
+    day = models.DateField()
+
+    earned = models.PositiveIntegerField(default=0)
+    spent = models.PositiveIntegerField(default=0)
+    sessions_hosted = models.PositiveIntegerField(default=0)
+    sessions_joined = models.PositiveIntegerField(default=0)
+
+    objects = DailyCreditRollupManager()
+
+    class Meta:
+        ordering = ("-day",)
+        constraints = [
+            # Also the index behind the wallet's per-user window lookups.
+            models.UniqueConstraint(fields=["user", "day"], name="rollup_user_day"),
+        ]
+        indexes = [
+            # Admin trends: platform totals per day
+            models.Index(fields=["day"], name="rollup_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.day}: +{self.earned} -{self.spent}"
+
+
+# ==========================================================
+# LEADERBOARD (per user per window, kept up to date on write)
+# ----------------------------------------------------------
+# Every event is added to three rows: the user's all-time row
+# and the rows for the week and the month it happened in. See
+# Home/leaderboard.py for the ranking queries.
+# ==========================================================
+class LeaderboardEntryManager(models.Manager):
+    use_in_migrations = True
+
+    COUNTERS = ("sessions_hosted", "credits_earned", "attendees", "sessions_joined")
+
+    def add(self, deltas):
+        # deltas: (user_id, day, hosted, earned, attendees, joined).
+        if _defer_counters(self.model, deltas):
+            return
+        totals = defaultdict(lambda: [0, 0, 0, 0])
+        for user_id, day, *values in deltas:
+            if not any(values):
+                continue
+            for period in (LeaderboardEntry.ALL_TIME, LeaderboardEntry.WEEK, LeaderboardEntry.MONTH):
+                row = totals[(user_id, period, LeaderboardEntry.period_start(period, day))]
+                for i, value in enumerate(values):
+                    row[i] += value
+        upsert_counters(self.model, ("user", "period", "starts_on"), self.COUNTERS, totals)
+
+
+class LeaderboardEntry(models.Model):
+    ALL_TIME = "all"
+    WEEK = "week"
+    MONTH = "month"
+    PERIOD_CHOICES = [
+        (ALL_TIME, "All time"),
+        (WEEK, "This week"),
+        (MONTH, "This month"),
+    ]
+    EPOCH = date(1970, 1, 1)  # starts_on of every all-time row
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="leaderboard_entries"
+    )
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    starts_on = models.DateField()  # Monday of the week, 1st of the month
+
+    sessions_hosted = models.PositiveIntegerField(default=0)
+    credits_earned = models.PositiveIntegerField(default=0)
+    attendees = models.PositiveIntegerField(default=0)        # Joins of the user's sessions
+    sessions_joined = models.PositiveIntegerField(default=0)
+
+    objects = LeaderboardEntryManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "period", "starts_on"], name="leaderboard_user_period"),
+        ]
+        # One per board: top-N is a walk from the top of the index and
+        # a rank counts the index entries above the user's score.
+        indexes = [
+            models.Index(fields=["period", "starts_on", f"-{counter}", "user"], name=f"leaderboard_{counter}")
+            for counter in ("sessions_hosted", "credits_earned", "attendees", "sessions_joined")
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.period} {self.starts_on}"
+
+    @classmethod
+    def period_start(cls, period, day):
+        if period == cls.WEEK:
+            return day - timedelta(days=day.weekday())
+        if period == cls.MONTH:
+            return day.replace(day=1)
+        return cls.EPOCH
+
+
+# ==========================================================
+# BACKGROUND JOB (database-backed queue; see Home/jobs.py)
+# ==========================================================
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    # Enqueueing the same key twice is a no-op while the first job is kept.
+    key = models.CharField(max_length=200, null=True, blank=True, unique=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers: the next due jobs
+            models.Index(fields=["run_at", "id"], condition=models.Q(status="queued"), name="job_due"),
+            # Metrics and pruning: recently finished / stuck jobs
+            models.Index(fields=["status", "finished_at"], name="job_status_finished"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
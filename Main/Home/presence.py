@@ -0,0 +1,167 @@
+import asyncio
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+QUEUE_SIZE = 64       # Undelivered messages a subscriber may hold before it lags
+CATALOGUE = "catalogue"
+
+
+def session_channel(session_id):
+    return f"session:{session_id}"
+
+
+# ==========================================================
+# SUBSCRIPTION (one bounded queue per connected socket)
+# ----------------------------------------------------------
+# Backpressure: a subscriber that falls QUEUE_SIZE messages
+# behind has its backlog dropped and replaced by a single
+# "resync"; the socket then sends a fresh snapshot instead of
+# the stale deltas. Publishers never wait on slow clients.
+# ==========================================================
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    def __init__(self, channel, size=QUEUE_SIZE):
+        self.channel = channel
+        self.queue = asyncio.Queue(maxsize=size)
+
+    def offer(self, message):
+        # Returns how many queued messages were dropped to make room.
+        try:
+            self.queue.put_nowait(message)
+            return 0
+        except asyncio.QueueFull:
+            dropped = self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return dropped
+
+    async def get(self):
+        return await self.queue.get()
+
+
+# ==========================================================
+# IN-MEMORY BACKEND (single process)
+# ----------------------------------------------------------
+# Channels and presence live in this process's event loop.
+# Publishing is safe from any thread: sync views and on_commit
+# callbacks hand messages to the loop with call_soon_threadsafe.
+# A broker-backed class with the same methods (publish,
+# subscribe, unsubscribe, enter, leave, members, stats) fans out
+# across processes; select it with PRESENCE_BACKEND.
+# ==========================================================
+class InMemoryBackend:
+    def __init__(self):
+        self.channels = defaultdict(set)
+        self.present = defaultdict(Counter)
+        self.loop = None
+        self.lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, channel, size=QUEUE_SIZE):
+        self.loop = asyncio.get_running_loop()
+        subscription = Subscription(channel, size)
+        with self.lock:
+            self.channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.channels[subscription.channel]
+
+    def publish(self, channel, message):
+        if channel not in self.channels or self.loop is None or self.loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._deliver(channel, message)
+        else:
+            self.loop.call_soon_threadsafe(self._deliver, channel, message)
+
+    def _deliver(self, channel, message):
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        self.published += 1
+        for subscription in subscribers:
+            self.dropped += subscription.offer(message)
+
+    # Presence counts connections, so a second tab is not a second arrival.
+    def enter(self, channel, member):
+        with self.lock:
+            self.present[channel][member] += 1
+            return self.present[channel][member] == 1
+
+    def leave(self, channel, member):
+        with self.lock:
+            members = self.present[channel]
+            members[member] -= 1
+            if members[member] > 0:
+                return False
+            del members[member]
+            if not members:
+                del self.present[channel]
+            return True
+
+    def members(self, channel):
+        with self.lock:
+            return sorted(self.present.get(channel, ()))
+
+    def stats(self):
+        with self.lock:
+            return {
+                "channels": len(self.channels),
+                "subscribers": sum(len(s) for s in self.channels.values()),
+                "published": self.published,
+                "dropped": self.dropped,
+            }
+
+
+_backends = {}
+
+
+def get_backend():
+    path = getattr(settings, "PRESENCE_BACKEND", "Home.presence.InMemoryBackend")
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+# ==========================================================
+# EVENTS (deltas pushed to sockets)
+# ----------------------------------------------------------
+# "attendees" carries the change in enrolled attendees for a
+# session, also mirrored to the catalogue channel so listing
+# pages update counts without re-polling. "presence" reports
+# who has the session open right now.
+# ==========================================================
+def attendees_changed(session_id, joined=(), left=()):
+    # Unknown names (None) still count towards the delta.
+    delta = len(joined) - len(left)
+    backend = get_backend()
+    backend.publish(session_channel(session_id), {
+        "type": "attendees", "session": session_id, "delta": delta,
+        "joined": [name for name in joined if name], "left": [name for name in left if name],
+    })
+    backend.publish(CATALOGUE, {"type": "attendees", "session": session_id, "delta": delta})
+
+
+def presence_changed(session_id, event, member):
+    backend = get_backend()
+    channel = session_channel(session_id)
+    backend.publish(channel, {
+        "type": "presence", "session": session_id, "event": event,
+        "user": member, "online": len(backend.members(channel)),
+    })
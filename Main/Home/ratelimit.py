@@ -0,0 +1,116 @@
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    # "30/m" -> a bucket of 30 tokens refilled at 30 per minute.
+    count, _, period = rate.partition("/")
+    if period not in PERIODS or not count.isdigit() or int(count) < 1:
+        raise ValueError(f"Invalid rate {rate!r}: use <count>/<s|m|h|d>, e.g. '30/m'.")
+    return int(count), int(count) / PERIODS[period]
+
+
+# ==========================================================
+# TOKEN BUCKET
+# ----------------------------------------------------------
+# A bucket is (tokens, last update): refilled lazily on each
+# request from the elapsed time, so a check is a read, a bit
+# of arithmetic and a write, whatever the traffic.
+# ==========================================================
+def refill(state, capacity, rate, now):
+    if state is None:
+        return float(capacity)
+    tokens, updated = state
+    return min(float(capacity), tokens + (now - updated) * rate)
+
+
+def spend(tokens, cost, rate):
+    # Returns (tokens left, seconds until the request would have fitted).
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+# ==========================================================
+# STORES (selected with RATE_LIMIT_STORE)
+# ==========================================================
+# In-process buckets: fastest, but each worker counts on its own.
+class MemoryStore:
+    MAX_KEYS = 100_000  # Least recently used buckets are dropped beyond this
+
+    def __init__(self):
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost=1, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            tokens, wait = spend(refill(self.buckets.get(key), capacity, rate, now), cost, rate)
+            self.buckets[key] = (tokens, now)
+            self.buckets.move_to_end(key)
+            if len(self.buckets) > self.MAX_KEYS:
+                self.buckets.popitem(last=False)
+        return wait
+
+
+# Buckets in a Django cache, shared by every worker using it. Point
+# RATE_LIMIT_CACHE at a Redis or Memcached cache (Django's RedisCache works
+# as is) to limit across machines. The read and the write are separate cache
+# calls, so racing requests can overspend a bucket by a token or two.
+class CacheStore:
+    def __init__(self, alias=None):
+        self.cache = caches[alias or getattr(settings, "RATE_LIMIT_CACHE", "default")]
+
+    def take(self, key, capacity, rate, cost=1, now=None):
+        now = time.time() if now is None else now
+        key = f"rate-limit:{key}"
+        tokens, wait = spend(refill(self.cache.get(key), capacity, rate, now), cost, rate)
+        # A bucket left alone until it is full again is the same as no bucket.
+        self.cache.set(key, (tokens, now), timeout=math.ceil((capacity - tokens) / rate) + 1)
+        return wait
+
+
+_stores = {}
+throttled = Counter()  # Requests refused, by scope
+
+
+def get_store():
+    path = getattr(settings, "RATE_LIMIT_STORE", "Home.ratelimit.MemoryStore")
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+def client_ip(request):
+    # Behind a proxy, set REMOTE_ADDR from the trusted X-Forwarded-For hop there.
+    return request.META.get("REMOTE_ADDR", "")
+
+
+# Seconds the client must wait before `scope` accepts it again (0: go ahead).
+# Budgets come from settings.RATE_LIMITS[scope]: a "user" rate for signed-in
+# users and an "ip" rate per client address; a scope without budgets is not
+# limited. When both apply the longer wait wins.
+def check(request, scope):
+    budgets = settings.RATE_LIMITS.get(scope)
+    if not budgets:
+        return 0.0
+
+    store = get_store()
+    wait = 0.0
+    if "user" in budgets and request.user.is_authenticated:
+        wait = store.take(f"{scope}:user:{request.user.pk}", *parse_rate(budgets["user"]))
+    if "ip" in budgets:
+        wait = max(wait, store.take(f"{scope}:ip:{client_ip(request)}", *parse_rate(budgets["ip"])))
+    if wait:
+        throttled[scope] += 1
+    return wait
@@ -0,0 +1,193 @@
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from Home import catalogue
+from Home.models import LiveSession, SessionAttendance
+
+# NumPy and SciPy are optional: only manage.py build_recommendations needs
+# them. Serving reads the built file with the standard library alone.
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - depends on the environment
+    np = sparse = None
+
+NEIGHBOURS = 50   # Similar hosts kept per host
+MIN_COMMON = 2    # Learners two hosts must share before they count as similar
+HISTORY = 50      # Latest attendances a feed is built from
+FEED_SIZE = 12
+PER_HOST = 2      # Sessions per recommended host, so one host cannot fill the feed
+
+MAGIC = b"CLRECS01"
+HEADER = struct.Struct("<8sII")  # magic, hosts, neighbour pairs
+
+
+# ==========================================================
+# OFFLINE BUILD (NumPy / SciPy)
+# ----------------------------------------------------------
+# Sessions happen once, so items are hosts: two hosts are
+# similar when the same learners join both of their sessions.
+# Learner x host attendance counts (log-damped) give a sparse
+# matrix X; cosine similarity of its columns is X'X scaled by
+# the column norms, keeping pairs with at least MIN_COMMON
+# shared learners and each host's top NEIGHBOURS.
+# ==========================================================
+def build(learner_ids, host_ids, neighbours=NEIGHBOURS, min_common=MIN_COMMON):
+    # One (learner, host) per attendance, as two parallel integer sequences.
+    # Returns the arrays write() stores.
+    if np is None:
+        raise RuntimeError("Building recommendations needs NumPy and SciPy (pip install numpy scipy).")
+
+    _, rows = np.unique(np.asarray(learner_ids, dtype=np.int64), return_inverse=True)
+    hosts, columns = np.unique(np.asarray(host_ids, dtype=np.int64), return_inverse=True)
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(rows.max(initial=-1) + 1, len(hosts)),
+    )  # Duplicate (learner, host) entries are summed
+    shared = (counts > 0).astype(np.float32)
+    shared = (shared.T @ shared).tocsr()
+
+    weights = counts.copy()
+    weights.data = np.log1p(weights.data)
+    norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=0)).ravel())
+    scale = sparse.diags(1 / np.where(norms > 0, norms, 1))
+    similarity = (scale @ (weights.T @ weights) @ scale).multiply(shared >= min_common).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    indptr, indices, data = [0], [], []
+    for row in range(len(hosts)):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        cols, values = similarity.indices[start:end], similarity.data[start:end]
+        if len(values) > neighbours:
+            keep = np.argpartition(-values, neighbours)[:neighbours]
+            cols, values = cols[keep], values[keep]
+        order = np.argsort(-values, kind="stable")
+        indices.append(cols[order])
+        data.append(values[order])
+        indptr.append(indptr[-1] + len(order))
+
+    return (
+        hosts.astype("<i8"),
+        np.array(indptr, dtype="<u4"),
+        np.concatenate([np.zeros(0, np.int32), *indices]).astype("<u4"),
+        np.concatenate([np.zeros(0, np.float32), *data]).astype("<f4"),
+    )
+
+
+def write(path, hosts, indptr, neighbours, weights):
+    # Written next to the target and renamed over it: servers that still
+    # map the old file keep reading it until they notice the new one.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(hosts), len(neighbours)))
+        for array in (hosts, indptr, neighbours, weights):
+            f.write(array.tobytes())
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+# ==========================================================
+# SERVING (memory-mapped, no NumPy needed)
+# ----------------------------------------------------------
+# The file is mapped read-only and its arrays viewed in place:
+# a lookup is a binary search over the sorted host ids plus a
+# walk over at most NEIGHBOURS entries per history host, with
+# pages shared between every worker process on the machine.
+# ==========================================================
+class SimilarityIndex:
+    def __init__(self, path):
+        if sys.byteorder != "little":  # pragma: no cover - the file is little-endian
+            raise RuntimeError("Recommendation files are little-endian.")
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, pairs = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a recommendations file.")
+
+        view, offset = memoryview(self.map), HEADER.size
+        arrays = []
+        for code, length in (("q", count), ("I", count + 1), ("I", pairs), ("f", pairs)):
+            size = struct.calcsize(code) * length
+            arrays.append(view[offset:offset + size].cast(code))
+            offset += size
+        self.hosts, self.indptr, self.neighbours, self.weights = arrays
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def similar(self, history):
+        # history: {host_id: times attended} -> {host_id: score}
+        scores = defaultdict(float)
+        hosts, indptr, neighbours, weights = self.hosts, self.indptr, self.neighbours, self.weights
+        for host_id, times in history.items():
+            row = bisect_left(hosts, host_id)
+            if row == len(hosts) or hosts[row] != host_id:
+                continue
+            for i in range(indptr[row], indptr[row + 1]):
+                scores[hosts[neighbours[i]]] += times * weights[i]
+        return scores
+
+
+_loaded = {}
+
+
+def get_index():
+    # Remapped when the file is replaced; None until it has been built.
+    path = settings.RECOMMENDATIONS_FILE
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = _loaded[path] = (stamp, SimilarityIndex(path))
+    return cached[1]
+
+
+def history(user):
+    return Counter(
+        SessionAttendance.objects.filter(attendee=user)
+                                 .order_by("-id")
+                                 .values_list("session__host_id", flat=True)[:HISTORY]
+    )
+
+
+def recommended_hosts(index, user_id, history, limit=NEIGHBOURS):
+    scores = index.similar(history)
+    scores.pop(user_id, None)
+    return sorted(scores, key=lambda host_id: (-scores[host_id], host_id))[:limit]
+
+
+def feed(user, size=FEED_SIZE, now=None):
+    # Upcoming sessions from the hosts most similar to the ones `user`
+    # learns from, best match first; [] before the first build.
+    index = get_index()
+    if index is None:
+        return []
+    hosts = recommended_hosts(index, user.pk, history(user))
+    if not hosts:
+        return []
+
+    joined = SessionAttendance.objects.filter(attendee=user).values("session_id")
+    sessions = catalogue.annotate_attendees(
+        LiveSession.objects.filter(host_id__in=hosts, is_cancelled=False, scheduled_at__gte=now or timezone.now())
+                           .exclude(pk__in=joined)
+                           .select_related("host")
+                           .annotate(nth=Window(RowNumber(), partition_by=F("host_id"),
+                                                order_by=[F("scheduled_at"), F("id")]))
+    ).filter(nth__lte=PER_HOST)
+    rank = {host_id: n for n, host_id in enumerate(hosts)}
+    return sorted(sessions, key=lambda s: (rank[s.host_id], s.scheduled_at, s.id))[:size]
@@ -0,0 +1,87 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from Home.models import CreditTransaction, DailyCreditRollup, LiveSession, SessionAttendance
+
+REBUILD_DAYS = 31  # Days aggregated per pass, bounding memory on long ranges
+
+
+# ==========================================================
+# REBUILD (recompute rollups for a date range from raw rows)
+# ==========================================================
+def _between(field, start, end):
+    lookups = {}
+    if start:
+        lookups[f"{field}__gte"] = timezone.make_aware(datetime.combine(start, time.min))
+    if end:
+        lookups[f"{field}__lt"] = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    return lookups
+
+
+def _deltas(start, end):
+    ledger = (
+        CreditTransaction.objects.filter(**_between("created_at", start, end))
+                                 .annotate(day=TruncDate("created_at"))
+                                 .values("user_id", "day")
+                                 .annotate(earned=Sum("amount", filter=~Q(kind=CreditTransaction.SPENT)),
+                                           spent=Sum("amount", filter=Q(kind=CreditTransaction.SPENT)))
+                                 .order_by()
+    )
+    for row in ledger:
+        yield row["user_id"], row["day"], row["earned"] or 0, row["spent"] or 0, 0, 0
+
+    hosted = (
+        LiveSession.objects.filter(**_between("created_at", start, end))
+                           .annotate(day=TruncDate("created_at"))
+                           .values("host_id", "day")
+                           .annotate(n=Count("id"))
+                           .order_by()
+    )
+    for row in hosted:
+        yield row["host_id"], row["day"], 0, 0, row["n"], 0
+
+    joined = (
+        SessionAttendance.objects.filter(**_between("joined_at", start, end))
+                                 .annotate(day=TruncDate("joined_at"))
+                                 .values("attendee_id", "day")
+                                 .annotate(n=Count("id"))
+                                 .order_by()
+    )
+    for row in joined:
+        yield row["attendee_id"], row["day"], 0, 0, 0, row["n"]
+
+
+def _first_day():
+    firsts = [
+        model.objects.order_by(field).values_list(field, flat=True).first()
+        for model, field in ((CreditTransaction, "created_at"), (LiveSession, "created_at"),
+                             (SessionAttendance, "joined_at"))
+    ]
+    firsts = [timezone.localdate(f) for f in firsts if f]
+    return min(firsts) if firsts else None
+
+
+def rebuild(start=None, end=None):
+    # Without a start date every rollup up to `end` is rebuilt.
+    end = end or timezone.localdate()
+
+    with transaction.atomic():
+        stale = DailyCreditRollup.objects.filter(day__lte=end)
+        if start:
+            stale = stale.filter(day__gte=start)
+        else:
+            start = _first_day()
+        stale.delete()
+        if start is None:
+            return 0
+
+        window = start
+        while window <= end:
+            window_end = min(window + timedelta(days=REBUILD_DAYS - 1), end)
+            DailyCreditRollup.objects.add(_deltas(window, window_end))
+            window = window_end + timedelta(days=1)
+        return DailyCreditRollup.objects.filter(day__gte=start, day__lte=end).count()
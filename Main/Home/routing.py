@@ -0,0 +1,96 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+PRIMARY = DEFAULT_DB_ALIAS
+PIN_COOKIE = "primary_until"
+WRITES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+# Per-request routing state; None outside requests (management
+# commands, background jobs), which always use the primary.
+current = ContextVar("replica_routing", default=None)
+
+
+class RoutingState:
+    __slots__ = ("pinned", "wrote", "replica")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned    # Reads go to the primary for the rest of the request
+        self.wrote = False      # The request wrote: pin its follow-up requests too
+        self.replica = None     # One replica per request, so its reads agree
+
+
+# ==========================================================
+# PRIMARY / REPLICA ROUTER
+# ----------------------------------------------------------
+# Writes always go to the primary. A request's reads go to one
+# of settings.REPLICA_DATABASES unless the request is pinned:
+# it has written, it is not a safe method, or the browser wrote
+# within the last REPLICA_PIN_SECONDS (a cookie, see the
+# middleware). Reads inside a primary transaction stay on the
+# primary so they see the transaction's own rows.
+# ==========================================================
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = current.get()
+        replicas = settings.REPLICA_DATABASES
+        if state is None or state.pinned or not replicas or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        if state.replica is None:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema through replication.
+        return db not in settings.REPLICA_DATABASES
+
+
+@contextmanager
+def primary_reads():
+    # Read from the primary for the duration, e.g. to fill a cache that
+    # must not store rows a lagging replica has not caught up with. The
+    # pin is set on a copy, so concurrent tasks of the request keep theirs.
+    state = current.get()
+    if state is None or state.pinned:
+        yield
+        return
+    pinned = RoutingState(pinned=True)
+    token = current.set(pinned)
+    try:
+        yield
+    finally:
+        current.reset(token)
+        if pinned.wrote:
+            state.pinned = state.wrote = True
+
+
+# ==========================================================
+# WRITE DETECTION (an execute wrapper on primary connections)
+# ----------------------------------------------------------
+# Any data-changing statement pins the request, whichever API
+# issued it: save(), update(), bulk_create or raw upserts.
+# ==========================================================
+def watch_writes(execute, sql, params, many, context):
+    state = current.get()
+    if state is not None and not state.wrote and sql.lstrip()[:7].upper().startswith(WRITES):
+        state.pinned = state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def install_write_watch(connection, **kwargs):
+    if connection.alias == PRIMARY and watch_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(watch_writes)
+
+
+connection_created.connect(install_write_watch)
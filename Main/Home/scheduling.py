@@ -0,0 +1,251 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from Home import availability, jobs
+from Home.caching import invalidate_wallet
+from Home.models import MAX_DURATION_MINUTES, DailyCreditRollup, LiveSession, SessionSeries
+
+HOST_REWARD = 10          # Credits a host earns per attended session, at settlement
+BATCH_SIZE = 1000         # Rows per INSERT during imports
+MAX_OCCURRENCES = 366     # Upper bound for one recurring series
+MAX_HORIZON_DAYS = 2 * 366  # ... and for how far past its first session it runs
+MAX_ERRORS = 50           # Stop collecting import errors after this many
+
+CATEGORIES = {value for value, _ in LiveSession.CATEGORY_CHOICES}
+
+
+class ScheduleError(ValueError):
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("; ".join(self.errors))
+
+
+# ==========================================================
+# RECURRENCE (RRULE-like: daily / weekly, interval, weekdays,
+# ending at an inclusive date or after a number of sessions)
+# ----------------------------------------------------------
+# Steps in local wall-clock time, so a weekly 18:00 session
+# stays at 18:00 across DST changes.
+# ==========================================================
+def occurrences(start, frequency, interval=1, count=None, until=None, weekdays=None):
+    if frequency not in (SessionSeries.DAILY, SessionSeries.WEEKLY):
+        raise ScheduleError([f"Unknown frequency: {frequency!r}"])
+    if interval < 1:
+        raise ScheduleError(["The interval must be at least 1."])
+    if count is None and until is None:
+        raise ScheduleError(["A series needs an end date or a number of sessions."])
+    if weekdays and not set(weekdays) <= set(range(7)):
+        raise ScheduleError(["Weekdays go from 0 (Monday) to 6 (Sunday)."])
+
+    first = timezone.localtime(start).replace(tzinfo=None)
+    horizon = first + timedelta(days=MAX_HORIZON_DAYS)
+    if until is not None and until > horizon.date():
+        raise ScheduleError([f"A series can run for at most {MAX_HORIZON_DAYS} days."])
+    first_monday = (first - timedelta(days=first.weekday())).date()
+    weekdays = set(weekdays) if weekdays else {first.weekday()}
+    limit = min(count or MAX_OCCURRENCES, MAX_OCCURRENCES)
+
+    day, produced = first, 0
+    while produced < limit and (until is None or day.date() <= until):
+        if day > horizon:
+            raise ScheduleError([f"{limit} sessions do not fit in {MAX_HORIZON_DAYS} days; "
+                                 f"lower the count or the interval."])
+        if frequency == SessionSeries.DAILY:
+            due = (day - first).days % interval == 0
+        else:
+            week = (day.date() - first_monday).days // 7
+            due = week % interval == 0 and day.weekday() in weekdays
+        if due:
+            produced += 1
+            yield timezone.make_aware(day)
+        day += timedelta(days=1)
+
+
+# ==========================================================
+# CREATE (bulk insert; hosts are paid at settlement)
+# ----------------------------------------------------------
+# Refused as a whole if any session overlaps another one the
+# host hosts or attends, or another in the same batch.
+# ==========================================================
+def _create(host, sessions):
+    clashes = availability.conflicts(host, sessions)
+    if clashes:
+        raise ScheduleError([
+            f"{session.title} on {timezone.localtime(session.scheduled_at):%b %d, %Y at %H:%M} "
+            f"overlaps {other.title}."
+            for session, other in clashes[:MAX_ERRORS]
+        ])
+    LiveSession.objects.bulk_create(sessions)
+    # bulk_create sends no post_save: invalidate and roll up by hand.
+    invalidate_wallet(host.pk)
+    DailyCreditRollup.objects.record_hosted(sessions)
+    # Settle each session as it ends; end times are rounded up to the
+    # minute so sessions ending together share a job.
+    jobs.enqueue_at("settle_sessions", {_next_minute(s.ends_at) for s in sessions})
+    return sessions
+
+
+def _next_minute(when):
+    minute = when.replace(second=0, microsecond=0)
+    return minute if minute == when else minute + timedelta(minutes=1)
+
+
+def create_session(host, title, scheduled_at, **fields):
+    with transaction.atomic():
+        [session] = _create(host, [
+            LiveSession(host=host, title=title, scheduled_at=scheduled_at, credit_reward=HOST_REWARD, **fields)
+        ])
+    return session
+
+
+def create_series(host, title, start, frequency, interval=1, count=None, until=None,
+                  weekdays=None, **fields):
+    dates = list(occurrences(start, frequency, interval, count, until, weekdays))
+    if not dates:
+        raise ScheduleError(["The series has no sessions before its end date."])
+
+    with transaction.atomic():
+        series = SessionSeries.objects.create(
+            host=host,
+            title=title,
+            frequency=frequency,
+            interval=interval,
+            weekdays=",".join(str(d) for d in sorted(weekdays or [])),
+            starts_at=start,
+            until=until,
+            count=count,
+        )
+        sessions = _create(host, [
+            LiveSession(host=host, title=title, scheduled_at=when, series=series,
+                        credit_reward=HOST_REWARD, **fields)
+            for when in dates
+        ])
+    return series, sessions
+
+
+# ==========================================================
+# IMPORT (CSV / JSON / JSON Lines term schedules)
+# ----------------------------------------------------------
+# Rows are validated one at a time as they are read and
+# inserted in batches, all inside one transaction: any bad
+# row rolls the whole import back and every error (up to
+# MAX_ERRORS) is reported with its row number.
+# ==========================================================
+def _readable(rows):
+    # Undecodable bytes or a broken JSON line surface while iterating.
+    number = 0
+    try:
+        for number, row in enumerate(rows, start=1):
+            yield row
+    except ValueError as exc:
+        raise ScheduleError([f"Row {number + 1}: unreadable ({exc})"])
+
+
+def read_rows(stream, name):
+    suffix = Path(name).suffix.lower()
+    if suffix == ".csv":
+        return _readable(csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")))
+    if suffix in (".jsonl", ".ndjson"):
+        text = io.TextIOWrapper(stream, encoding="utf-8")
+        return _readable(json.loads(line) for line in text if line.strip())
+    if suffix == ".json":
+        try:
+            rows = json.load(stream)
+        except ValueError as exc:
+            raise ScheduleError([f"Invalid JSON: {exc}"])
+        if not isinstance(rows, list):
+            raise ScheduleError(["A JSON schedule must be a list of sessions."])
+        return rows
+    raise ScheduleError([f"Unsupported file type {suffix or name!r}: use .csv, .json or .jsonl."])
+
+
+def _positive_int(value, name, default, maximum=None):
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a whole number")
+    if number < 1:
+        raise ValueError(f"{name} must be at least 1")
+    if maximum is not None and number > maximum:
+        raise ValueError(f"{name} must be at most {maximum}")
+    return number
+
+
+def parse_when(value, name="schedule"):
+    # ISO 8601; naive values are taken in the current time zone.
+    raw = str(value or "").strip()
+    try:
+        when = parse_datetime(raw)
+    except ValueError:
+        when = None
+    if when is None:
+        raise ValueError(f"{name} {raw!r} is not a date and time")
+    return timezone.make_aware(when) if timezone.is_naive(when) else when
+
+
+def session_from_row(host, row, now=None):
+    if not isinstance(row, dict):
+        raise ValueError("expected an object with session fields")
+
+    title = str(row.get("title") or "").strip()
+    if not title:
+        raise ValueError("title is required")
+    if len(title) > 255:
+        raise ValueError("title is longer than 255 characters")
+
+    when = parse_when(row.get("scheduled_at"), "scheduled_at")
+    if when < (now or timezone.now()):
+        raise ValueError("scheduled_at is in the past")
+
+    category = str(row.get("category") or "").strip().lower()
+    if category and category not in CATEGORIES:
+        raise ValueError(f"unknown category {category!r}")
+
+    return LiveSession(
+        host=host,
+        title=title,
+        description=str(row.get("description") or "").strip(),
+        category=category,
+        scheduled_at=when,
+        duration_minutes=_positive_int(row.get("duration_minutes"), "duration_minutes", 60, MAX_DURATION_MINUTES),
+        max_attendees=_positive_int(row.get("max_attendees"), "max_attendees", None),
+        credit_reward=HOST_REWARD,
+    )
+
+
+def import_sessions(host, rows, batch_size=BATCH_SIZE):
+    now = timezone.now()
+    errors, batch, created = [], [], 0
+
+    with transaction.atomic():
+        for number, row in enumerate(rows, start=1):
+            try:
+                session = session_from_row(host, row, now)
+            except ValueError as exc:
+                errors.append(f"Row {number}: {exc}")
+                if len(errors) >= MAX_ERRORS:
+                    break
+                continue
+            if errors:
+                continue  # Nothing will be kept; only validate the rest.
+
+            batch.append(session)
+            if len(batch) == batch_size:
+                created += len(_create(host, batch))
+                batch = []
+
+        if errors:
+            raise ScheduleError(errors)
+        if batch:
+            created += len(_create(host, batch))
+
+    return created
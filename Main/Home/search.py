@@ -0,0 +1,130 @@
+import re
+
+from django.db import connection
+from django.db.models import Count, Q
+
+from Home import catalogue
+from Home.models import LiveSession
+
+# Every match that passes the filters is ranked before a page is cut, so the
+# best match is on page one however old it is. bm25 is computed per match:
+# ~150ms for the 60k matches of a common word at 500k sessions, rarer words
+# much less. Facets count every match without bm25 (~100ms for the most
+# common word at 500k).
+RESULTS_PAGE_SIZE = 20
+
+# External-content FTS5 index over LiveSession.title / description, created
+# by migration 0006 and kept in sync by triggers (so bulk_create and
+# queryset.update() are covered too). Title matches weigh 10x.
+FTS_TABLE = "Home_livesession_fts"
+
+def fts_available():
+    return connection.vendor == "sqlite"
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f"""INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES ('rebuild')""")
+
+
+# ==========================================================
+# QUERY PARSING
+# ----------------------------------------------------------
+# User input never reaches MATCH as syntax: every word is
+# quoted, and the last one is a prefix so "pyth" finds Python.
+# ==========================================================
+def match_expression(query):
+    words = re.findall(r"\w+", query or "")
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+
+def _filters(category=None, start=None, end=None):
+    clauses = ['s."is_cancelled" = %s']
+    params = [False]
+    if category:
+        clauses.append('s."category" = %s')
+        params.append(category)
+    if start:
+        clauses.append('s."scheduled_at" >= %s')
+        params.append(connection.ops.adapt_datetimefield_value(start))
+    if end:
+        clauses.append('s."scheduled_at" < %s')
+        params.append(connection.ops.adapt_datetimefield_value(end))
+    return " AND ".join(clauses), params
+
+
+# ==========================================================
+# SEARCH (ranked ids from FTS5, then one ORM query for rows)
+# ==========================================================
+def _ranked(match, where):
+    return f'''SELECT s."id"
+               FROM "{FTS_TABLE}" f
+               JOIN "Home_livesession" s ON s."id" = f.rowid
+               WHERE f."{FTS_TABLE}" MATCH %s AND {where}
+               ORDER BY f.rank, s."id"
+               LIMIT %s OFFSET %s'''
+
+
+def search(query, category=None, start=None, end=None, limit=RESULTS_PAGE_SIZE, offset=0):
+    if not fts_available():
+        return search_icontains(query, category, start, end)[offset:offset + limit]
+
+    match = match_expression(query)
+    if not match:
+        return []
+
+    where, params = _filters(category, start, end)
+    with connection.cursor() as cursor:
+        cursor.execute(_ranked(match, where), [match, *params, limit, offset])
+        ids = [row[0] for row in cursor.fetchall()]
+
+    rows = catalogue.annotate_attendees(
+        LiveSession.objects.select_related("host")
+    ).in_bulk(ids)
+    return [rows[i] for i in ids if i in rows]
+
+
+def facets(query, start=None, end=None):
+    if not fts_available():
+        counts = _icontains(query, None, start, end).values_list("category").annotate(n=Count("id"))
+        return dict(counts.order_by())
+
+    match = match_expression(query)
+    if not match:
+        return {}
+
+    where, params = _filters(None, start, end)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''SELECT s."category", COUNT(*)
+                FROM "{FTS_TABLE}" f
+                JOIN "Home_livesession" s ON s."id" = f.rowid
+                WHERE f."{FTS_TABLE}" MATCH %s AND {where}
+                GROUP BY s."category"''',
+            [match, *params],
+        )
+        return dict(cursor.fetchall())
+
+
+# ==========================================================
+# FALLBACK (and the benchmark baseline): icontains scans
+# ==========================================================
+def _icontains(query, category=None, start=None, end=None):
+    sessions = LiveSession.objects.filter(is_cancelled=False)
+    for word in re.findall(r"\w+", query or ""):
+        sessions = sessions.filter(Q(title__icontains=word) | Q(description__icontains=word))
+    if category:
+        sessions = sessions.filter(category=category)
+    if start:
+        sessions = sessions.filter(scheduled_at__gte=start)
+    if end:
+        sessions = sessions.filter(scheduled_at__lt=end)
+    return sessions
+
+
+def search_icontains(query, category=None, start=None, end=None):
+    sessions = _icontains(query, category, start, end).select_related("host").order_by("scheduled_at", "id")
+    return catalogue.annotate_attendees(sessions)
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from Home import ledger
+from Home.models import CreditTransaction, LiveSession, SessionAttendance
+
+BATCH_SIZE = 500          # Sessions settled per transaction
+MIN_ATTENDEES = 1         # A host is paid only if at least this many people joined
+
+
+# ==========================================================
+# SETTLEMENT (pay hosts once a session is over)
+# ----------------------------------------------------------
+# Hosts earn credit_reward when a session ends with at least
+# MIN_ATTENDEES attendees; sessions nobody joined pay nothing.
+# Cancelled sessions pay the host nothing and refund every
+# attendee's credit_cost, without waiting for the end time.
+#
+# Sessions are walked in id order off the session_unsettled
+# partial index, BATCH_SIZE at a time, each batch in its own
+# transaction: a handful of queries per batch, one
+# UPDATE ... CASE for all the balances, and memory bounded by
+# the batch no matter how many sessions are due.
+# ==========================================================
+def _settle_batch(sessions, now, totals):
+    cancelled = [s for s in sessions if s.is_cancelled]
+    held = [s for s in sessions if not s.is_cancelled]
+
+    attendance = dict(
+        SessionAttendance.objects.filter(session__in=held)
+                                 .values("session_id")
+                                 .annotate(n=Count("id"))
+                                 .values_list("session_id", "n")
+    )
+    entries = [
+        (s.host_id, CreditTransaction.EARNED, s.credit_reward, s.title, s.pk)
+        for s in held
+        if attendance.get(s.pk, 0) >= MIN_ATTENDEES and s.credit_reward > 0
+    ]
+    hosts_paid = len(entries)
+
+    titles = {s.pk: s.title for s in cancelled}
+    entries += [
+        (attendee_id, CreditTransaction.REFUNDED, cost, f"Refund: {titles[session_id]}", session_id)
+        for attendee_id, session_id, cost in SessionAttendance.objects.filter(session__in=cancelled, credit_cost__gt=0)
+                                                                      .order_by("id")
+                                                                      .values_list("attendee_id", "session_id", "credit_cost")
+    ]
+
+    ledger.credit_many(entries, now)
+    LiveSession.objects.filter(pk__in=[s.pk for s in sessions]).update(settled_at=now)
+
+    totals["sessions"] += len(sessions)
+    totals["hosts_paid"] += hosts_paid
+    totals["credits_paid"] += sum(e[2] for e in entries[:hosts_paid])
+    totals["refunds"] += len(entries) - hosts_paid
+    totals["credits_refunded"] += sum(e[2] for e in entries[hosts_paid:])
+
+
+def settle(now=None, batch_size=BATCH_SIZE):
+    now = now or timezone.now()
+    totals = dict.fromkeys(("sessions", "hosts_paid", "credits_paid", "refunds", "credits_refunded"), 0)
+    due = LiveSession.objects.filter(Q(ends_at__lte=now) | Q(is_cancelled=True), settled_at__isnull=True)
+    after = 0
+
+    while True:
+        with transaction.atomic():
+            # skip_locked: a second settler running at the same time takes
+            # other sessions instead of paying these twice.
+            batch = list(
+                due.select_for_update(skip_locked=True)
+                   .filter(pk__gt=after)
+                   .order_by("id")
+                   .only("id", "host_id", "title", "credit_reward", "is_cancelled")[:batch_size]
+            )
+            if not batch:
+                return totals
+            after = batch[-1].pk
+            _settle_batch(batch, now, totals)
@@ -0,0 +1,130 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from Home import ledger, presence
+from Home.caching import invalidate_wallet
+from Home.models import (
+    CreditTransaction, DailyCreditRollup, LeaderboardEntry, LiveSession, Profile, SessionAttendance,
+)
+
+
+# ==========================================================
+# AUTO CREATE PROFILE WHEN USER IS CREATED
+# ----------------------------------------------------------
+# The only profile hook: the profile and its signup credits
+# when a user is created, nothing on later saves (login only
+# touches last_login).
+# bulk_create skips signals, so provision_users creates its
+# profiles itself.
+# ==========================================================
+@receiver(post_save, sender=User)
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.create(user=instance)
+        ledger.grant_signup([instance])
+
+
+# ==========================================================
+# LIVE ATTENDANCE (pushed to WebSocket subscribers)
+# ----------------------------------------------------------
+# Sent once the transaction commits, so a rolled-back join is
+# never announced. join_many uses bulk_create and announces
+# its own batch.
+# ==========================================================
+@receiver(post_save, sender=SessionAttendance)
+def announce_attendance(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        username = instance.attendee.username
+        transaction.on_commit(lambda: presence.attendees_changed(instance.session_id, joined=[username]))
+
+
+@receiver(post_delete, sender=SessionAttendance)
+def announce_departure(sender, instance, **kwargs):
+    # No per-row user lookup when a whole session is deleted.
+    cached = SessionAttendance.attendee.is_cached(instance)
+    username = instance.attendee.username if cached else None
+    transaction.on_commit(lambda: presence.attendees_changed(instance.session_id, left=[username]))
+
+
+# ==========================================================
+# WALLET CACHE INVALIDATION
+# ==========================================================
+@receiver(post_save, sender=LiveSession)
+def invalidate_session_wallets(sender, instance, created, **kwargs):
+    # Existing attendees list the session in their wallet too.
+    attendee_ids = [] if created else list(instance.attendances.values_list("attendee_id", flat=True))
+    invalidate_wallet(instance.host_id, *attendee_ids)
+
+
+@receiver(post_delete, sender=LiveSession)
+def invalidate_deleted_session_wallet(sender, instance, **kwargs):
+    # The cascaded attendance rows send their own post_delete.
+    invalidate_wallet(instance.host_id)
+
+
+@receiver(post_save, sender=SessionAttendance)
+@receiver(post_delete, sender=SessionAttendance)
+def invalidate_attendance_wallet(sender, instance, **kwargs):
+    invalidate_wallet(instance.attendee_id)
+
+
+@receiver(post_save, sender=CreditTransaction)
+def invalidate_ledger_wallet(sender, instance, **kwargs):
+    invalidate_wallet(instance.user_id)
+
+
+# ==========================================================
+# ROLLUP MAINTENANCE (bulk_create paths call the manager directly)
+# ==========================================================
+@receiver(post_save, sender=CreditTransaction)
+def roll_up_ledger_entry(sender, instance, created, **kwargs):
+    if created:
+        DailyCreditRollup.objects.record_ledger([instance])
+
+
+@receiver(post_save, sender=LiveSession)
+def roll_up_hosted_session(sender, instance, created, **kwargs):
+    if created:
+        DailyCreditRollup.objects.record_hosted([instance])
+
+
+@receiver(post_save, sender=SessionAttendance)
+def roll_up_attendance(sender, instance, created, **kwargs):
+    if created:
+        DailyCreditRollup.objects.record_joined([instance])
+
+
+def _take_back(user_id, day, counter):
+    # Undo one event in the user's leaderboard rows for `day`.
+    windows = Q()
+    for period, _ in LeaderboardEntry.PERIOD_CHOICES:
+        windows |= Q(period=period, starts_on=LeaderboardEntry.period_start(period, day))
+    LeaderboardEntry.objects.filter(windows, user_id=user_id, **{f"{counter}__gt": 0}).update(
+        **{counter: F(counter) - 1}
+    )
+
+
+@receiver(post_delete, sender=LiveSession)
+def roll_back_hosted_session(sender, instance, **kwargs):
+    day = timezone.localdate(instance.created_at)
+    DailyCreditRollup.objects.filter(
+        user_id=instance.host_id, day=day, sessions_hosted__gt=0,
+    ).update(sessions_hosted=F("sessions_hosted") - 1)
+    _take_back(instance.host_id, day, "sessions_hosted")
+
+
+@receiver(post_delete, sender=SessionAttendance)
+def roll_back_attendance(sender, instance, **kwargs):
+    day = timezone.localdate(instance.joined_at)
+    DailyCreditRollup.objects.filter(
+        user_id=instance.attendee_id, day=day, sessions_joined__gt=0,
+    ).update(sessions_joined=F("sessions_joined") - 1)
+    _take_back(instance.attendee_id, day, "sessions_joined")
+    # Cascades delete attendances before their session, so the host is still there.
+    host_id = LiveSession.objects.filter(pk=instance.session_id).values_list("host_id", flat=True).first()
+    if host_id:
+        _take_back(host_id, day, "attendees")
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import re
+from contextlib import suppress
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib import auth
+from django.http.cookie import parse_cookie
+
+from Home import presence
+from Home.models import LiveSession, SessionAttendance
+
+CATALOGUE_PATH = re.compile(r"^/ws/sessions/$")
+SESSION_PATH = re.compile(r"^/ws/sessions/(?P<session_id>\d+)/$")
+
+# Close codes (4000-4999 are application defined).
+FORBIDDEN = 4403
+NOT_FOUND = 4404
+
+
+# ==========================================================
+# HANDSHAKE HELPERS
+# ==========================================================
+def _headers(scope):
+    return {name.decode("latin-1"): value.decode("latin-1") for name, value in scope.get("headers", ())}
+
+
+def _same_origin(headers):
+    # Browsers always send Origin on WebSockets; refusing foreign ones keeps
+    # other sites from opening sockets with our users' cookies.
+    origin = headers.get("origin")
+    if origin is None:
+        return True
+    if origin in getattr(settings, "CSRF_TRUSTED_ORIGINS", ()):
+        return True
+    return urlsplit(origin).netloc == headers.get("host")
+
+
+async def _user(headers):
+    cookies = parse_cookie(headers.get("cookie", ""))
+    engine = import_module(settings.SESSION_ENGINE)
+    request = SimpleNamespace(session=engine.SessionStore(cookies.get(settings.SESSION_COOKIE_NAME)))
+    return await auth.aget_user(request)
+
+
+async def _send_json(send, message):
+    await send({"type": "websocket.send", "text": json.dumps(message)})
+
+
+# ==========================================================
+# CONNECTION LOOP
+# ----------------------------------------------------------
+# One task forwards hub messages to the client while this
+# coroutine waits for the disconnect. A "resync" from the
+# hub (the client fell behind) is answered with a snapshot
+# where the channel has one.
+# ==========================================================
+async def _forward(send, subscription, snapshot):
+    while True:
+        message = await subscription.get()
+        if message is presence.RESYNC and snapshot:
+            message = await snapshot()
+        await _send_json(send, message)
+
+
+async def _serve(receive, send, subscription, snapshot):
+    await send({"type": "websocket.accept"})
+    if snapshot:
+        await _send_json(send, await snapshot())
+    forwarder = asyncio.create_task(_forward(send, subscription, snapshot))
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            # Clients only listen; anything they send is ignored.
+    finally:
+        forwarder.cancel()
+        with suppress(asyncio.CancelledError, OSError):
+            await forwarder
+
+
+async def _catalogue(receive, send):
+    backend = presence.get_backend()
+    subscription = backend.subscribe(presence.CATALOGUE)
+    try:
+        # Counts are already on the page; a lagging client gets the
+        # "resync" itself and reloads them.
+        await _serve(receive, send, subscription, None)
+    finally:
+        backend.unsubscribe(subscription)
+
+
+async def _session(receive, send, headers, session_id):
+    user = await _user(headers)
+    if not user.is_authenticated:
+        return await send({"type": "websocket.close", "code": FORBIDDEN})
+
+    session = await LiveSession.objects.filter(pk=session_id, is_cancelled=False).only("id", "host_id").afirst()
+    if session is None:
+        return await send({"type": "websocket.close", "code": NOT_FOUND})
+
+    # Host and enrolled attendees show up as present; anyone else may watch.
+    member = session.host_id == user.pk or await SessionAttendance.objects.filter(
+        session_id=session_id, attendee=user,
+    ).aexists()
+
+    backend = presence.get_backend()
+    channel = presence.session_channel(session_id)
+
+    async def snapshot():
+        return {
+            "type": "snapshot",
+            "session": session_id,
+            "attendees": await SessionAttendance.objects.filter(session_id=session_id).acount(),
+            "online": backend.members(channel),
+        }
+
+    # Announced before subscribing: the snapshot already lists this user.
+    if member and backend.enter(channel, user.username):
+        presence.presence_changed(session_id, "join", user.username)
+    subscription = backend.subscribe(channel)
+    try:
+        await _serve(receive, send, subscription, snapshot)
+    finally:
+        backend.unsubscribe(subscription)
+        if member and backend.leave(channel, user.username):
+            presence.presence_changed(session_id, "leave", user.username)
+
+
+# ==========================================================
+# ASGI ENTRY POINT (routed from Main/asgi.py)
+# ----------------------------------------------------------
+#   /ws/sessions/        attendee-count deltas for every session
+#   /ws/sessions/<id>/   snapshot, then attendee and presence
+#                        deltas for one session (login required)
+# ==========================================================
+async def application(scope, receive, send):
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+
+    headers = _headers(scope)
+    if not _same_origin(headers):
+        return await send({"type": "websocket.close", "code": FORBIDDEN})
+
+    path = scope["path"]
+    if CATALOGUE_PATH.match(path):
+        return await _catalogue(receive, send)
+    match = SESSION_PATH.match(path)
+    if match:
+        return await _session(receive, send, headers, int(match["session_id"]))
+    await send({"type": "websocket.close", "code": NOT_FOUND})
@@ -0,0 +1,45 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from Home import assets
+
+
+# ==========================================================
+# HASHED + COMPRESSED STATIC FILES
+# ----------------------------------------------------------
+# collectstatic writes content-hashed names (style.3f2a9c1b7d4e.css)
+# as usual, then adds resized/WebP image variants to the manifest
+# and drops .gz / .br files next to every hashed text asset.
+# ==========================================================
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def stored_name(self, name):
+        # Before the first build there is no manifest at all (fresh checkout,
+        # test runs with DEBUG off): serve the plain names instead of failing.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        for name in list(paths):
+            if not name.lower().endswith(tuple(assets.RESIZABLE)):
+                continue
+            with self.open(self.stored_name(name)) as original:
+                variants = assets.image_variants(name, original.read())
+            for variant, data in variants.items():
+                content = ContentFile(data)
+                variant_hashed = self.hashed_name(variant, content)
+                if self.exists(variant_hashed):
+                    self.delete(variant_hashed)
+                self._save(variant_hashed, content)
+                self.hashed_files[self.hash_key(self.clean_name(variant))] = variant_hashed
+                yield variant, variant_hashed, True
+
+        for hashed in set(self.hashed_files.values()):
+            assets.precompress(self.path(hashed))
+
+        self.save_manifest()
@@ -0,0 +1,45 @@
+from django.core.mail import send_mail
+
+from Home import jobs, settlement
+from Home.models import SessionAttendance
+
+
+# Side effects that can wait run here. The daily rollups, leaderboard
+# counters and wallet cache tokens are not jobs on purpose: they are
+# written in the same transaction as the change they count (or, for the
+# cache, on its commit), so the wallet reflects a join or a session on the
+# next page load and rebuild_rollups / rebuild_leaderboard always agree
+# with what is stored.
+
+
+# ==========================================================
+# JOIN NOTIFICATION (enqueued by join_session)
+# ==========================================================
+@jobs.task("notify_host")
+def notify_host(attendance_id):
+    attendance = (
+        SessionAttendance.objects.select_related("session__host", "attendee")
+                                 .filter(pk=attendance_id)
+                                 .first()
+    )
+    if attendance is None or not attendance.session.host.email:
+        return
+    session = attendance.session
+    send_mail(
+        f"{attendance.attendee.username} joined {session.title}",
+        f"{attendance.attendee.username} joined your session {session.title} "
+        f"on {session.scheduled_at:%b %d, %Y at %H:%M}.",
+        None,
+        [session.host.email],
+    )
+
+
+# ==========================================================
+# SETTLEMENT (enqueued by Home/scheduling.py for each end time)
+# ----------------------------------------------------------
+# Sessions are paid as they end rather than on the next cron
+# run of settle_sessions, which stays as the catch-all.
+# ==========================================================
+@jobs.task("settle_sessions")
+def settle_sessions():
+    settlement.settle()
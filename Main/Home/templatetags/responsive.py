@@ -0,0 +1,38 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from Home.assets import IMAGE_WIDTHS, variant_name
+
+register = template.Library()
+
+
+def _built(name):
+    # Variants only exist after build_assets / collectstatic.
+    hashed_files = getattr(staticfiles_storage, "hashed_files", {})
+    return not settings.DEBUG and staticfiles_storage.hash_key(name) in hashed_files
+
+
+# ==========================================================
+# {% picture 'images/2.jpg' class="pro-img" %}
+# ----------------------------------------------------------
+# A plain <img> in development; after a build, a <picture> with
+# WebP and resized sources so phones skip the full-size JPEG.
+# ==========================================================
+@register.simple_tag
+def picture(name, sizes="(max-width: 600px) 100vw, 33vw", **attrs):
+    img_attrs = format_html_join(" ", '{}="{}"', attrs.items())
+    widths = [w for w in IMAGE_WIDTHS if _built(variant_name(name, w))]
+    if not widths:
+        return format_html('<img src="{}" {}>', static(name), img_attrs)
+
+    def srcset(ext=None):
+        return ", ".join(f"{static(variant_name(name, w, ext))} {w}w" for w in widths)
+
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" {}></picture>',
+        srcset("webp"), sizes, static(name), srcset(), sizes, img_attrs,
+    )
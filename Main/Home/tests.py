@@ -1,3 +1,1582 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import random
+import re
+import tempfile
+import threading
+from array import array
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Count, F, Q
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from benchmarks import flows, seed
+from Home import (
+    assets, availability, caching, catalogue, enrollment, exports, instrumentation, jobs, leaderboard, ledger, presence,
+    ratelimit, recommendations, routing, scheduling, search, settlement, sockets,
+)
+from Home.caching import WALLET_CACHE
+from Home import wallet as wallet_service
+from Home.exceptions import InsufficientCredits, ScheduleConflict, SessionFull, SessionUnavailable
+from Home.models import (
+    Profile, LiveSession, SessionAttendance, SessionSeries, CreditTransaction, DailyCreditRollup, Job,
+    LeaderboardEntry,
+)
+
+
+# Balances in these tests start from zero; ProfileProvisioningTests turns
+# the signup grant back on where it is under test.
+_without_signup_credits = override_settings(SIGNUP_CREDITS=0)
+
+
+def setUpModule():
+    _without_signup_credits.enable()
+
+
+def tearDownModule():
+    _without_signup_credits.disable()
+
+
+# ==========================================================
+# CREDIT LEDGER
+# ==========================================================
+class CreditLedgerTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user("host")
+        self.student = User.objects.create_user("student")
+
+    def test_host_and_join_write_ledger_and_balance(self):
+        self.client.force_login(self.host)
+        self.client.post(reverse("host_session"), {"title": "Python 101", "schedule": timezone.now()})
+        session = LiveSession.objects.get()
+
+        self.client.force_login(self.student)
+        ledger.earn(self.student, 5, "Welcome bonus")
+        self.client.get(reverse("join_session", args=[session.id]))
+        self.client.get(reverse("join_session", args=[session.id]))  # second join is a no-op
+
+        self.assertEqual(Profile.objects.get(user=self.host).credits, 0)  # paid once the session ends
+        settlement.settle(now=timezone.now() + timedelta(hours=2))
+        self.assertEqual(Profile.objects.get(user=self.host).credits, 10)
+        self.assertEqual(Profile.objects.get(user=self.student).credits, 3)
+        self.assertEqual(
+            list(CreditTransaction.objects.order_by("id").values_list("user__username", "kind", "balance_after")),
+            [("student", "earned", 5), ("student", "spent", 3), ("host", "earned", 10)],
+        )
+
+        response = self.client.get(reverse("wallet"))
+        self.assertContains(response, "-2</span>")
+
+    def test_ledger_rows_are_append_only(self):
+        tx = ledger.earn(self.host, 5, "Bonus")
+        tx.amount = 500
+        with self.assertRaises(ValueError):
+            tx.save()
+
+    def test_backfill_follows_the_settlement_rules(self):
+        now = timezone.now()
+        ledger.credit_many([(self.student.pk, CreditTransaction.GRANTED, 5, "Welcome credits", None)], now - timedelta(hours=5))
+        held = LiveSession.objects.create(host=self.host, title="Cooking", scheduled_at=now - timedelta(hours=3))
+        cancelled = LiveSession.objects.create(host=self.host, title="Knitting", scheduled_at=now, is_cancelled=True)
+        unsettled = LiveSession.objects.create(host=self.host, title="Chess", scheduled_at=now)
+        LiveSession.objects.filter(pk__in=[held.pk, cancelled.pk]).update(settled_at=now - timedelta(hours=1))
+        for session, attendee, cost, joined in ((held, self.student, 2, 3), (held, self.host, 3, 3),
+                                                (cancelled, self.student, 4, 2), (unsettled, self.student, 1, 0.5)):
+            attendance = SessionAttendance.objects.create(session=session, attendee=attendee, credit_cost=cost)
+            SessionAttendance.objects.filter(pk=attendance.pk).update(joined_at=now - timedelta(hours=joined))
+
+        call_command("backfill_ledger", "--batch-size", "1", "--sync-balances", stdout=StringIO())
+
+        # The grant is kept, the held session pays its host, the cancelled
+        # one refunds, and the unsettled one is left to settlement.
+        self.assertEqual(
+            list(CreditTransaction.objects.order_by("created_at", "id").values_list("user__username", "kind", "balance_after")),
+            [("student", "granted", 5), ("student", "spent", 3), ("host", "spent", -3), ("student", "spent", -1),
+             ("host", "earned", 7), ("student", "refunded", 3), ("student", "spent", 2)],
+        )
+        self.assertEqual(Profile.objects.get(user=self.host).credits, 7)
+        self.assertEqual(Profile.objects.get(user=self.student).credits, 2)
+
+
+# ==========================================================
+# PROFILE PROVISIONING
+# ==========================================================
+class ProfileProvisioningTests(TestCase):
+    def test_creating_a_user_inserts_one_profile(self):
+        # INSERT user + INSERT profile; nothing else.
+        with self.assertNumQueries(2):
+            user = User.objects.create_user("newcomer")
+        self.assertEqual(Profile.objects.get(user=user).credits, 0)
+
+    def test_saving_a_user_leaves_the_profile_alone(self):
+        user = User.objects.create_user("regular")
+        with CaptureQueriesContext(connection) as queries:
+            user.first_name = "Reg"
+            user.save()
+        self.assertEqual(len(queries), 1)
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+    def test_login_does_not_touch_profiles(self):
+        User.objects.create_user("signin", password="s3cret-pass")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("login"), {"username": "signin", "password": "s3cret-pass"})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse([q for q in queries if "home_profile" in q["sql"].lower()])
+        # User lookup, session insert (3 with its savepoint), last_login
+        # update, session rotate (3): no profile SELECT/UPDATE.
+        self.assertEqual(len(queries), 9)
+
+    def test_provision_users_bulk_creates_users_and_profiles(self):
+        User.objects.create_user("existing")
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("username,email,first_name\nada,ada@example.com,Ada\nexisting,,\nbob,,Bob\nada,,\n")
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command("provision_users", f.name, "--batch-size", "2", stdout=out)
+        Path(f.name).unlink()
+
+        self.assertIn("Created 2 users; skipped 2 rows.", out.getvalue())
+        ada = User.objects.get(username="ada")
+        self.assertEqual((ada.email, ada.first_name, ada.has_usable_password()), ("ada@example.com", "Ada", False))
+        self.assertEqual(Profile.objects.filter(user__username__in=["ada", "bob"]).count(), 2)
+        # Per batch: existing usernames, users, profiles (+ savepoint pair).
+        self.assertLessEqual(len(queries), 10)
+
+
+    @override_settings(SIGNUP_CREDITS=10)
+    def test_new_users_get_signup_credits_and_can_join(self):
+        host = User.objects.create_user("host")
+        session = LiveSession.objects.create(host=host, title="First class", scheduled_at=timezone.now() + timedelta(days=1))
+        newcomer = User.objects.create_user("newcomer")
+        self.assertEqual(Profile.objects.get(user=newcomer).credits, 10)
+
+        self.client.force_login(newcomer)
+        self.client.post(reverse("join_session", args=[session.id]))
+        self.assertTrue(SessionAttendance.objects.filter(session=session, attendee=newcomer).exists())
+        self.assertEqual(Profile.objects.get(user=newcomer).credits, 10 - enrollment.JOIN_COST)
+        self.assertEqual([t.kind for t in ledger.history(newcomer)], [CreditTransaction.SPENT, CreditTransaction.GRANTED])
+        self.assertIsNone(leaderboard.rank(newcomer, "earned", LeaderboardEntry.ALL_TIME))  # a grant is not earned
+
+    @override_settings(SIGNUP_CREDITS=10)
+    def test_provisioned_users_get_signup_credits(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("username\nada\nbob\n")
+        call_command("provision_users", f.name, stdout=StringIO())
+        Path(f.name).unlink()
+        self.assertEqual(list(Profile.objects.order_by("user__username").values_list("credits", flat=True)), [10, 10])
+        self.assertEqual(CreditTransaction.objects.filter(kind=CreditTransaction.GRANTED).count(), 2)
+
+# ==========================================================
+# WALLET SUMMARY
+# ==========================================================
+class WalletSummaryTests(TestCase):
+    def setUp(self):
+        caches[WALLET_CACHE].clear()
+        self.user = User.objects.create_user("learner")
+
+    def test_summary_windows_in_one_query(self):
+        now = timezone.now()
+        ledger.record(self.user, CreditTransaction.EARNED, 10, "Today", created_at=now)
+        ledger.record(self.user, CreditTransaction.EARNED, 5, "Last week", created_at=now - timedelta(days=3))
+        ledger.record(self.user, CreditTransaction.EARNED, 1, "Old", created_at=now - timedelta(days=30))
+        ledger.record(self.user, CreditTransaction.SPENT, 2, "Joined", created_at=now)
+
+        with self.assertNumQueries(1):
+            summary = wallet_service.summary(self.user, now)
+
+        self.assertEqual(summary["earned"], {"today": 10, "week": 15, "total": 16})
+        self.assertEqual(summary["spent"], {"today": 2, "week": 2, "total": 2})
+
+    def test_wallet_query_count_does_not_grow_with_history(self):
+        for i in range(50):
+            ledger.earn(self.user, 1, f"Session {i}")
+        self.client.force_login(self.user)
+
+        # session + user + profile + summary + page count + page rows + 4 session previews
+        with self.assertNumQueries(10):
+            response = self.client.get(reverse("wallet"))
+        self.assertEqual(len(response.context["history"]), wallet_service.HISTORY_PAGE_SIZE)
+
+        # Second visit: summary and session lists come from the cache.
+        with self.assertNumQueries(5):
+            self.client.get(reverse("wallet"))
+
+    def test_cache_is_invalidated_by_writes(self):
+        host = User.objects.create_user("host")
+        session = LiveSession.objects.create(host=host, title="Cached", scheduled_at=timezone.now() + timedelta(days=1))
+        ledger.earn(self.user, 10, "Bonus")
+        hits = caching.stats()["hits"]
+
+        self.assertEqual(wallet_service.cached_summary(self.user)["spent"]["total"], 0)
+        self.assertEqual(wallet_service.cached_summary(self.user)["spent"]["total"], 0)
+        self.assertEqual(caching.stats()["hits"], hits + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.join(session.id, self.user)
+
+        self.assertEqual(wallet_service.cached_summary(self.user)["spent"]["total"], 2)
+        self.assertEqual([a.session_id for a in wallet_service.cached_sessions(self.user)["upcoming_attend"]],
+                         [session.id])
+
+    def test_session_lists_expire_when_the_next_session_starts(self):
+        now = timezone.now()
+        LiveSession.objects.create(host=self.user, title="Soon", scheduled_at=now + timedelta(seconds=90))
+        wallet_cache = caches[WALLET_CACHE]
+        with mock.patch.object(wallet_cache, "set", wraps=wallet_cache.set) as cache_set:
+            wallet_service.cached_sessions(self.user, now)
+            wallet_service.cached_summary(self.user, now)
+        self.assertEqual([c.kwargs["timeout"] for c in cache_set.call_args_list], [90, settings.WALLET_CACHE_TIMEOUT])
+
+    def test_hosting_refreshes_the_wallet(self):
+        self.client.force_login(self.user)
+        self.assertEqual(list(self.client.get(reverse("wallet")).context["upcoming_host"]), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("host_session"), {"title": "Fresh", "schedule": timezone.now() + timedelta(days=1)})
+        hosted = self.client.get(reverse("wallet")).context["upcoming_host"]
+        self.assertEqual([s.title for s in hosted], ["Fresh"])
+
+    async def test_async_views_under_asgi(self):
+        host = await User.objects.acreate(username="async-host")
+        await LiveSession.objects.acreate(host=host, title="Async hour", scheduled_at=timezone.now() + timedelta(days=1))
+        await sync_to_async(ledger.earn)(self.user, 7, "Bonus")
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse("wallet"), {"page": 99})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["summary"], await sync_to_async(wallet_service.summary)(self.user))
+        self.assertEqual(response.context["history"].number, 1)
+        self.assertEqual([tx.title for tx in response.context["history"]], ["Bonus"])
+        self.assertIn('desc="', response["Server-Timing"])
+
+        for name in ("session_list", "browse_sessions"):
+            response = await self.async_client.get(reverse(name))
+            self.assertContains(response, "Async hour")
+
+
+# ==========================================================
+# DAILY ROLLUPS
+# ==========================================================
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user("host")
+        self.learner = User.objects.create_user("learner")
+
+    def snapshot(self):
+        return sorted(DailyCreditRollup.objects.values_list(
+            "user__username", "day", "earned", "spent", "sessions_hosted", "sessions_joined"))
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        self.client.force_login(self.host)
+        self.client.post(reverse("host_session"), {"title": "Single", "schedule": "2030-01-01T10:00"})
+        scheduling.create_series(self.host, "Weekly", timezone.now() + timedelta(days=1), "weekly", count=3)
+        ledger.earn(self.learner, 20, "Bonus")
+        ledger.record(self.learner, CreditTransaction.EARNED, 4, "Last week",
+                      created_at=timezone.now() - timedelta(days=3))
+        session = LiveSession.objects.first()
+        enrollment.join(session.id, self.learner)
+        enrollment.join_many(LiveSession.objects.last().id, [self.learner])
+
+        today = timezone.localdate()
+        incremental = self.snapshot()
+        self.assertIn(("host", today, 0, 0, 4, 0), incremental)
+        self.assertIn(("learner", today, 20, 4, 0, 2), incremental)
+        self.assertIn(("learner", today - timedelta(days=3), 4, 0, 0, 0), incremental)
+
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+        call_command("rebuild_rollups", "--from", str(today), "--to", str(today), stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+        SessionAttendance.objects.filter(session=session).delete()
+        self.assertIn(("learner", today, 20, 4, 0, 1), self.snapshot())
+
+    def test_admin_trend_dashboard(self):
+        ledger.earn(self.learner, 7, "Bonus")
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", None)
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse("admin:Home_dailycreditrollup_changelist"))
+        self.assertContains(response, "Platform credit flow")
+        self.assertEqual([(d["earned"], d["active_users"]) for d in response.context["trend"]], [(7, 1)])
+
+
+# ==========================================================
+# JOIN ENGINE
+# ==========================================================
+class JoinEngineTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user("host")
+        self.session = LiveSession.objects.create(
+            host=self.host, title="Flash class", scheduled_at=timezone.now(), max_attendees=2
+        )
+
+    def make_student(self, name, credits):
+        user = User.objects.create_user(name)
+        Profile.objects.filter(user=user).update(credits=credits)
+        return user
+
+    def test_join_checks_balance_and_capacity(self):
+        broke = self.make_student("broke", 1)
+        with self.assertRaises(InsufficientCredits):
+            enrollment.join(self.session.id, broke)
+
+        for name in ("a", "b"):
+            enrollment.join(self.session.id, self.make_student(name, 5))
+        with self.assertRaises(SessionFull):
+            enrollment.join(self.session.id, self.make_student("c", 5))
+
+        self.assertEqual(self.session.attendances.count(), 2)
+        self.assertEqual(Profile.objects.get(user=broke).credits, 1)
+
+    def test_join_view_stays_within_the_query_budget(self):
+        student = self.make_student("budget", 5)
+        self.client.force_login(student)
+
+        # session + user, BEGIN / COMMIT and two savepoints with their releases, lock + attendance
+        # counts + profile + clash checks, debit + balance + ledger row, attendance, one rollup and
+        # one leaderboard upsert, the job
+        with CaptureQueriesContext(connection) as queries, self.assertNumQueries(19):
+            self.client.post(reverse("join_session", args=[self.session.id]))
+        self.assertLessEqual(len(queries), settings.PERF_QUERY_BUDGET)
+        self.assertEqual(len([q for q in queries if "ON CONFLICT" in q["sql"]]), 2)
+        self.assertEqual(
+            list(DailyCreditRollup.objects.filter(user=student).values_list("spent", "sessions_joined")), [(2, 1)]
+        )
+
+    def test_join_many_admits_in_order_until_full(self):
+        users = [self.make_student("poor", 0)] + [self.make_student(f"s{i}", 10) for i in range(4)]
+
+        with self.assertNumQueries(14):  # incl. SAVEPOINT / RELEASE, three counter upserts and two conflict checks
+            admitted, rejected = enrollment.join_many(self.session.id, users)
+
+        self.assertEqual(admitted, [users[1].pk, users[2].pk])
+        self.assertEqual(rejected, {users[0].pk: InsufficientCredits, users[3].pk: SessionFull,
+                                    users[4].pk: SessionFull})
+        self.assertEqual(
+            sorted(CreditTransaction.objects.filter(kind="spent").values_list("balance_after", flat=True)), [8, 8]
+        )
+
+
+class JoinConcurrencyTests(TransactionTestCase):
+    THREADS = 16
+
+    def run_threads(self, target, count):
+        errors = []
+
+        def worker(i):
+            try:
+                target(i)
+            except Exception as exc:  # collected and asserted on below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return errors
+
+    def test_concurrent_joins_never_overbook_or_lose_debits(self):
+        host = User.objects.create_user("host")
+        session = LiveSession.objects.create(host=host, title="Popular", scheduled_at=timezone.now(),
+                                             max_attendees=5)
+        students = [User.objects.create_user(f"s{i}") for i in range(self.THREADS)]
+        Profile.objects.update(credits=10)
+
+        errors = self.run_threads(lambda i: enrollment.join(session.id, students[i]), self.THREADS)
+
+        self.assertTrue(all(isinstance(e, SessionFull) for e in errors), errors)
+        self.assertEqual(session.attendances.count(), 5)
+        self.assertEqual(Profile.objects.filter(credits=8).count(), 5)
+
+    def test_concurrent_spends_from_one_wallet_are_not_lost(self):
+        host = User.objects.create_user("host")
+        student = User.objects.create_user("student")
+        Profile.objects.filter(user=student).update(credits=2 * (self.THREADS // 2))
+        sessions = [
+            LiveSession.objects.create(host=host, title=f"S{i}", scheduled_at=timezone.now() + timedelta(hours=i))
+            for i in range(self.THREADS)
+        ]
+
+        errors = self.run_threads(lambda i: enrollment.join(sessions[i].id, student), self.THREADS)
+
+        # Exactly half the joins fit the balance; the rest must be refused, not overdraw.
+        self.assertEqual(len(errors), self.THREADS // 2)
+        self.assertTrue(all(isinstance(e, InsufficientCredits) for e in errors), errors)
+        self.assertEqual(Profile.objects.get(user=student).credits, 0)
+        self.assertEqual(SessionAttendance.objects.filter(attendee=student).count(), self.THREADS // 2)
+
+
+# ==========================================================
+# STATIC PAGES
+# ==========================================================
+class StaticPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_static_pages_render(self):
+        for name in ("home", "explore", "programming", "Design", "Music", "Lang", "cooking",
+                     "business", "dancing", "mentor", "about"):
+            self.assertEqual(self.client.get(reverse(name)).status_code, 200, name)
+
+    def test_conditional_get_returns_304(self):
+        first = self.client.get(reverse("programming"))
+        self.assertIn("ETag", first)
+        self.assertIn("public", first["Cache-Control"])
+
+        with self.assertTemplateNotUsed("programming.html"):
+            again = self.client.get(reverse("programming"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+
+        since = self.client.get(reverse("programming"), HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(since.status_code, 304)
+
+
+# ==========================================================
+# STATIC ASSET PIPELINE
+# ==========================================================
+class AssetPipelineTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def test_extract_inline_css(self):
+        template = self.root / "page.html"
+        template.write_text("{% block body %}\n<style>\n.a { color: red; }\n</style>\n<p>x</p>\n"
+                            "<style>.b { color: blue; }</style>\n{% endblock %}\n")
+
+        self.assertEqual(assets.extract_inline_css(template, self.root), "css/pages/page.css")
+        self.assertEqual((self.root / "css/pages/page.css").read_text(), ".a { color: red; }\n\n.b { color: blue; }\n")
+        self.assertEqual(template.read_text(), "{% block body %}\n{% load static %}\n"
+                                               "<link rel=\"stylesheet\" href=\"{% static 'css/pages/page.css' %}\">\n"
+                                               "<p>x</p>\n{% endblock %}\n")
+
+    def test_serves_precompressed_hashed_files_with_far_future_headers(self):
+        css = self.root / "site.0123456789ab.css"
+        css.write_text("body { margin: 0; }\n" * 50)
+        self.assertIn(css.with_name(css.name + ".gz"), assets.precompress(css))
+
+        request = RequestFactory().get("/static/site.0123456789ab.css", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        with self.settings(STATIC_ROOT=self.root):
+            response = assets.serve(request, "site.0123456789ab.css")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), css.read_bytes())
+        response.close()
+
+
+# ==========================================================
+# SESSION CATALOGUE
+# ==========================================================
+class SessionCatalogueTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.hosts = [User.objects.create_user(f"host{i}") for i in range(3)]
+        self.sessions = [
+            LiveSession.objects.create(host=self.hosts[i % 3], title=f"S{i}",
+                                       scheduled_at=now + timedelta(minutes=5, hours=i // 2))
+            for i in range(7)
+        ]
+        LiveSession.objects.create(host=self.hosts[0], title="Past", scheduled_at=now - timedelta(hours=1))
+        LiveSession.objects.create(host=self.hosts[0], title="Cancelled", scheduled_at=now, is_cancelled=True)
+        SessionAttendance.objects.create(session=self.sessions[0], attendee=self.hosts[1])
+
+    def test_keyset_pages_walk_every_session_once(self):
+        seen, cursor = [], None
+        while True:
+            with self.assertNumQueries(1):
+                rows, cursor = catalogue.page(cursor, size=3)
+            seen += [s.title for s in rows]
+            if not cursor:
+                break
+        self.assertEqual(seen, [f"S{i}" for i in range(7)])
+
+    def test_pages_render_without_per_row_queries(self):
+        for name in ("session_list", "browse_sessions"):
+            with self.assertNumQueries(1):
+                response = self.client.get(reverse(name))
+            self.assertContains(response, "S6")
+            self.assertNotContains(response, "Cancelled")
+
+    def test_json_cursor(self):
+        first = self.client.get(reverse("session_catalogue_api")).json()
+        self.assertEqual(first["results"][0]["attendees"], 1)
+        self.assertIsNone(first["next_cursor"])
+        self.assertEqual(self.client.get(reverse("session_catalogue_api"), {"cursor": "nope"}).status_code, 400)
+
+
+# ==========================================================
+# SESSION SEARCH
+# ==========================================================
+@skipUnless(connection.vendor == "sqlite", "FTS5 search is SQLite specific")
+class SessionSearchTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user("mentor")
+        soon = timezone.now() + timedelta(days=1)
+
+        def make(title, description="", category="", when=soon):
+            return LiveSession.objects.create(host=self.host, title=title, description=description,
+                                              category=category, scheduled_at=when)
+
+        self.in_title = make("Python for beginners", category="programming")
+        self.in_description = make("Evening class", "We will write some python scripts", "programming")
+        self.other = make("Sourdough bread", "Baking with wild yeast", "cooking")
+        self.later = make("Advanced Python", category="programming", when=soon + timedelta(days=30))
+
+    def titles(self, *args, **kwargs):
+        return [s.title for s in search.search(*args, **kwargs)]
+
+    def test_ranks_title_matches_first_and_supports_prefixes(self):
+        self.assertEqual(self.titles("pyth")[-1], "Evening class")
+        self.assertEqual(set(self.titles("pyth")[:2]), {"Python for beginners", "Advanced Python"})
+        self.assertEqual(self.titles('bread" OR "x'), [])  # user input is never MATCH syntax
+
+    def test_index_follows_updates_and_deletes(self):
+        LiveSession.objects.filter(pk=self.other.pk).update(title="Rust for cooks")
+        self.assertEqual(self.titles("rust"), ["Rust for cooks"])
+        self.assertEqual(self.titles("sourdough"), [])
+        self.other.delete()
+        self.assertEqual(self.titles("rust"), [])
+
+    def test_category_and_date_window(self):
+        start = timezone.now()
+        self.assertEqual(search.facets("python", start), {"programming": 3})
+        self.assertEqual(self.titles("python", "cooking"), [])
+        self.assertNotIn("Advanced Python", self.titles("python", start=start, end=start + timedelta(days=7)))
+
+    def test_ranks_every_match_not_just_the_newest(self):
+        soon = timezone.now() + timedelta(days=2)
+        LiveSession.objects.bulk_create([
+            LiveSession(host=self.host, title=f"Drill {n}", description="python", scheduled_at=soon)
+            for n in range(600)
+        ])
+        # The best match is the oldest row, behind 600 newer, weaker ones.
+        self.assertIn(self.titles("python")[0], {"Python for beginners", "Advanced Python"})
+        self.assertEqual(len(self.titles("python", limit=20, offset=590)), 13)
+
+    def test_facets_count_every_match(self):
+        soon = timezone.now() + timedelta(days=2)
+        LiveSession.objects.bulk_create([
+            LiveSession(host=self.host, title=f"Python drill {n}", category="programming" if n % 2 else "business",
+                        scheduled_at=soon + timedelta(minutes=n))
+            for n in range(510)
+        ])
+        expected = {"programming": 3 + 255, "business": 255}
+        self.assertEqual(search.facets("python"), expected)
+        fallback = search._icontains("python").values_list("category").annotate(n=Count("id")).order_by()
+        self.assertEqual(dict(fallback), expected)
+
+    def test_search_page(self):
+        response = self.client.get(reverse("search_sessions"), {"q": "python", "category": "programming"})
+        self.assertContains(response, "Python for beginners")
+        self.assertContains(response, "Programming (3)")
+        self.assertEqual(self.client.get(reverse("search_sessions"), {"q": "x", "from": "soon"}).status_code, 400)
+
+
+@skipUnless(connection.vendor == "sqlite", "FTS5 search is SQLite specific")
+class SearchMigrationTests(TransactionTestCase):
+    # 0011 rebuilds Home_livesession on SQLite, which drops the FTS triggers.
+    BEFORE = ("Home", "0010_session_settlement")
+
+    def migrate(self, *targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(list(targets) or executor.loader.graph.leaf_nodes())
+        return executor.loader.project_state(targets[0]).apps if targets else None
+
+    def test_search_follows_updates_after_migrating(self):
+        self.addCleanup(self.migrate)
+        apps = self.migrate(self.BEFORE)
+        host = apps.get_model("auth", "User").objects.create(username="host")
+        sessions = apps.get_model("Home", "LiveSession").objects
+        old = sessions.create(host=host, title="Pottery", scheduled_at=timezone.now(), duration_minutes=25 * 60)
+
+        with self.assertRaisesMessage(ValueError, f"shorten or split these before migrating: {old.pk}."):
+            self.migrate()
+        sessions.filter(pk=old.pk).update(duration_minutes=120)
+        self.migrate()
+        self.assertEqual([s.title for s in search.search("pottery")], ["Pottery"])
+
+        LiveSession.objects.filter(pk=old.pk).update(title="Raku firing")
+        self.assertEqual([s.title for s in search.search("raku")], ["Raku firing"])
+        self.assertEqual(search.search("pottery"), [])
+
+        # Going back rebuilds the table again; the triggers come back too.
+        self.migrate(self.BEFORE)
+        sessions.filter(pk=old.pk).update(title="Glazing")
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM "{search.FTS_TABLE}" WHERE "{search.FTS_TABLE}" MATCH %s', ["glazing"])
+            self.assertEqual(cursor.fetchall(), [(old.pk,)])
+
+
+# ==========================================================
+# BULK SCHEDULING (recurring series + imports)
+# ==========================================================
+class SchedulingTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user("mentor")
+        self.client.force_login(self.host)
+        self.start = timezone.make_aware(timezone.datetime(2030, 1, 7, 18, 0))  # a Monday
+
+    def test_occurrences(self):
+        weekly = list(scheduling.occurrences(self.start, "weekly", count=4, weekdays=[0, 2]))
+        self.assertEqual([(d.day, d.hour) for d in weekly], [(7, 18), (9, 18), (14, 18), (16, 18)])
+
+        fortnightly = list(scheduling.occurrences(self.start, "weekly", interval=2,
+                                                  until=(self.start + timedelta(days=27)).date()))
+        self.assertEqual([d.day for d in fortnightly], [7, 21])
+
+        daily = list(scheduling.occurrences(self.start, "daily", interval=3, count=3))
+        self.assertEqual([d.day for d in daily], [7, 10, 13])
+
+        with self.assertRaises(scheduling.ScheduleError):
+            list(scheduling.occurrences(self.start, "weekly"))
+
+    def test_host_a_weekly_series(self):
+        self.client.post(reverse("host_session"), {
+            "title": "Guitar basics", "schedule": "2030-01-07T18:00", "category": "music",
+            "repeat": "weekly", "count": "10",
+        })
+        series = SessionSeries.objects.get()
+        sessions = list(series.sessions.order_by("scheduled_at"))
+        self.assertEqual(len(sessions), 10)
+        self.assertEqual(sessions[-1].scheduled_at - sessions[0].scheduled_at, timedelta(weeks=9))
+        self.assertEqual({s.credit_reward for s in sessions}, {scheduling.HOST_REWARD})
+        self.assertFalse(ledger.history(self.host).exists())  # paid at settlement
+
+    def test_series_that_cannot_fit_are_refused(self):
+        for fields in ({"repeat": "weekly", "count": "3", "weekdays": "9"},
+                       {"repeat": "daily", "interval": "100000", "count": "3"},
+                       {"repeat": "daily", "until": "2040-01-01"}):
+            response = self.client.post(reverse("host_session"),
+                                        {"title": "Forever", "schedule": "2030-01-07T18:00", **fields}, follow=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(list(response.context["messages"]), fields)
+        self.assertFalse(LiveSession.objects.exists())
+
+        # Up to the horizon is fine.
+        dates = list(scheduling.occurrences(self.start, "daily", interval=scheduling.MAX_HORIZON_DAYS // 2, count=3))
+        self.assertEqual(dates[-1] - dates[0], timedelta(days=scheduling.MAX_HORIZON_DAYS))
+
+    def upload(self, name, content):
+        return self.client.post(reverse("import_sessions"), {
+            "schedule": SimpleUploadedFile(name, content.encode()),
+        })
+
+    def test_import_csv_and_json(self):
+        response = self.upload("term.csv", "title,scheduled_at,category,max_attendees\n"
+                                           "SQL joins,2030-02-01T10:00,programming,12\n"
+                                           "Sketching,2030-02-02T10:00,,\n")
+        self.assertRedirects(response, reverse("wallet"), fetch_redirect_response=False)
+        self.upload("term.json", '[{"title": "Pasta", "scheduled_at": "2030-02-03T10:00:00Z"}]')
+
+        self.assertEqual(sorted(LiveSession.objects.values_list("title", flat=True)),
+                         ["Pasta", "SQL joins", "Sketching"])
+        self.assertEqual(LiveSession.objects.get(title="SQL joins").max_attendees, 12)
+
+    def test_invalid_rows_roll_back_the_whole_import(self):
+        response = self.upload("term.jsonl", '{"title": "Fine", "scheduled_at": "2030-02-01T10:00"}\n'
+                                             '{"title": "", "scheduled_at": "2030-02-01T10:00"}\n'
+                                             '{"title": "Old", "scheduled_at": "2001-01-01T10:00"}\n')
+        self.assertContains(response, "Row 2: title is required")
+        self.assertContains(response, "Row 3: scheduled_at is in the past")
+        self.assertFalse(LiveSession.objects.exists())
+        self.assertFalse(CreditTransaction.objects.exists())
+
+    def test_import_queries_scale_with_batches_not_rows(self):
+        start = datetime(2030, 3, 1)
+        rows = ({"title": f"Lesson {n}", "scheduled_at": (start + timedelta(hours=n)).isoformat()} for n in range(2500))
+        with CaptureQueriesContext(connection) as queries:
+            created = scheduling.import_sessions(self.host, rows)
+        self.assertEqual(created, 2500)
+        # SQLite caps an INSERT at 999 parameters (~80 sessions); with the
+        # settlement jobs, still ~50x fewer round trips than one INSERT per row.
+        self.assertLess(len(queries), 100)
+
+
+# ==========================================================
+# CALENDAR WINDOWS AND CONFLICTS
+# ==========================================================
+class CalendarTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user("host")
+        self.student = User.objects.create_user("student")
+        Profile.objects.filter(user=self.student).update(credits=20)
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+    def session(self, title, offset, minutes=60, host=None, **fields):
+        return LiveSession.objects.create(host=host or self.host, title=title, duration_minutes=minutes,
+                                          scheduled_at=self.start + timedelta(minutes=offset), **fields)
+
+    def test_window_returns_overlapping_sessions(self):
+        self.session("Ends at start", -60)
+        self.session("Runs into window", -30)
+        self.session("Long, started yesterday", -23 * 60, minutes=24 * 60)
+        self.session("Inside", 10, host=self.student)
+        self.session("Cancelled", 20, is_cancelled=True)
+        self.session("Starts at end", 120)
+        end = self.start + timedelta(hours=2)
+
+        rows, cursor = availability.window(self.start, end)
+        self.assertEqual([s.title for s in rows], ["Long, started yesterday", "Runs into window", "Inside"])
+        self.assertIsNone(cursor)
+
+        first, cursor = availability.window(self.start, end, size=2)
+        rest, _ = availability.window(self.start, end, cursor, size=2)
+        self.assertEqual([s.title for s in first + rest], [s.title for s in rows])
+
+    def test_calendar_api(self):
+        inside = self.session("Inside", 10)
+        window = {"start": self.start.isoformat(), "end": (self.start + timedelta(hours=1)).isoformat()}
+        body = self.client.get(reverse("session_calendar_api"), window).json()
+        self.assertEqual([r["id"] for r in body["results"]], [inside.id])
+        self.assertEqual(body["results"][0]["ends_at"], (inside.scheduled_at + timedelta(hours=1)).isoformat())
+
+        for bad in ({"start": "soon", "end": window["end"]},
+                    {"start": window["end"], "end": window["start"]},
+                    {"start": window["start"], "end": (self.start + timedelta(days=365)).isoformat()}):
+            self.assertEqual(self.client.get(reverse("session_calendar_api"), bad).status_code, 400)
+
+    def test_ends_at_follows_schedule_changes(self):
+        session = self.session("Moved", 0)
+        session.duration_minutes = 90
+        session.save(update_fields=["duration_minutes"])
+        session.refresh_from_db()
+        self.assertEqual(session.ends_at, self.start + timedelta(minutes=90))
+
+    def test_hosts_cannot_double_book(self):
+        self.session("Existing", 0)
+        self.client.force_login(self.host)
+        response = self.client.post(reverse("host_session"), {
+            "title": "Clash", "schedule": (self.start + timedelta(minutes=30)).isoformat(),
+        }, follow=True)
+        self.assertContains(response, "Clash on")
+        self.assertFalse(LiveSession.objects.filter(title="Clash").exists())
+
+        # Back to back is fine.
+        scheduling.create_session(self.host, "Next", self.start + timedelta(hours=1))
+        with self.assertRaises(scheduling.ScheduleError):
+            scheduling.create_series(self.host, "Daily", self.start - timedelta(days=1, minutes=30),
+                                     SessionSeries.DAILY, count=3)
+        self.assertFalse(SessionSeries.objects.exists())
+
+    def test_attendees_cannot_join_overlapping_sessions(self):
+        first = self.session("First", 0)
+        overlapping = self.session("Overlapping", 30, host=User.objects.create_user("other"))
+        after = self.session("After", 60, host=User.objects.create_user("third"))
+
+        enrollment.join(first.id, self.student)
+        with self.assertRaises(ScheduleConflict):
+            enrollment.join(overlapping.id, self.student)
+        enrollment.join(after.id, self.student)
+        self.assertEqual(Profile.objects.get(user=self.student).credits, 16)
+
+        # A host is busy during their own sessions too.
+        with self.assertRaises(ScheduleConflict):
+            enrollment.join(overlapping.id, self.host)
+        admitted, rejected = enrollment.join_many(overlapping.id, [self.student, self.host])
+        self.assertEqual((admitted, rejected), ([], {self.student.pk: ScheduleConflict, self.host.pk: ScheduleConflict}))
+
+
+# ==========================================================
+# EXPORTS
+# ==========================================================
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("exporter")
+        host = User.objects.create_user("host")
+        self.session = LiveSession.objects.create(host=host, title="=cmd() tricks",
+                                                  scheduled_at=timezone.now() + timedelta(days=1))
+        ledger.earn(self.user, 10, "Bonus")
+        enrollment.join(self.session.id, self.user)
+
+    def test_history_csv_streams_lazily(self):
+        with self.assertNumQueries(0):
+            response = exports.stream(RequestFactory().get("/"), ledger.history(self.user),
+                                      exports.HISTORY_FIELDS, "csv", "history")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="history.csv"')
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ",".join(exports.HISTORY_FIELDS))
+        self.assertEqual([line.split(",")[1:5] for line in lines[1:]],
+                         [["spent", "2", "8", "'=cmd() tricks"], ["earned", "10", "10", "Bonus"]])
+
+    async def test_history_ndjson_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("export_history"), {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([(r["kind"], r["balance_after"]) for r in rows], [("spent", 8), ("earned", 10)])
+
+        response = await self.async_client.get(reverse("export_history"), {"format": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_reports_are_staff_only(self):
+        url = reverse("session_report", args=["sessions"])
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        staff = User.objects.create_user("staff", is_staff=True)
+        self.client.force_login(staff)
+        rows = b"".join(self.client.get(url).streaming_content).decode().splitlines()
+        self.assertTrue(rows[1].endswith(",False,1"))
+
+        rows = b"".join(self.client.get(reverse("session_report", args=["attendances"]),
+                                        {"format": "ndjson"}).streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(rows[0])["attendee__username"], "exporter")
+        self.assertEqual(self.client.get(reverse("session_report", args=["payroll"])).status_code, 404)
+
+
+# ==========================================================
+# BENCHMARK SUITE (smoke run at tiny scale)
+# ==========================================================
+class BenchmarkSuiteTests(TestCase):
+    def test_seed_and_flows(self):
+        scale = seed.seed(users=30, sessions=60, attendances=100, rng=random.Random(3))
+        self.assertEqual(scale["users"], 30)
+        self.assertEqual(CreditTransaction.objects.count(), scale["ledger"])
+        for profile in Profile.objects.all()[:5]:
+            self.assertEqual(profile.credits, ledger.history(profile.user).first().balance_after)
+
+        report = {"flows": flows.run(requests=5, rng=random.Random(3))}
+        self.assertEqual(set(report["flows"]), set(flows.FLOWS))
+        for result in report["flows"].values():
+            self.assertEqual(result["requests"], 5)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+        self.assertEqual(flows.regressions(report, report, 0.25), [])
+        slower = {"flows": {"wallet": dict(report["flows"]["wallet"], p95_ms=0.001, queries_max=1)}}
+        self.assertEqual(len(flows.regressions(report, slower, 0.25)), 2)
+
+    def test_percentile_is_nearest_rank(self):
+        samples = list(range(1, 101))
+        self.assertEqual([flows.percentile(samples, p) for p in (50, 95, 99, 100)], [50, 95, 99, 100])
+        self.assertEqual(flows.percentile([7], 99), 7)
+
+
+# ==========================================================
+# RATE LIMITING
+# ==========================================================
+@override_settings(RATE_LIMITS={"join": {"user": "2/m", "ip": "3/m"}, "host": {"user": "1/h"}})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        ratelimit._stores.clear()
+        ratelimit.throttled.clear()
+        self.host = User.objects.create_user("host")
+        self.session = LiveSession.objects.create(host=self.host, title="Busy", scheduled_at=timezone.now())
+
+    def test_token_bucket_refills_over_time(self):
+        store = ratelimit.MemoryStore()
+        capacity, rate = ratelimit.parse_rate("2/m")
+        self.assertEqual([store.take("k", capacity, rate, now=0) for _ in range(3)], [0, 0, 30])
+        self.assertEqual(store.take("k", capacity, rate, now=15), 15)  # half a token back
+        self.assertEqual(store.take("k", capacity, rate, now=30), 0)
+        with self.assertRaises(ValueError):
+            ratelimit.parse_rate("10/week")
+
+    def test_join_is_limited_per_user_and_per_ip(self):
+        ann, bob, cat = (User.objects.create_user(name) for name in ("ann", "bob", "cat"))
+        url = reverse("join_session", args=[self.session.id])
+
+        self.client.force_login(ann)
+        self.assertEqual([self.client.get(url).status_code for _ in range(3)], [302, 302, 429])
+
+        # Ann's third request still spent the shared IP's last token.
+        self.client.force_login(bob)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "20")
+        self.assertContains(response, "Too many requests", status_code=429)
+
+        self.client.force_login(cat)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.9").status_code, 302)
+        self.assertEqual(ratelimit.throttled["join"], 2)
+
+    def test_host_form_is_free_but_posts_are_limited(self):
+        self.client.force_login(self.host)
+        self.assertEqual(self.client.get(reverse("host_session")).status_code, 200)
+        post = {"title": "Again", "schedule": "2030-01-01T10:00"}
+        self.assertEqual(self.client.post(reverse("host_session"), post).status_code, 302)
+        response = self.client.post(reverse("host_session"), post)
+        self.assertEqual((response.status_code, response["Retry-After"]), (429, "3600"))
+        self.assertEqual(LiveSession.objects.filter(title="Again").count(), 1)
+
+    @override_settings(RATE_LIMIT_STORE="Home.ratelimit.CacheStore")
+    def test_cache_store_shares_buckets(self):
+        cache.clear()
+        capacity, rate = ratelimit.parse_rate("1/m")
+        first, second = ratelimit.CacheStore(), ratelimit.CacheStore()
+        self.assertEqual(first.take("shared", capacity, rate, now=100), 0)
+        self.assertEqual(second.take("shared", capacity, rate, now=100), 60)
+
+
+# ==========================================================
+# SETTLEMENT
+# ==========================================================
+class SettlementTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user("host")
+        self.learners = [User.objects.create_user(name) for name in ("ann", "bob")]
+        for learner in self.learners:
+            ledger.earn(learner, 10, "Bonus")
+        self.now = timezone.now()
+
+    def session(self, title, starts_in, attendees=()):
+        # Joined a week ahead, then moved to its time: ended sessions refuse joins.
+        ahead = timedelta(days=7)
+        session = LiveSession.objects.create(host=self.host, title=title, scheduled_at=self.now + starts_in + ahead)
+        for learner in attendees:
+            enrollment.join(session.id, learner)
+        LiveSession.objects.filter(pk=session.pk).update(
+            scheduled_at=F("scheduled_at") - ahead, ends_at=F("ends_at") - ahead,
+        )
+        session.refresh_from_db()
+        return session
+
+    def test_ended_and_settled_sessions_refuse_joins(self):
+        ann, bob = self.learners
+        ended = self.session("Ended", timedelta(hours=-3))
+        upcoming = self.session("Upcoming", timedelta(days=1))
+        LiveSession.objects.filter(pk=upcoming.pk).update(settled_at=self.now)
+        for session in (ended, upcoming):
+            with self.assertRaisesMessage(SessionUnavailable, "has already ended"):
+                enrollment.join(session.id, ann)
+            with self.assertRaises(SessionUnavailable):
+                enrollment.join_many(session.id, [ann, bob])
+        self.assertEqual(Profile.objects.get(user=ann).credits, 10)
+        self.assertFalse(CreditTransaction.objects.filter(user=ann, kind=CreditTransaction.SPENT).exists())
+
+    def test_settles_ended_and_cancelled_sessions_in_batches(self):
+        ann, bob = self.learners
+        self.session("Taught", timedelta(hours=-3), [ann])
+        self.session("Empty", timedelta(hours=-3))
+        self.session("Running", timedelta(minutes=-10), [bob])
+        cancelled = self.session("Cancelled", timedelta(days=2), [ann, bob])
+        self.session("Upcoming", timedelta(days=3), [ann])
+        LiveSession.objects.filter(pk=cancelled.pk).update(is_cancelled=True)
+
+        now = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            totals = settlement.settle(now, batch_size=2)
+        self.assertEqual(totals, {"sessions": 3, "hosts_paid": 1, "credits_paid": 10,
+                                  "refunds": 2, "credits_refunded": 4})
+        # One UPDATE ... CASE per batch that pays anyone, whatever the count.
+        case_updates = [q for q in queries if q["sql"].startswith('UPDATE "Home_profile"')]
+        self.assertEqual(len(case_updates), 2)
+        self.assertIn("CASE", case_updates[0]["sql"])
+
+        self.assertEqual(Profile.objects.get(user=self.host).credits, 10)
+        self.assertEqual([Profile.objects.get(user=u).credits for u in (ann, bob)], [6, 8])  # ann: 3 joins, bob: 2; 1 refund each
+        self.assertEqual(
+            set(LiveSession.objects.filter(settled_at__isnull=False).values_list("title", flat=True)),
+            {"Taught", "Empty", "Cancelled"},
+        )
+        self.assertEqual(ledger.history(bob).first().kind, CreditTransaction.REFUNDED)
+        for user in (self.host, ann, bob):
+            self.assertEqual(Profile.objects.get(user=user).credits, ledger.history(user).first().balance_after)
+
+        self.assertEqual(settlement.settle(now)["sessions"], 0)  # nothing twice
+        later = settlement.settle(now + timedelta(hours=1))
+        self.assertEqual((later["sessions"], later["credits_paid"]), (1, 10))
+
+        incremental = sorted(DailyCreditRollup.objects.values_list("user_id", "day", "earned", "spent"))
+        out = StringIO()
+        call_command("settle_sessions", stdout=out)
+        self.assertIn("Settled 0 sessions", out.getvalue())
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(sorted(DailyCreditRollup.objects.values_list("user_id", "day", "earned", "spent")),
+                         incremental)
+
+
+# ==========================================================
+# LEADERBOARD
+# ==========================================================
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.hosts = [User.objects.create_user(f"host{i}") for i in range(3)]
+        self.students = [User.objects.create_user(f"learner{i}") for i in range(3)]
+        Profile.objects.filter(user__in=self.students).update(credits=20)
+        start = timezone.now() + timedelta(days=1)
+        # host0 hosts 2 sessions, host1 and host2 one each.
+        self.sessions = [
+            scheduling.create_session(host, f"Class {n}", start + timedelta(hours=n))
+            for n, host in enumerate([self.hosts[0], self.hosts[0], self.hosts[1], self.hosts[2]])
+        ]
+        for student in self.students:
+            enrollment.join(self.sessions[2].id, student)
+        enrollment.join(self.sessions[0].id, self.students[0])
+
+    def test_boards_follow_writes(self):
+        self.assertEqual(leaderboard.top("hosted"), [(1, "host0", 2), (2, "host1", 1), (2, "host2", 1)])
+        self.assertEqual(leaderboard.top("attendees", "month"), [(1, "host1", 3), (2, "host0", 1)])
+        self.assertEqual(leaderboard.top("joined", "all", size=1), [(1, "learner0", 2)])
+
+        self.assertEqual(leaderboard.rank(self.hosts[2], "hosted"), (2, 1))
+        self.assertEqual(leaderboard.rank(self.students[2], "joined", "all"), (2, 1))
+        self.assertIsNone(leaderboard.rank(self.students[0], "hosted"))
+        self.assertEqual(leaderboard.rank(self.hosts[2], "hosted", size=1), (None, 1))  # unranked
+        self.assertEqual(leaderboard.rank(self.hosts[2], "hosted", size=2), (2, 1))  # tied with #2
+
+        settlement.settle(now=timezone.now() + timedelta(days=2))
+        self.assertEqual(leaderboard.top("earned", "all"), [(1, "host0", 10), (1, "host1", 10)])
+
+        SessionAttendance.objects.filter(session=self.sessions[0]).delete()
+        self.assertEqual(leaderboard.rank(self.students[0], "joined", "week"), (1, 1))
+        self.assertEqual(leaderboard.rank(self.hosts[0], "attendees", "week"), None)
+
+    def test_windows_roll_over(self):
+        next_week = timezone.localdate() + timedelta(days=7)
+        self.assertEqual(leaderboard.top("hosted", "week", today=next_week), [])
+        self.assertEqual(len(leaderboard.top("hosted", "all", today=next_week)), 3)
+        with self.assertRaises(ValueError):
+            leaderboard.top("hosted", "year")
+
+    def test_rebuild_recovers_from_drift(self):
+        def snapshot():
+            return sorted(LeaderboardEntry.objects.values_list(
+                "user_id", "period", "starts_on", "sessions_hosted", "credits_earned", "attendees", "sessions_joined",
+            ))
+        expected = snapshot()
+        LeaderboardEntry.objects.filter(period=LeaderboardEntry.WEEK).update(sessions_hosted=99)
+        LeaderboardEntry.objects.filter(user=self.students[1]).delete()
+
+        out = StringIO()
+        call_command("rebuild_leaderboard", stdout=out)
+        self.assertEqual(snapshot(), expected)
+        self.assertIn(f"Rebuilt {len(expected)} leaderboard rows", out.getvalue())
+
+    def test_page_shows_top_and_my_rank(self):
+        self.client.force_login(self.hosts[1])
+        with self.assertNumQueries(3):  # session, user, top (my rank is in it)
+            response = self.client.get(reverse("leaderboard"), {"board": "attendees"})
+        self.assertContains(response, "You are #1 with 3.")
+
+        top = leaderboard.top
+        with mock.patch.object(leaderboard, "top", lambda board, period: top(board, period, size=1)):
+            self.client.force_login(self.hosts[2])
+            with self.assertNumQueries(4):  # session, user, top, my score
+                response = self.client.get(reverse("leaderboard"))
+        self.assertContains(response, "You are unranked with 1, outside the top 1.")
+        self.assertContains(response, "host0")
+        self.assertEqual(self.client.get(reverse("leaderboard"), {"period": "decade"}).status_code, 400)
+
+
+# ==========================================================
+# RECOMMENDATIONS
+# ==========================================================
+class RecommendationTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = str(Path(tmp.name) / "recommendations.bin")
+        settings_override = override_settings(RECOMMENDATIONS_FILE=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        now = timezone.now()
+        self.learner = User.objects.create_user("learner")
+        self.hosts = [User.objects.create_user(f"mentor{i}") for i in range(4)]
+        past = [LiveSession.objects.create(host=h, title=f"Past {i}", scheduled_at=now - timedelta(days=3 + i))
+                for i, h in enumerate(self.hosts)]
+        self.upcoming = [
+            LiveSession.objects.create(host=h, title=f"{h.username} #{n}",
+                                       scheduled_at=now + timedelta(days=1, hours=3 * n + i))
+            for i, h in enumerate(self.hosts) for n in range(3)
+        ]
+        # Fans of mentor0 also learn with mentor1 (strongly) and mentor2.
+        fans = [User.objects.create_user(f"fan{i}") for i in range(4)]
+        SessionAttendance.objects.bulk_create(
+            [SessionAttendance(session=past[0], attendee=f) for f in fans]
+            + [SessionAttendance(session=past[1], attendee=f) for f in fans]
+            + [SessionAttendance(session=past[2], attendee=f) for f in fans[:2]]
+            + [SessionAttendance(session=past[0], attendee=self.learner),
+               SessionAttendance(session=self.upcoming[3], attendee=self.learner)]
+        )
+
+    def write(self, neighbours):
+        # {host: [(similar host, weight)]} written without NumPy.
+        hosts = sorted(neighbours)
+        row = {h: i for i, h in enumerate(hosts)}
+        indptr, targets, weights = array("I", [0]), array("I"), array("f")
+        for h in hosts:
+            for other, weight in neighbours[h]:
+                targets.append(row[other])
+                weights.append(weight)
+            indptr.append(len(targets))
+        recommendations.write(self.path, array("q", hosts), indptr, targets, weights)
+
+    def test_feed_reads_the_mapped_file(self):
+        self.assertEqual(recommendations.feed(self.learner), [])  # Not built yet
+
+        m0, m1, m2, m3 = (h.pk for h in self.hosts)
+        self.write({m0: [(m2, 0.9), (m1, 0.5)], m1: [(m0, 0.5)], m2: [(m0, 0.9)], m3: []})
+        with self.assertNumQueries(2):
+            feed = recommendations.feed(self.learner)
+        # History is mentor0 and mentor1; mentor1's first upcoming session is already joined.
+        self.assertEqual(
+            [s.title for s in feed],
+            ["mentor2 #0", "mentor2 #1", "mentor0 #0", "mentor0 #1", "mentor1 #1", "mentor1 #2"],
+        )
+
+        self.write({m0: [(m3, 1.0)], m3: [(m0, 1.0)]})  # Replaced file is picked up
+        self.assertEqual([s.host_id for s in recommendations.feed(self.learner)], [m3, m3])
+
+    def test_page(self):
+        self.client.force_login(self.learner)
+        self.assertContains(self.client.get(reverse("recommended_sessions")), "Join a few sessions")
+        self.write({self.hosts[0].pk: [(self.hosts[3].pk, 1.0)], self.hosts[3].pk: []})
+        self.assertContains(self.client.get(reverse("recommended_sessions")), "mentor3 #0")
+
+    @skipUnless(recommendations.np is not None, "NumPy and SciPy are optional")
+    def test_build_command_ranks_co_attended_hosts(self):
+        out = StringIO()
+        call_command("build_recommendations", stdout=out)
+        self.assertIn("3 hosts", out.getvalue())  # mentor3 has no learners
+        index = recommendations.get_index()
+        ranked = recommendations.recommended_hosts(index, self.learner.pk, {self.hosts[0].pk: 1})
+        # mentor1 shares 4 learners with mentor0, mentor2 only 2; mentor3 none.
+        self.assertEqual(ranked, [self.hosts[1].pk, self.hosts[2].pk])
+
+
+# ==========================================================
+# BACKGROUND JOBS
+# ==========================================================
+_flaky_calls = []
+
+
+@jobs.task("test_flaky")
+def flaky(fail_times):
+    _flaky_calls.append(fail_times)
+    if len(_flaky_calls) <= fail_times:
+        raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        _flaky_calls.clear()
+        self.host = User.objects.create_user("host", email="host@example.com")
+        self.learner = User.objects.create_user("learner")
+        ledger.earn(self.learner, 10, "Bonus")
+
+    def test_views_enqueue_side_effects_once(self):
+        self.client.force_login(self.host)
+        self.client.post(reverse("host_session"), {"title": "Python 101", "schedule": "2030-01-01T10:00"})
+        session = LiveSession.objects.get()
+        self.client.force_login(self.learner)
+        self.client.get(reverse("join_session", args=[session.id]))
+        self.client.get(reverse("join_session", args=[session.id]))
+
+        settle, notify = Job.objects.order_by("id")
+        self.assertEqual((settle.task, settle.run_at), ("settle_sessions", session.ends_at))
+        self.assertEqual(notify.task, "notify_host")
+        jobs.enqueue("notify_host", key=notify.key, **notify.payload)  # duplicate key: ignored
+        self.assertEqual(Job.objects.count(), 2)
+
+        out = StringIO()
+        call_command("run_jobs", "--once", stdout=out)
+        self.assertIn("Ran 1 jobs: 1 succeeded, 0 failed.", out.getvalue())  # settlement is not due yet
+        self.assertEqual([m.to for m in mail.outbox], [["host@example.com"]])
+        self.assertEqual(Job.objects.get(pk=notify.pk).status, Job.DONE)
+
+    def test_sessions_are_settled_by_a_job_when_they_end(self):
+        start = timezone.now().replace(second=0, microsecond=0) + timedelta(days=1)
+        session = scheduling.create_session(self.host, "Ends on time", start, duration_minutes=45)
+        cohost = User.objects.create_user("cohost")
+        scheduling.create_session(cohost, "Ends together", start + timedelta(minutes=30), duration_minutes=15)
+        enrollment.join(session.id, self.learner)
+
+        [settle] = Job.objects.filter(task="settle_sessions")
+        self.assertEqual(settle.run_at, start + timedelta(minutes=45))
+        Job.objects.filter(pk=settle.pk).update(run_at=timezone.now())
+        LiveSession.objects.update(ends_at=timezone.now() - timedelta(minutes=1))
+        jobs.run_pending()
+
+        self.assertEqual(LiveSession.objects.filter(settled_at__isnull=True).count(), 0)
+        self.assertEqual(Profile.objects.get(user=self.host).credits, scheduling.HOST_REWARD)
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        jobs.enqueue("test_flaky", max_attempts=3, fail_times=5)
+        job = Job.objects.get()
+        with self.assertLogs("Home.jobs") as logs:
+            for attempt in range(1, 4):
+                Job.objects.filter(pk=job.pk).update(run_at=timezone.now())  # skip the backoff wait
+                self.assertEqual(jobs.run_pending(), (0, 1))
+                job.refresh_from_db()
+                self.assertEqual(job.attempts, attempt)
+        self.assertEqual([r.levelname for r in logs.records], ["WARNING", "WARNING", "ERROR"])
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+        _flaky_calls.clear()
+        jobs.enqueue("test_flaky", fail_times=1)
+        with self.assertLogs("Home.jobs"):
+            self.assertEqual(jobs.run_pending(), (0, 1))
+        retry = Job.objects.latest("id")
+        self.assertEqual(retry.status, Job.QUEUED)
+        self.assertGreater(retry.run_at, timezone.now() + timedelta(seconds=4))
+        self.assertEqual(jobs.run_pending(), (0, 0))  # not due yet
+
+    def test_orphaned_jobs_are_recovered_and_measured(self):
+        jobs.enqueue("test_flaky", fail_times=0)
+        [job] = jobs.claim("crashed-worker")
+        self.assertEqual(jobs.stats()["running"], 1)
+
+        self.assertEqual(jobs.recover(timezone.now() + jobs.LEASE + timedelta(seconds=1)), 1)
+        Job.objects.update(run_at=timezone.now() - timedelta(seconds=30))
+        stats = jobs.stats()
+        self.assertEqual((stats["due"], stats["running"]), (1, 0))
+        self.assertGreaterEqual(stats["lag_seconds"], 30)
+
+        self.assertEqual(jobs.run_pending(), (1, 0))
+        self.assertEqual(jobs.stats()["done_last_minute"], 1)
+
+
+# ==========================================================
+# LIVE ATTENDANCE (WebSocket presence)
+# ==========================================================
+class RecordingBackend(presence.InMemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def publish(self, channel, message):
+        self.sent.append((channel, message))
+
+
+class _Socket:
+    # Minimal ASGI WebSocket client driving Home.sockets in-process.
+    def __init__(self, path, cookie=None, origin="http://testserver"):
+        headers = [(b"host", b"testserver"), (b"origin", origin.encode())]
+        if cookie:
+            headers.append((b"cookie", cookie.encode()))
+        self.inbox, self.outbox = asyncio.Queue(), asyncio.Queue()
+        self.inbox.put_nowait({"type": "websocket.connect"})
+        scope = {"type": "websocket", "path": path, "headers": headers}
+        self.task = asyncio.create_task(sockets.application(scope, self.inbox.get, self.outbox.put))
+
+    async def receive(self):
+        message = await asyncio.wait_for(self.outbox.get(), 2)
+        return json.loads(message["text"]) if message["type"] == "websocket.send" else message
+
+    async def close(self):
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self.task, 2)
+
+
+@override_settings(PRESENCE_BACKEND="Home.presence.InMemoryBackend")
+class PresenceTests(TestCase):
+    def setUp(self):
+        presence._backends.clear()
+        self.host = User.objects.create_user("host")
+        self.attendee = User.objects.create_user("attendee")
+        self.session = LiveSession.objects.create(host=self.host, title="Live", scheduled_at=timezone.now())
+        SessionAttendance.objects.create(session=self.session, attendee=self.attendee, credit_cost=2)
+
+    def cookie(self, user):
+        self.client.force_login(user)
+        return f"sessionid={self.client.cookies['sessionid'].value}"
+
+    async def test_lagging_subscriber_is_told_to_resync(self):
+        backend = presence.InMemoryBackend()
+        subscription = backend.subscribe("room", size=3)
+        for i in range(5):
+            backend.publish("room", {"n": i})
+
+        self.assertEqual(subscription.queue.qsize(), 2)
+        self.assertIs(await subscription.get(), presence.RESYNC)
+        self.assertEqual(await subscription.get(), {"n": 4})
+        self.assertEqual(backend.stats()["dropped"], 3)
+
+    async def test_session_socket_streams_presence_and_attendee_deltas(self):
+        path = f"/ws/sessions/{self.session.id}/"
+        attendee = _Socket(path, await sync_to_async(self.cookie)(self.attendee))
+        self.assertEqual((await attendee.receive())["type"], "websocket.accept")
+        self.assertEqual(await attendee.receive(), {
+            "type": "snapshot", "session": self.session.id, "attendees": 1, "online": ["attendee"],
+        })
+
+        host = _Socket(path, await sync_to_async(self.cookie)(self.host))
+        await host.receive()
+        self.assertEqual((await host.receive())["online"], ["attendee", "host"])
+        self.assertEqual(await attendee.receive(), {
+            "type": "presence", "session": self.session.id, "event": "join", "user": "host", "online": 2,
+        })
+
+        presence.attendees_changed(self.session.id, joined=["newcomer"])
+        for socket in (attendee, host):
+            message = await socket.receive()
+            self.assertEqual((message["delta"], message["joined"]), (1, ["newcomer"]))
+
+        await host.close()
+        self.assertEqual((await attendee.receive())["event"], "leave")
+        await attendee.close()
+        self.assertEqual(presence.get_backend().stats()["subscribers"], 0)
+
+    async def test_anonymous_and_cross_site_sockets_are_refused(self):
+        path = f"/ws/sessions/{self.session.id}/"
+        for socket in (_Socket(path), _Socket(path, await sync_to_async(self.cookie)(self.host), "https://evil.test")):
+            self.assertEqual(await socket.receive(), {"type": "websocket.close", "code": sockets.FORBIDDEN})
+            await socket.task
+
+    @override_settings(PRESENCE_BACKEND="Home.tests.RecordingBackend")
+    def test_joins_are_announced_after_commit(self):
+        newcomer = User.objects.create_user("newcomer")
+        for user in (newcomer, self.host):
+            ledger.earn(user, 10, "Bonus")
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.join(self.session.id, newcomer)
+            enrollment.join_many(self.session.id, [self.host])
+            self.assertEqual(presence.get_backend().sent, [])
+
+        channel = presence.session_channel(self.session.id)
+        self.assertEqual(
+            [m["joined"] for c, m in presence.get_backend().sent if c == channel],
+            [["newcomer"], ["host"]],
+        )
+
+
+# ==========================================================
+# DATABASE PROFILE
+# ==========================================================
+@skipUnless(connection.vendor == "sqlite", "SQLite connection pragmas")
+class SQLiteProfileTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_connections_use_wal_and_relaxed_sync(self):
+        self.assertEqual(self.pragma("journal_mode"), "wal")
+        self.assertEqual(self.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma("busy_timeout"), 20000)
+        self.assertEqual(self.pragma("mmap_size"), 268435456)
+
+
+# ==========================================================
+# REQUEST INSTRUMENTATION
+# ==========================================================
+@override_settings(METRICS_TOKEN="scrape-me")
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("metered")
+        self.client.force_login(self.user)
+
+    def test_server_timing_counts_queries_and_templates(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("wallet"))
+        timing = dict(part.split(";", 1) for part in response["Server-Timing"].split(", "))
+        self.assertEqual(set(timing), {"db", "tpl", "total"})
+        self.assertIn(f'desc="{len(queries)} queries"', timing["db"])
+        self.assertNotEqual(timing["tpl"], "dur=0.0")
+
+    def test_over_budget_requests_are_logged(self):
+        with self.settings(PERF_QUERY_BUDGET=1), self.assertLogs("Home.performance", "WARNING") as logs:
+            self.client.get(reverse("wallet"))
+        self.assertIn("/wallet/ (wallet)", logs.output[0])
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse("wallet"))
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-me")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('credlearn_request_duration_seconds_bucket{view="wallet",le="+Inf"}', body)
+        self.assertIn('credlearn_requests_total{view="wallet",status="200"}', body)
+        self.assertIn("credlearn_wallet_cache_misses_total", body)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = instrumentation.Histogram((1, 5))
+        for value in (0, 1, 3, 9):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.lines("q", 'view="v"')), [
+            'q_bucket{view="v",le="1"} 2',
+            'q_bucket{view="v",le="5"} 3',
+            'q_bucket{view="v",le="+Inf"} 4',
+            'q_sum{view="v"} 13.000000',
+            'q_count{view="v"} 4',
+        ])
+
+
+# ==========================================================
+# REPLICA ROUTING (a second SQLite file as a lagging replica)
+# ----------------------------------------------------------
+# The replica only catches up when a test calls replicate(),
+# so anything read from it after a write is visibly stale.
+# ==========================================================
+@override_settings(REPLICA_DATABASES=["replica"], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(TransactionTestCase):
+    # "replica" only exists while this class runs: it is added before the
+    # parent setUpClass validates `databases`, and gets its schema from the
+    # first replicate().
+    databases = {"default"}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        replica = {"ENGINE": "django.db.backends.sqlite3", "NAME": str(Path(cls.tmp.name) / "replica.sqlite3")}
+        connections.settings["replica"] = connections.configure_settings(
+            {"default": connections.settings["default"], "replica": replica}
+        )["replica"]
+        cls.databases = {"default", "replica"}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            connections["replica"].close()
+            del connections["replica"]
+            del connections.settings["replica"]
+            cls.databases = {"default"}
+            cls.tmp.cleanup()
+
+    def setUp(self):
+        self.mentor = User.objects.create_user("mentor")
+        self.learner = User.objects.create_user("learner")
+        ledger.earn(self.learner, 10, "Welcome bonus")
+        soon = timezone.now() + timedelta(days=1)
+        LiveSession.objects.create(host=self.mentor, title="Replicated", scheduled_at=soon)
+        self.client.force_login(self.learner)
+        self.replicate()
+        # Written after the last replication: only the primary has it.
+        self.session = LiveSession.objects.create(host=self.mentor, title="Lagging", scheduled_at=soon + timedelta(hours=2))
+
+    def replicate(self):
+        for alias in ("default", "replica"):
+            connections[alias].ensure_connection()
+        connections["default"].connection.backup(connections["replica"].connection)
+
+    def wallet_history(self):
+        return [entry.title for entry in self.client.get(reverse("wallet")).context["history"]]
+
+    def test_reads_use_the_replica_until_the_browser_writes(self):
+        listing = self.client.get(reverse("session_list"))
+        self.assertContains(listing, "Replicated")
+        self.assertNotContains(listing, "Lagging")
+        self.assertEqual(self.wallet_history(), ["Welcome bonus"])
+
+        response = self.client.get(reverse("join_session", args=[self.session.pk]))  # A GET that writes
+        self.assertIn(routing.PIN_COOKIE, response.cookies)
+        self.assertEqual(Profile.objects.using("replica").get(user=self.learner).credits, 10)  # Still stale
+
+        # Pinned to the primary: the join and its charge are visible at once.
+        self.assertEqual(self.wallet_history(), ["Lagging", "Welcome bonus"])
+        self.assertContains(self.client.get(reverse("session_list")), "Lagging")
+        self.assertEqual(
+            self.client.get(reverse("wallet")).context["profile"].credits,
+            Profile.objects.get(user=self.learner).credits,
+        )
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_without_the_pin_the_replica_would_serve_stale_credits(self):
+        response = self.client.get(reverse("join_session", args=[self.session.pk]))
+        self.assertNotIn(routing.PIN_COOKIE, response.cookies)
+        self.assertEqual(self.wallet_history(), ["Welcome bonus"])
+
+    def test_router(self):
+        router = routing.PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(Profile), "default")  # Outside requests
+        self.assertEqual(router.db_for_write(Profile), "default")
+        self.assertFalse(router.allow_migrate("replica", "Home"))
+
+        token = routing.current.set(routing.RoutingState())
+        try:
+            self.assertEqual(router.db_for_read(Profile), "replica")
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Profile), "default")
+            with routing.primary_reads():
+                self.assertEqual(router.db_for_read(Profile), "default")
+            self.assertEqual(router.db_for_read(Profile), "replica")
+
+            Profile.objects.filter(user=self.learner).update(credits=11)
+            self.assertEqual(router.db_for_read(Profile), "default")  # Pinned by the write
+        finally:
+            routing.current.reset(token)
+
+
+# ==========================================================
+# QUERY PLANS (hot lookups must stay on an index)
+# ==========================================================
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class HotQueryPlanTests(TestCase):
+    # \b after the name, or the \w+ backtracks a letter and the lookahead passes.
+    FULL_SCAN = re.compile(r"\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)")
+
+    def setUp(self):
+        self.user = User.objects.create_user("planner")
+        self.now = timezone.now()
+        session = LiveSession.objects.create(host=self.user, title="Plan", scheduled_at=self.now)
+        self.cursor = catalogue.encode_cursor(session)
+
+    def assertIndexed(self, queryset):
+        plan = queryset.explain()
+        self.assertIsNone(self.FULL_SCAN.search(plan), f"full table scan:\n{plan}")
+        return plan
+
+    def test_full_scan_pattern(self):
+        self.assertIsNone(self.FULL_SCAN.search("SCAN Home_livesession USING INDEX session_open_time"))
+        self.assertIsNone(self.FULL_SCAN.search("SCAN Home_profile USING COVERING INDEX profile_credits"))
+        self.assertEqual(self.FULL_SCAN.search("SCAN Home_credittransaction").group(1), "Home_credittransaction")
+
+    def test_wallet_queries(self):
+        self.assertIndexed(CreditTransaction.objects.filter(user=self.user))
+        self.assertIndexed(DailyCreditRollup.objects.filter(user=self.user))
+        self.assertIndexed(ledger.history(self.user)[:20])
+        for queryset in wallet_service.sessions(self.user, self.now).values():
+            self.assertIndexed(queryset)
+
+    def test_catalogue_pages_walk_the_partial_index(self):
+        first = catalogue.upcoming(self.now)[:25]
+        later = catalogue.upcoming(self.now).filter(
+            Q(scheduled_at__gt=self.now) | Q(scheduled_at=self.now, id__gt=1)
+        )[:25]
+        for queryset in (first, later):
+            plan = self.assertIndexed(queryset)
+            self.assertIn("session_open_time", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_calendar_windows_stay_on_the_index(self):
+        sessions = LiveSession.objects.filter(is_cancelled=False).order_by("scheduled_at", "id")
+        plan = self.assertIndexed(availability.overlapping(sessions, self.now, self.now + timedelta(days=1))[:200])
+        self.assertIn("session_open_time", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        self.assertIndexed(availability.busy(self.user, self.now, self.now + timedelta(hours=1)))
+
+    def test_leaderboard_reads_its_indexes(self):
+        for board in leaderboard.BOARDS:
+            counter, entries = leaderboard._board(board, LeaderboardEntry.WEEK)
+            top = entries.filter(**{f"{counter}__gt": 0}).order_by(f"-{counter}", "user")[:20]
+            self.assertIn(f"leaderboard_{counter}", self.assertIndexed(top))
+            self.assertNotIn("TEMP B-TREE", top.explain())
+            self.assertIn(f"leaderboard_{counter}", self.assertIndexed(entries.filter(**{f"{counter}__gt": 5})))
+
+    def test_join_lookups(self):
+        self.assertIndexed(SessionAttendance.objects.filter(session_id=1))
+        self.assertIndexed(SessionAttendance.objects.filter(session_id=1, attendee=self.user))
@@ -1,55 +1,85 @@
+import asyncio
+import calendar
+import hmac
+from datetime import datetime, time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, redirect
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
-from django.db.models import Sum
-from datetime import timedelta
-
-from Home.models import Profile, LiveSession, SessionAttendance
+from django.utils.dateparse import parse_date
+from django.db import transaction
+
+from Home.models import Profile, LeaderboardEntry, LiveSession, SessionSeries
+from Home import (
+    availability, caching, catalogue, enrollment, exports, instrumentation, jobs, leaderboard, ledger, presence,
+    ratelimit, recommendations, scheduling, search,
+)
+from Home.decorators import rate_limited, static_page
+from Home.exceptions import CreditError
+from Home import wallet as wallet_service
 from django.contrib.auth import logout
 
 
 # ==========================================================
-# BASIC PAGES
+# BASIC PAGES (same for every visitor, see decorators.static_page)
 # ==========================================================
+@static_page
 def home(request):
     return render(request, 'index.html')
 
+@static_page
 def Explore(request):
     return render(request, 'explore.html')
 
+@static_page
 def about(request):
     return render(request, 'about.html')
 
+@static_page
 def contact(request):
     return render(request, 'contact.html')
 
+@static_page
 def services(request):
     return render(request, 'services.html')
 
+@static_page
 def programming(request):
     return render(request, 'programming.html')
 
+@static_page
 def Design(request):
     return render(request, 'Design.html')
 
+@static_page
 def Music(request):
-    return render(request, 'music.html')
+    return render(request, 'Music.html')
 
+@static_page
 def Lang(request):
     return render(request, 'Lang.html')
 
+@static_page
 def cooking(request):
     return render(request, 'cooking.html')
 
+@static_page
 def business(request):
     return render(request, 'business.html')
 
+@static_page
 def dancing(request):
-    return render(request, 'dancing.html')
+    return render(request, 'Dancing.html')
 
 def register(request):
     return render(request, 'register.html')
 
+@static_page
 def mentor(request):
     return render(request, 'mentor.html')
 
@@ -64,136 +94,313 @@ def logout_user(request):
 
 # ==========================================================
 # WALLET (Advanced Credit Summary + History + Sessions)
+# ----------------------------------------------------------
+# Async: the independent lookups are awaited together, and the
+# page is rendered in a worker thread because the messages
+# list reads the session.
 # ==========================================================
 @login_required
-def wallet(request):
-    user = request.user
-    profile, _ = Profile.objects.get_or_create(user=user)
-
+async def wallet(request):
+    user = await request.auser()
     now = timezone.now()
-    start_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    start_week = start_today - timedelta(days=7)
-
-    # Earned = hosting sessions
-    earned_qs = LiveSession.objects.filter(host=user)
-
-    # Spent = joining sessions
-    spent_qs = SessionAttendance.objects.filter(attendee=user)
-
-    # Summary calculations
-    summary = {
-        "earned": {
-            "today": earned_qs.filter(scheduled_at__gte=start_today)
-                              .aggregate(total=Sum("credit_reward"))["total"] or 0,
-            "week": earned_qs.filter(scheduled_at__gte=start_week)
-                             .aggregate(total=Sum("credit_reward"))["total"] or 0,
-            "total": earned_qs.aggregate(total=Sum("credit_reward"))["total"] or 0,
-        },
-        "spent": {
-            "today": spent_qs.filter(session__scheduled_at__gte=start_today)
-                             .aggregate(total=Sum("credit_cost"))["total"] or 0,
-            "week": spent_qs.filter(session__scheduled_at__gte=start_week)
-                            .aggregate(total=Sum("credit_cost"))["total"] or 0,
-            "total": spent_qs.aggregate(total=Sum("credit_cost"))["total"] or 0,
-        },
-    }
 
-    # Combined transaction history
-    history = []
-    for s in earned_qs:
-        history.append({
-            "title": s.title,
-            "type": "earned",
-            "credits": s.credit_reward,
-            "dt": s.scheduled_at,
-        })
-
-    for a in spent_qs.select_related("session"):
-        history.append({
-            "title": a.session.title,
-            "type": "spent",
-            "credits": a.credit_cost,
-            "dt": a.session.scheduled_at,
-        })
-
-    history.sort(key=lambda x: x["dt"], reverse=True)
-
-    # Upcoming / Past sessions
-    upcoming_host = earned_qs.filter(scheduled_at__gte=now).order_by("scheduled_at")[:5]
-    upcoming_attend = spent_qs.filter(session__scheduled_at__gte=now)\
-                              .select_related("session").order_by("session__scheduled_at")[:5]
-
-    past_host = earned_qs.filter(scheduled_at__lt=now).order_by("-scheduled_at")[:5]
-    past_attend = spent_qs.filter(session__scheduled_at__lt=now)\
-                          .select_related("session").order_by("-session__scheduled_at")[:5]
+    (profile, _), summary, history, sessions = await asyncio.gather(
+        Profile.objects.aget_or_create(user=user),
+        wallet_service.acached_summary(user, now),
+        wallet_service.ahistory_page(user, request.GET.get("page")),
+        wallet_service.acached_sessions(user, now),
+    )
 
     context = {
         "profile": profile,
         "summary": summary,
         "history": history,
-        "upcoming_host": upcoming_host,
-        "upcoming_attend": upcoming_attend,
-        "past_host": past_host,
-        "past_attend": past_attend,
+        **sessions,
     }
 
-    return render(request, "wallet.html", context)
+    return await sync_to_async(render)(request, "wallet.html", context)
+
+
+@staff_member_required
+def wallet_cache_stats(request):
+    return JsonResponse(caching.stats())
+
+
+# ==========================================================
+# EXPORTS (streamed CSV / NDJSON; ?format=csv|ndjson)
+# ==========================================================
+@login_required
+def export_history(request):
+    try:
+        return exports.stream(request, ledger.history(request.user), exports.HISTORY_FIELDS,
+                              request.GET.get("format", "csv"), "credit-history")
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+
+@staff_member_required
+def session_report(request, report):
+    try:
+        return exports.report(request, report, request.GET.get("format", "csv"))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+
+# ==========================================================
+# METRICS (Prometheus text format; staff or bearer token)
+# ==========================================================
+def metrics(request):
+    token = settings.METRICS_TOKEN
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not (request.user.is_staff or (token and hmac.compare_digest(supplied, token))):
+        return HttpResponseForbidden()
+
+    wallet = caching.stats()
+    extra = [
+        ("credlearn_wallet_cache_hits_total", "counter", "Wallet cache hits.", wallet["hits"]),
+        ("credlearn_wallet_cache_misses_total", "counter", "Wallet cache misses.", wallet["misses"]),
+        ("credlearn_wallet_cache_invalidations_total", "counter", "Wallet cache invalidations.", wallet["invalidations"]),
+    ]
+    extra += [
+        ("credlearn_rate_limited_total", "counter", "Requests refused with 429.", sum(ratelimit.throttled.values())),
+    ]
+    hub = presence.get_backend().stats()
+    extra += [
+        ("credlearn_presence_subscribers", "gauge", "Open live-attendance sockets.", hub["subscribers"]),
+        ("credlearn_presence_published_total", "counter", "Live-attendance events published.", hub["published"]),
+        ("credlearn_presence_dropped_total", "counter", "Events dropped for lagging sockets.", hub["dropped"]),
+    ]
+    queue = jobs.stats()
+    extra += [
+        ("credlearn_jobs_queued", "gauge", "Background jobs waiting, including retries not yet due.", queue["queued"]),
+        ("credlearn_jobs_due", "gauge", "Background jobs due to run now.", queue["due"]),
+        ("credlearn_jobs_running", "gauge", "Background jobs claimed by a worker.", queue["running"]),
+        ("credlearn_jobs_failed", "gauge", "Background jobs that ran out of attempts.", queue["failed"]),
+        ("credlearn_jobs_done_last_minute", "gauge", "Background jobs finished in the last minute.", queue["done_last_minute"]),
+        ("credlearn_jobs_lag_seconds", "gauge", "Age of the oldest due background job.", queue["lag_seconds"]),
+    ]
+    return HttpResponse(
+        instrumentation.registry.render(extra),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
 
 # ==========================================================
 # HOST A LIVE SESSION
 # ==========================================================
 @login_required
+@rate_limited("host")
 def host_session(request):
     if request.method == "POST":
         title = request.POST.get("title")
         schedule = request.POST.get("schedule")
+        description = request.POST.get("description", "")
+        category = request.POST.get("category", "")
+        repeat = request.POST.get("repeat")
+
+        if repeat:
+            try:
+                series, sessions = scheduling.create_series(
+                    request.user,
+                    title,
+                    scheduling.parse_when(schedule),
+                    repeat,
+                    interval=int(request.POST.get("interval") or 1),
+                    count=int(request.POST["count"]) if request.POST.get("count") else None,
+                    until=parse_date(request.POST.get("until") or ""),
+                    weekdays=[int(d) for d in request.POST.getlist("weekdays")],
+                    description=description,
+                    category=category,
+                )
+            except ValueError as exc:
+                messages.error(request, str(exc))
+                return redirect("host_session")
+            messages.success(request, f"Scheduled {len(sessions)} sessions of {series.title}.")
+            return redirect("wallet")
+
+        try:
+            scheduled_at = scheduling.parse_when(schedule)
+        except ValueError as exc:
+            messages.error(request, str(exc))
+            return redirect("host_session")
+
+        # The host is paid when the session ends (manage.py settle_sessions).
+        try:
+            scheduling.create_session(
+                request.user,
+                title,
+                scheduled_at,
+                description=description,
+                category=category,
+            )
+        except ValueError as exc:
+            messages.error(request, str(exc))
+            return redirect("host_session")
 
-        session = LiveSession.objects.create(
-            host=request.user,
-            title=title,
-            scheduled_at=schedule,
-            credit_reward=10,
-        )
+        return redirect("wallet")
 
-        profile = request.user.profile
-        profile.credits += session.credit_reward
-        profile.save()
+    return render(request, "host_session.html", {
+        "categories": LiveSession.CATEGORY_CHOICES,
+        "frequencies": SessionSeries.FREQUENCY_CHOICES,
+        "weekdays": list(enumerate(calendar.day_abbr)),
+    })
 
-        return redirect("wallet")
 
-    return render(request, "host_session.html")
+@login_required
+@rate_limited("host")
+def import_sessions(request):
+    errors = []
+    if request.method == "POST" and "schedule" in request.FILES:
+        upload = request.FILES["schedule"]
+        try:
+            created = scheduling.import_sessions(request.user, scheduling.read_rows(upload.file, upload.name))
+        except scheduling.ScheduleError as exc:
+            errors = exc.errors
+        else:
+            messages.success(request, f"Imported {created} sessions.")
+            return redirect("wallet")
+
+    return render(request, "import_sessions.html", {"errors": errors})
 
 
 # ==========================================================
 # JOIN A LIVE SESSION
 # ==========================================================
 @login_required
+@rate_limited("join", methods=None)
 def join_session(request, session_id):
-    session = LiveSession.objects.get(id=session_id)
-    user = request.user
+    try:
+        with transaction.atomic():
+            attendance, created = enrollment.join(session_id, request.user)
+            if created:
+                jobs.enqueue("notify_host", key=f"notify-host:{attendance.pk}", attendance_id=attendance.pk)
+    except CreditError as exc:
+        messages.error(request, str(exc))
 
-    attendance, created = SessionAttendance.objects.get_or_create(
-        session=session,
-        attendee=user,
-        defaults={"credit_cost": 2}
-    )
+    return redirect("wallet")
 
-    if created:
-        profile = user.profile
-        profile.credits -= attendance.credit_cost
-        profile.save()
 
-    return redirect("wallet")
+# ==========================================================
+# SESSION LIST / BROWSE (keyset-paginated catalogue)
+# ----------------------------------------------------------
+# ?cursor=<next_cursor> fetches the following page and
+# ?fragment=1 returns only the cards, for "load more".
+# ==========================================================
+async def _catalogue_page(request, template, fragment_template):
+    try:
+        sessions, next_cursor = await catalogue.apage(request.GET.get("cursor"))
+    except catalogue.InvalidCursor as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    # Rows are fully loaded (host via select_related), so rendering
+    # needs no database access and can stay on the event loop.
+    context = {"sessions": sessions, "next_cursor": next_cursor}
+    if request.GET.get("fragment"):
+        return render(request, fragment_template, context)
+    return render(request, template, context)
+
+
+async def session_list(request):
+    return await _catalogue_page(request, "session_list.html", "partials/session_list_cards.html")
+
+async def browse_sessions(request):
+    return await _catalogue_page(request, "browse-session.html", "partials/browse_session_cards.html")
+
+def session_catalogue_api(request):
+    try:
+        sessions, next_cursor = catalogue.page(request.GET.get("cursor"))
+    except catalogue.InvalidCursor as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse({
+        "results": [catalogue.as_json(s) for s in sessions],
+        "next_cursor": next_cursor,
+    })
 
 
 # ==========================================================
-# SESSION LIST
+# RECOMMENDED FOR YOU (hosts similar to the ones you learn
+# from; see manage.py build_recommendations)
 # ==========================================================
-def session_list(request):
-    sessions = LiveSession.objects.all().order_by("scheduled_at")
-    return render(request, "session_list.html", {"sessions": sessions})
+@login_required
+def recommended_sessions(request):
+    return render(request, "recommended.html", {"sessions": recommendations.feed(request.user)})
+
 
-def browse_sessions(request):
-    sessions = LiveSession.objects.all().order_by("scheduled_at")
-    return render(request, "browse_sessions.html", {"sessions": sessions})
+# ==========================================================
+# CALENDAR (sessions overlapping a [start, end) window)
+# ----------------------------------------------------------
+# ?start=...&end=... as ISO 8601 date-times; follow
+# next_cursor for the rest of a busy window.
+# ==========================================================
+def session_calendar_api(request):
+    try:
+        start = scheduling.parse_when(request.GET.get("start"), "start")
+        end = scheduling.parse_when(request.GET.get("end"), "end")
+        sessions, next_cursor = availability.window(start, end, request.GET.get("cursor"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "results": [catalogue.as_json(s) for s in sessions],
+        "next_cursor": next_cursor,
+    })
+
+
+# ==========================================================
+# SEARCH (title / description, category facets, date window)
+# ==========================================================
+def _day_start(value):
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f"Invalid date: {value!r}")
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def search_sessions(request):
+    query = request.GET.get("q", "").strip()
+    category = request.GET.get("category") or None
+    try:
+        start = _day_start(request.GET.get("from")) or timezone.now()
+        end = _day_start(request.GET.get("to"))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    counts = search.facets(query, start, end) if query else {}
+    context = {
+        "query": query,
+        "category": category,
+        "results": search.search(query, category, start, end) if query else [],
+        "facets": [
+            (value, label, counts[value])
+            for value, label in LiveSession.CATEGORY_CHOICES if counts.get(value)
+        ],
+    }
+    return render(request, "search.html", context)
+
+
+# ==========================================================
+# LEADERBOARD (?board=hosted|earned|attendees|joined and
+# ?period=week|month|all)
+# ==========================================================
+def leaderboards(request):
+    board = request.GET.get("board", "hosted")
+    period = request.GET.get("period", LeaderboardEntry.WEEK)
+    try:
+        top = leaderboard.top(board, period)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    mine = leaderboard.rank(request.user, board, period, ranked=top) if request.user.is_authenticated else None
+    return render(request, "leaderboard.html", {
+        "board": board,
+        "period": period,
+        "boards": leaderboard.BOARD_CHOICES,
+        "periods": LeaderboardEntry.PERIOD_CHOICES,
+        "top": top,
+        "mine": mine,
+    })
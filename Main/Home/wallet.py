@@ -0,0 +1,154 @@
+import asyncio
+import math
+from datetime import timedelta
+
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from Home import caching, ledger
+from Home.models import LiveSession, SessionAttendance, DailyCreditRollup
+
+HISTORY_PAGE_SIZE = 20
+SESSIONS_PREVIEW = 5
+
+
+# ==========================================================
+# WALLET SUMMARY (earned / spent for today, week, total)
+# ----------------------------------------------------------
+# One conditional-aggregation pass over the user's daily
+# rollups: today and the week come from at most 8 rows, the
+# total from one row per active day (not per transaction).
+# ==========================================================
+SIDES = ("earned", "spent")
+WINDOWS = ("today", "week", "total")
+
+
+def _summary_fields(now):
+    today = timezone.localdate(now)
+
+    windows = {
+        "today": Q(day=today),
+        "week": Q(day__gte=today - timedelta(days=7)),
+        "total": None,
+    }
+    return {
+        f"{side}_{window}": Coalesce(Sum(side, filter=window_q), Value(0))
+        for side in SIDES
+        for window, window_q in windows.items()
+    }
+
+
+def _summary_result(totals):
+    return {
+        side: {window: totals[f"{side}_{window}"] for window in WINDOWS}
+        for side in SIDES
+    }
+
+
+def summary(user, now=None):
+    fields = _summary_fields(now or timezone.now())
+    return _summary_result(DailyCreditRollup.objects.filter(user=user).aggregate(**fields))
+
+
+# ==========================================================
+# HISTORY (one LIMIT/OFFSET page of the ledger)
+# ==========================================================
+def history_page(user, page=None, per_page=HISTORY_PAGE_SIZE):
+    return Paginator(ledger.history(user), per_page).get_page(page)
+
+
+# ==========================================================
+# UPCOMING / PAST SESSIONS
+# ==========================================================
+def sessions(user, now=None, limit=SESSIONS_PREVIEW):
+    now = now or timezone.now()
+
+    hosted = LiveSession.objects.filter(host=user)
+    attended = SessionAttendance.objects.filter(attendee=user).select_related("session")
+
+    return {
+        "upcoming_host": hosted.filter(scheduled_at__gte=now).order_by("scheduled_at")[:limit],
+        "upcoming_attend": attended.filter(session__scheduled_at__gte=now)
+                                   .order_by("session__scheduled_at")[:limit],
+        "past_host": hosted.filter(scheduled_at__lt=now).order_by("-scheduled_at")[:limit],
+        "past_attend": attended.filter(session__scheduled_at__lt=now)
+                               .order_by("-session__scheduled_at")[:limit],
+    }
+
+
+# ==========================================================
+# CACHED VARIANTS (used by the wallet view)
+# ==========================================================
+def cached_summary(user, now=None):
+    now = now or timezone.now()
+    # The local date is part of the key so "today" rolls over at midnight.
+    return caching.wallet_get(user.pk, f"summary:{timezone.localdate(now)}", lambda: summary(user, now))
+
+
+# The lists only change by themselves when the next upcoming session starts
+# and moves to the past ones, so the entry must not outlive that.
+def _sessions_ttl(now):
+    def ttl(rows):
+        starts = [s.scheduled_at for s in rows["upcoming_host"]]
+        starts += [a.session.scheduled_at for a in rows["upcoming_attend"]]
+        return math.ceil((min(starts) - now).total_seconds()) if starts else math.inf
+    return ttl
+
+
+def cached_sessions(user, now=None):
+    now = now or timezone.now()
+    return caching.wallet_get(
+        user.pk, "sessions",
+        lambda: {name: list(rows) for name, rows in sessions(user, now).items()},
+        ttl=_sessions_ttl(now),
+    )
+
+
+# ==========================================================
+# ASYNC VARIANTS (used by the async wallet view)
+# ----------------------------------------------------------
+# Same queries and cache entries as above, through the async
+# ORM so the view can await them side by side.
+# ==========================================================
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+async def asummary(user, now=None):
+    fields = _summary_fields(now or timezone.now())
+    return _summary_result(await DailyCreditRollup.objects.filter(user=user).aaggregate(**fields))
+
+
+async def ahistory_page(user, page=None, per_page=HISTORY_PAGE_SIZE):
+    # Paginator has no async API: count with acount(), then fetch the one
+    # page so the template never touches the database.
+    entries = ledger.history(user)
+    paginator = Paginator(entries, per_page)
+    paginator.count = await entries.acount()
+    try:
+        number = paginator.validate_number(page)
+    except PageNotAnInteger:
+        number = 1
+    except EmptyPage:
+        number = paginator.num_pages
+
+    bottom = (number - 1) * per_page
+    return Page(await _alist(entries[bottom:bottom + per_page]), number, paginator)
+
+
+async def asessions(user, now=None, limit=SESSIONS_PREVIEW):
+    querysets = sessions(user, now, limit)
+    rows = await asyncio.gather(*(_alist(queryset) for queryset in querysets.values()))
+    return dict(zip(querysets, rows))
+
+
+async def acached_summary(user, now=None):
+    now = now or timezone.now()
+    return await caching.awallet_get(user.pk, f"summary:{timezone.localdate(now)}", lambda: asummary(user, now))
+
+
+async def acached_sessions(user, now=None):
+    now = now or timezone.now()
+    return await caching.awallet_get(user.pk, "sessions", lambda: asessions(user, now), ttl=_sessions_ttl(now))
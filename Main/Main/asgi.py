@@ -5,6 +5,20 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+The wallet and session catalogue views are async, so serve the project
+through this module rather than wsgi.py to get their concurrency, e.g.
+from the repository root:
+
+    gunicorn Main.asgi:application -c gunicorn.conf.py
+
+(gunicorn with uvicorn workers; see gunicorn.conf.py for the worker
+settings) or, for a single process, ``uvicorn Main.asgi:application``.
+
+WebSocket connections go to Home.sockets (live attendance under
+/ws/sessions/), everything else to Django. The default presence hub is
+in-process, so with several workers either route /ws/ to one of them or
+set PRESENCE_BACKEND to a broker-backed hub.
 """
 
 import os
@@ -16,4 +30,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Main.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from Home import sockets  # noqa: E402  (needs the app registry loaded above)
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        await sockets.application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -44,6 +44,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings and query counts cover the other middleware too.
+    'Home.middleware.PerformanceMiddleware',
+    # Before the session and auth middleware, so their reads are routed too.
+    'Home.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,9 +60,12 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'Main.urls'
 
 import os
+# Leave 'loaders' unset: Django then wraps the filesystem and app loaders in
+# the cached loader, so each template is compiled once per process.
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates plus render timing for Server-Timing / /metrics.
+        'BACKEND': 'Home.instrumentation.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR/"Main"/"templates")],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -77,12 +84,154 @@ WSGI_APPLICATION = 'Main.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DATABASE_ENGINE picks the profile: "sqlite" (default, local development)
+# or "postgresql" (production; connection details from the DATABASE_* vars).
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DATABASE_NAME', 'credlearn'),
+            'USER': os.environ.get('DATABASE_USER', 'credlearn'),
+            'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+            'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
+            'PORT': os.environ.get('DATABASE_PORT', '5432'),
+            # Check a reused connection before handing it to a request, so a
+            # server restart costs one reconnect instead of a 500.
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    if os.environ.get('DATABASE_POOL_MAX'):
+        # psycopg's pool (needs psycopg[pool]); Django requires CONN_MAX_AGE=0
+        # with it, the pool itself keeps the connections open.
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('DATABASE_POOL_MIN', 2)),
+                'max_size': int(os.environ['DATABASE_POOL_MAX']),
+                'timeout': 10,
+            },
+        }
+    else:
+        # Persistent connections: one per worker thread, kept for 10 minutes.
+        # Only useful under WSGI; ASGI deployments should set the pool.
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DATABASE_CONN_MAX_AGE', 600))
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Take the write lock when a transaction starts, so concurrent
+                # credit transfers queue on the busy timeout instead of failing
+                # to upgrade a read lock.
+                'transaction_mode': 'IMMEDIATE',
+                # Seconds to wait for the write lock (sqlite3_busy_timeout).
+                'timeout': 20,
+                # Run on every new connection. WAL lets readers carry on while
+                # a writer commits; synchronous=NORMAL only fsyncs at
+                # checkpoints (safe in WAL mode, an OS crash can lose the last
+                # commits but never corrupts); 256MB of the file is mmapped.
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA mmap_size=268435456;'
+                    'PRAGMA temp_store=MEMORY'
+                ),
+            },
+            # A file (not the shared in-memory db) so threaded tests really contend.
+            'TEST': {
+                'NAME': BASE_DIR / 'test_db.sqlite3',
+            },
+        }
     }
+
+# Read replicas (Home/routing.py): DATABASE_REPLICAS lists replica hosts
+# (host or host:port) for postgresql, or database files for sqlite, which
+# something else keeps in sync (streaming replication, litestream, ...).
+# Each becomes a "replicaN" alias with the primary's other settings. Reads
+# go to a replica unless the browser wrote in the last REPLICA_PIN_SECONDS;
+# keep that above the usual replication lag. Tests use the primary only.
+REPLICA_DATABASES = []
+for n, replica in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{n}'
+    DATABASES[alias] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    if DATABASE_ENGINE == 'postgresql':
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias].update(HOST=host, PORT=port or DATABASES['default']['PORT'])
+    else:
+        DATABASES[alias]['NAME'] = replica.strip()
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['Home.routing.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Per-user wallet summaries; see Home/caching.py. Bounded by MAX_ENTRIES,
+    # culling a third of the entries when full.
+    'wallet': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'wallet',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 3,
+        },
+    },
+}
+
+WALLET_CACHE_TIMEOUT = 300
+
+# Static pages (home, explore, category pages...) are rendered once and served
+# from the default cache with ETag / Last-Modified; see Home/decorators.py.
+STATIC_PAGE_CACHE = True
+STATIC_PAGE_CACHE_TIMEOUT = 60 * 60
+STATIC_PAGE_MAX_AGE = 10 * 60
+
+# Request instrumentation (Home/middleware.py). Requests over either budget
+# are logged to the "Home.performance" logger. /metrics is open to staff and
+# to scrapers sending "Authorization: Bearer <METRICS_TOKEN>".
+PERF_QUERY_BUDGET = 20
+PERF_LATENCY_BUDGET_MS = 500
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Credits every new account starts with (a "granted" ledger row, see
+# Home/ledger.py). Hosts are only paid once an attended session ends, so
+# without them nobody could make the first join.
+SIGNUP_CREDITS = int(os.environ.get('SIGNUP_CREDITS', 10))
+
+# Token-bucket budgets for the credit-mutating views (Home/ratelimit.py):
+# "user" per signed-in account, "ip" per client address, as <count>/<s|m|h|d>.
+# Over budget the view answers 429 with Retry-After. RATE_LIMIT_STORE may be
+# 'Home.ratelimit.CacheStore' to share buckets through RATE_LIMIT_CACHE.
+RATE_LIMITS = {
+    'host': {'user': '20/h', 'ip': '60/h'},
+    'join': {'user': '30/m', 'ip': '120/m'},
 }
+RATE_LIMIT_STORE = 'Home.ratelimit.MemoryStore'
+RATE_LIMIT_CACHE = 'default'
+
+# Live attendance hub behind the /ws/sessions/ sockets (Home/presence.py).
+# The in-memory hub only fans out within one process; point this at a
+# broker-backed class with the same interface to span workers.
+PRESENCE_BACKEND = os.environ.get('PRESENCE_BACKEND', 'Home.presence.InMemoryBackend')
+
+# Host similarities behind the "recommended for you" feed, written by
+# manage.py build_recommendations and memory-mapped by every worker.
+RECOMMENDATIONS_FILE = os.environ.get('RECOMMENDATIONS_FILE', str(BASE_DIR / 'recommendations.bin'))
+
+# Mail sent by background jobs (Home/tasks.py; run them with
+# manage.py run_jobs). Printed to the worker's console unless configured.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'CredLearn <noreply@localhost>')
 
 
 # Password validation
@@ -129,3 +278,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 STATICFILES_DIRS = [
        (BASE_DIR /"Main"/ "static"),
 ]
+
+# `manage.py build_assets` collects into STATIC_ROOT with content-hashed
+# names plus .gz/.br and responsive WebP variants (Home/storage.py).
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'Home.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Serve the built STATIC_ROOT through Django (precompressed, far-future
+# cache headers on hashed names) when no front-end server does it.
+SERVE_STATIC_ASSETS = not DEBUG
@@ -14,9 +14,10 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path,include
-from Home import views
+from django.urls import path,include,re_path
+from Home import assets, views
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.views import LogoutView   
 
@@ -44,11 +45,21 @@ urlpatterns = [
     path('mentor/',views.mentor,name='mentor'),
      # Wallet
     path('wallet/', views.wallet, name='wallet'),
+    path('wallet/cache-stats/', views.wallet_cache_stats, name='wallet_cache_stats'),
+    path('wallet/export/', views.export_history, name='export_history'),
+    path('reports/<str:report>/', views.session_report, name='session_report'),
+    path('metrics', views.metrics, name='metrics'),
     
     # Live Session
     path('host-session/', views.host_session, name='host_session'),
+    path('host-session/import/', views.import_sessions, name='import_sessions'),
     path('join-session/<int:session_id>/', views.join_session, name='join_session'),
     path("sessions/", views.session_list, name="session_list"),
+    path("sessions/recommended/", views.recommended_sessions, name="recommended_sessions"),
+    path("api/sessions/", views.session_catalogue_api, name="session_catalogue_api"),
+    path("api/calendar/", views.session_calendar_api, name="session_calendar_api"),
+    path("search/", views.search_sessions, name="search_sessions"),
+    path("leaderboard/", views.leaderboards, name="leaderboard"),
     path('accounts/', include('django.contrib.auth.urls')),
     path('login/', LoginView.as_view(template_name='registration/login.html'), name='login'),
 
@@ -56,4 +67,9 @@ urlpatterns = [
    path('logout/', views.logout_user, name='logout'),
    path('browse-sessions/', views.browse_sessions, name='browse_sessions'),
 
-]  
\ No newline at end of file
+]
+
+if settings.SERVE_STATIC_ASSETS:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), assets.serve),
+    ]
@@ -0,0 +1,8 @@
+# Load and latency benchmarks for the credit flows.
+#
+#     python manage.py benchmark --users 1000 --sessions 5000 --output run.json
+#     python manage.py benchmark --baseline run.json --threshold 0.25
+#
+# seed.py bulk-loads synthetic users, sessions, attendances and ledger rows;
+# flows.py drives the wallet / browse / join / host views through the test
+# client and reports latency percentiles and query counts per flow.
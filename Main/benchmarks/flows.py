@@ -0,0 +1,111 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from Home.caching import WALLET_CACHE
+from Home.enrollment import JOIN_COST
+from Home.models import Profile, LiveSession
+
+FLOWS = ("wallet", "browse", "join", "host")
+CLIENTS = 50  # Logged-in users the requests are spread over
+
+
+def percentile(samples, pct):
+    # Nearest-rank on sorted samples.
+    ordered = sorted(samples)
+    rank = max(0, -(-len(ordered) * pct // 100) - 1)
+    return ordered[int(rank)]
+
+
+def _summarize(times, queries):
+    return {
+        "requests": len(times),
+        "p50_ms": round(percentile(times, 50), 2),
+        "p95_ms": round(percentile(times, 95), 2),
+        "p99_ms": round(percentile(times, 99), 2),
+        "mean_ms": round(statistics.fmean(times), 2),
+        "queries_p50": percentile(queries, 50),
+        "queries_max": max(queries),
+    }
+
+
+# ==========================================================
+# FLOWS (each request timed end to end, queries counted)
+# ==========================================================
+def run(requests=200, rng=None):
+    rng = rng or random.Random(1)
+    now = timezone.now()
+    cache.clear()
+    caches[WALLET_CACHE].clear()
+
+    user_ids = list(Profile.objects.filter(credits__gte=JOIN_COST * requests)
+                                   .order_by("user_id").values_list("user_id", flat=True))
+    clients = []
+    for user in User.objects.filter(pk__in=rng.sample(user_ids, min(CLIENTS, len(user_ids)))):
+        client = Client()
+        client.force_login(user)
+        clients.append(client)
+    if not clients:
+        raise ValueError("No seeded users with enough credits; seed first.")
+
+    upcoming = list(LiveSession.objects.filter(is_cancelled=False, scheduled_at__gt=now)
+                                       .values_list("id", flat=True))
+    categories = [value for value, _ in LiveSession.CATEGORY_CHOICES]
+
+    def request(flow, client, n):
+        if flow == "wallet":
+            return client.get(reverse("wallet"))
+        if flow == "browse":
+            return client.get(reverse("browse_sessions"))
+        if flow == "join":
+            return client.post(reverse("join_session", args=[rng.choice(upcoming)]))
+        return client.post(reverse("host_session"), {
+            "title": f"Benchmark session {n}",
+            "schedule": (now + timedelta(days=rng.randint(1, 60))).strftime("%Y-%m-%dT%H:%M"),
+            "category": rng.choice(categories),
+        })
+
+    samples = {flow: ([], []) for flow in FLOWS}
+    # One client replays far more than a user's budget; time the views, not 429s.
+    with override_settings(RATE_LIMITS={}):
+        for n in range(requests):
+            for flow in FLOWS:
+                client = rng.choice(clients)
+                with CaptureQueriesContext(connection) as queries:
+                    began = time.perf_counter()
+                    response = request(flow, client, n)
+                    elapsed = (time.perf_counter() - began) * 1000
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{flow} returned {response.status_code}")
+                samples[flow][0].append(elapsed)
+                samples[flow][1].append(len(queries))
+
+    return {flow: _summarize(times, queries) for flow, (times, queries) in samples.items()}
+
+
+# ==========================================================
+# REGRESSION CHECK (against an earlier JSON report)
+# ----------------------------------------------------------
+# Latency may drift by `threshold` (0.25 = +25% on p95);
+# query counts are deterministic, so any increase fails.
+# ==========================================================
+def regressions(report, baseline, threshold):
+    failures = []
+    for flow, before in baseline.get("flows", {}).items():
+        after = report["flows"].get(flow)
+        if after is None:
+            continue
+        if after["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            failures.append(f"{flow}: p95 {after['p95_ms']}ms > {before['p95_ms']}ms + {threshold:.0%}")
+        if after["queries_max"] > before["queries_max"]:
+            failures.append(f"{flow}: {after['queries_max']} queries > {before['queries_max']}")
+    return failures
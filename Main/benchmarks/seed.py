@@ -0,0 +1,86 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from Home import rollups
+from Home.enrollment import JOIN_COST
+from Home.models import Profile, LiveSession, SessionAttendance, CreditTransaction
+
+WELCOME_GRANT = 1000
+USERNAME_PREFIX = "bench-"
+
+
+# ==========================================================
+# SYNTHETIC DATA (bulk inserts only, no per-row signals)
+# ----------------------------------------------------------
+# Half the sessions are in the past 60 days, half in the next
+# 60; every user gets a welcome grant, hosts earn and learners
+# spend through ledger rows with correct running balances.
+# ==========================================================
+def seed(users=1000, sessions=5000, attendances=20000, rng=None, batch_size=2000):
+    rng = rng or random.Random(1)
+    now = timezone.now()
+    categories = [value for value, _ in LiveSession.CATEGORY_CHOICES]
+
+    User.objects.bulk_create(
+        [User(username=f"{USERNAME_PREFIX}{n}", password="!") for n in range(users)],
+        batch_size=batch_size,
+    )
+    user_ids = list(User.objects.filter(username__startswith=USERNAME_PREFIX)
+                                .order_by("id").values_list("id", flat=True))
+
+    LiveSession.objects.bulk_create([
+        LiveSession(
+            host_id=rng.choice(user_ids),
+            title=f"Session {n}",
+            category=rng.choice(categories),
+            scheduled_at=now + timedelta(minutes=rng.randint(-60 * 24 * 60, 60 * 24 * 60)),
+            max_attendees=rng.choice([None, None, rng.randint(5, 50)]),
+        )
+        for n in range(sessions)
+    ], batch_size=batch_size)
+    # Sessions that have ended are settled: the seeded ledger already pays
+    # their hosts. Upcoming ones stay open to joins and settle normally.
+    LiveSession.objects.filter(host_id__in=user_ids, ends_at__lte=now).update(settled_at=now)
+    rows = list(LiveSession.objects.filter(host_id__in=user_ids)
+                                   .values_list("id", "host_id", "title", "max_attendees", "credit_reward",
+                                                "settled_at"))
+
+    # (user_id, created_at, kind, amount, title, session_id)
+    events = [(uid, now - timedelta(days=90), CreditTransaction.EARNED, WELCOME_GRANT, "Welcome grant", None)
+              for uid in user_ids]
+    events += [(host_id, now - timedelta(minutes=rng.randint(1, 60 * 24 * 90)), CreditTransaction.EARNED,
+                reward, title, session_id)
+               for session_id, host_id, title, _, reward, settled_at in rows if settled_at]
+
+    taken, seats, joined = set(), {}, []
+    for _ in range(attendances * 2):
+        if len(joined) >= attendances or not rows:
+            break
+        session_id, host_id, title, capacity, _, _ = rng.choice(rows)
+        attendee = rng.choice(user_ids)
+        if attendee == host_id or (session_id, attendee) in taken:
+            continue
+        if capacity is not None and seats.get(session_id, 0) >= capacity:
+            continue
+        taken.add((session_id, attendee))
+        seats[session_id] = seats.get(session_id, 0) + 1
+        joined.append(SessionAttendance(session_id=session_id, attendee_id=attendee, credit_cost=JOIN_COST))
+        events.append((attendee, now - timedelta(minutes=rng.randint(1, 60 * 24 * 90)),
+                       CreditTransaction.SPENT, JOIN_COST, title, session_id))
+    SessionAttendance.objects.bulk_create(joined, batch_size=batch_size)
+
+    balances = {}
+    ledger = []
+    for uid, created_at, kind, amount, title, session_id in sorted(events, key=lambda e: (e[0], e[1])):
+        balances[uid] = balances.get(uid, 0) + (amount if kind == CreditTransaction.EARNED else -amount)
+        ledger.append(CreditTransaction(user_id=uid, session_id=session_id, kind=kind, amount=amount,
+                                        balance_after=balances[uid], title=title, created_at=created_at))
+    CreditTransaction.objects.bulk_create(ledger, batch_size=batch_size)
+    Profile.objects.bulk_create([Profile(user_id=uid, credits=balances[uid]) for uid in user_ids],
+                                batch_size=batch_size)
+    rollups.rebuild()
+
+    return {"users": len(user_ids), "sessions": len(rows), "attendances": len(joined), "ledger": len(ledger)}
@@ -0,0 +1,31 @@
+# Production server settings for the ASGI app (Main/Main/asgi.py):
+#
+#     pip install gunicorn uvicorn
+#     gunicorn Main.asgi:application -c gunicorn.conf.py
+#
+# Every value can be overridden from the environment.
+import multiprocessing
+import os
+
+# Main/ holds the project package and the Home app.
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Main")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# One event loop per worker serves many concurrent requests, so one worker
+# per core is enough (unlike sync workers, which need 2 * cores + 1).
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+
+# Under ASGI each in-flight request runs its ORM calls on its own thread with
+# its own database connection, closed when the request ends. CONN_MAX_AGE
+# can't be reused across those threads, so on PostgreSQL run ASGI with the
+# connection pool (DATABASE_POOL_MAX) instead of persistent connections.
+
+# Recycle workers now and then so slow leaks can't accumulate.
+max_requests = 5000
+max_requests_jitter = 500
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5